@@ -1,18 +1,63 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+import anyio
+import asyncio
+import base64
+import datetime
+import json
+import os
+from typing import Iterator, List, Optional
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from Interfaz import AdminTarea
+from pydantic import BaseModel
+from nucleo import (AdminTarea, AdminUsuario, Tarea, CAMPOS_JSON, ESTADOS, ESTADOS_VALIDOS, FORMATO_FECHA, ORDENES,
+                    json_tarea, normalizar_vencimiento)
+import compresion
+import eventos
+import metricas
+import transferencia
+from transferencia import tarea_desde_dict
+from vencimientos import PlanificadorVencimientos
 
 app = FastAPI()
-admin_tarea = AdminTarea("tareas.db")
+#Comprime con brotli o gzip las respuestas de al menos TAREAS_COMPRIMIR_DESDE bytes (ver compresion.py)
+app.add_middleware(compresion.CompresionHTTP, minimo=int(os.environ.get("TAREAS_COMPRIMIR_DESDE", "1024")))
+app.add_middleware(metricas.MedidorHTTP)     #Mide la duracion de cada peticion por ruta (se ve en GET /metrics)
+
+#Usa un pool de conexiones, asi cada peticion trabaja con su propia conexion.
+#Las consultas que tarden mas de TAREAS_SQL_LENTA_MS milisegundos se escriben en el log "tareas.sql".
+#Con TAREAS_ESCRITURA_AGRUPADA=1 las escrituras de peticiones simultaneas se confirman juntas en una sola transaccion.
+opciones_tareas = dict(umbral_lento_ms=float(os.environ.get("TAREAS_SQL_LENTA_MS", "100")),
+                       escritura_agrupada=os.environ.get("TAREAS_ESCRITURA_AGRUPADA") == "1",
+                       espera_grupo_ms=float(os.environ.get("TAREAS_ESPERA_GRUPO_MS", "0")))
+#Con TAREAS_PARTICIONES=N (mayor a 1) las tareas se reparten en N archivos, asi hay N escritores (ver particiones.py)
+particiones = int(os.environ.get("TAREAS_PARTICIONES", "1"))
+if particiones > 1:
+    from particiones import AdminTareaParticionada
+    admin_tarea = AdminTareaParticionada("tareas.db", particiones, **opciones_tareas)
+else:
+    admin_tarea = AdminTarea("tareas.db", **opciones_tareas)
+
+admin_usuario = AdminUsuario(admin_tarea.pool)    #Los mismos usuarios que usa la ventana de inicio de sesion
+
+central_eventos = eventos.CentralEventos(capacidad_cliente=int(os.environ.get("TAREAS_EVENTOS_COLA", "256")))
+admin_tarea.suscribir(central_eventos.publicar)     #Cada escritura confirmada se avisa a los clientes de /eventos y /ws
+
+#Tambien se avisa cuando vence una tarea y, TAREAS_RECORDATORIO_MIN minutos antes, un recordatorio (ver vencimientos.py)
+planificador = PlanificadorVencimientos(admin_tarea, anticipacion=float(os.environ.get("TAREAS_RECORDATORIO_MIN", "60")) * 60)
+planificador.suscribir(central_eventos.publicar)
+
+#Las rutas se definen con "def" (y no "async def") porque SQLite bloquea: FastAPI las ejecuta en su pool de hilos
+#y el bucle de eventos queda libre para atender otras peticiones mientras tanto.
 
 # Crear una instancia de HTTPBasic para manejar la autenticación básica HTTP
 security = HTTPBasic()               
 
 # Función para verificar las credenciales del usuario
 def verificar_credenciales(credenciales: HTTPBasicCredentials = Depends(security)):  
-    usuario = "Admin"                                      #Se ejecuta security y la funcion, si los datos son
-    contraseña = "12345"                                   #correctos la funcion devuelve True
-    if credenciales.username == usuario and credenciales.password == contraseña:
+    #Se ejecuta security y la funcion, si los datos son correctos la funcion devuelve True.
+    #Solo la primera peticion de cada sesion calcula el hash lento; las siguientes salen de la cache de AdminUsuario.
+    if admin_usuario.verificar(credenciales.username, credenciales.password) is not None:
         return True
     else:
         raise HTTPException(
@@ -21,14 +66,14 @@ def verificar_credenciales(credenciales: HTTPBasicCredentials = Depends(security
         )
 
 @app.delete("/eliminar/{tarea_id}")   #Si la funcion devuelve True se ejecutaran las rutas solicitadas por el Usuario.
-async def eliminar_tarea(tarea_id: int, autorizado: bool = Depends(verificar_credenciales)):
+def eliminar_tarea(tarea_id: int, autorizado: bool = Depends(verificar_credenciales)):
     if admin_tarea.eliminar_tarea(tarea_id):
         return {"mensaje": "Tarea eliminada correctamente"}
     else:
         return {"mensaje": "La tarea que intentas eliminar no existe"}
     
 @app.delete("/borrar")
-async def borrar_todo(autorizado: bool = Depends(verificar_credenciales)):
+def borrar_todo(autorizado: bool = Depends(verificar_credenciales)):
     if admin_tarea.eliminar_todas_tareas():
         return {"mensaje": "Tareas borradas correctamente"}
     else:
@@ -36,9 +81,464 @@ async def borrar_todo(autorizado: bool = Depends(verificar_credenciales)):
     
 
 @app.get("/tarea/{tarea_id}")
-async def obtener_tarea(tarea_id: int, autorizado : bool = Depends(verificar_credenciales)):
-    Tarea = admin_tarea.obtener_tarea(tarea_id)
+def obtener_tarea(tarea_id: int, request: Request, incluir_archivadas: bool = False,
+                  autorizado : bool = Depends(verificar_credenciales)):
+    Tarea, etag = admin_tarea.obtener_tarea_json(tarea_id)     #"Tarea" ya viene como JSON en bytes
+    if not Tarea and incluir_archivadas:
+        #Con ?incluir_archivadas=true tambien se busca en el archivo (la respuesta trae "fecha_archivada")
+        archivada = admin_tarea.obtener_archivada_json(tarea_id)
+        if archivada:
+            return Response(content=archivada, media_type="application/json")
     if Tarea:
-        return Tarea
+        #Si el cliente ya tiene esta misma version de la tarea (mismo ETag) se responde 304 sin cuerpo
+        etags_cliente = [valor.strip().removeprefix("W/") for valor in request.headers.get("if-none-match", "").split(",")]
+        if etag in etags_cliente or "*" in etags_cliente:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        #El cliente puede guardarla, pero debe revalidarla
+        return Response(content=Tarea, media_type="application/json",
+                        headers={"ETag": etag, "Cache-Control": "private, no-cache"})
     else:
         return {"error": "No se pudo encontrar la tarea"}
+
+
+@app.post("/archivar")
+def archivar_completadas(dias: float = Query(30, ge=0), autorizado: bool = Depends(verificar_credenciales)):
+    #Pasa al archivo las tareas completadas hace mas de "dias" dias (de a bloques, sin frenar las demas escrituras)
+    cantidad = admin_tarea.archivar_completadas(dias)
+    return {"mensaje": "Tareas archivadas correctamente", "cantidad": cantidad}
+
+
+@app.get("/estadisticas")
+def ver_estadisticas(dias: int = Query(30, ge=0, le=3660), autorizado: bool = Depends(verificar_credenciales)):
+    #Tareas por estado y altas de los ultimos "dias" dias con actividad; sale de las tablas de resumen
+    resumen = admin_tarea.estadisticas(dias)
+    resumen["creadas_por_dia"] = [{"dia": dia, "creadas": creadas} for dia, creadas in resumen["creadas_por_dia"]]
+    return resumen
+
+
+@app.get("/cache")
+def estadisticas_cache(autorizado: bool = Depends(verificar_credenciales)):
+    return admin_tarea.cache.estadisticas()     #Aciertos, fallos y desalojos de la cache de obtener_tarea
+
+
+def tarea_a_dict(tarea: Tarea) -> dict:     #Convierte una Tarea en un diccionario listo para pasar a JSON
+    return {
+        "id": tarea.id,
+        "titulo": tarea.titulo,
+        "descripcion": tarea.descripcion,
+        "estado": tarea.estado,
+        "fecha_creada": tarea.fecha_creada,
+        "fecha_actualizada": tarea.fecha_actualizada,
+        "fecha_vencimiento": tarea.fecha_vencimiento
+    }
+
+
+#Las rutas de listado trabajan con el JSON que arma SQLite (ver JSON_TAREA en nucleo.py): solo unen textos,
+#sin crear objetos Tarea ni diccionarios, y sin pasar por el codificador generico de FastAPI.
+
+def generar_json(bloques):      #Va armando el arreglo JSON de a bloques, sin juntar todas las tareas en una lista
+    yield "["
+    separador = ""
+    for bloque in bloques:       #Cada envio lleva un bloque entero, asi no se cambia de hilo por cada tarea
+        yield separador + ",".join(bloque)
+        separador = ","
+    yield "]"
+
+
+def generar_ndjson(bloques):    #NDJSON: una tarea en formato JSON por linea
+    for bloque in bloques:
+        yield "\n".join(bloque) + "\n"
+
+
+@app.get("/listar")
+def ver_tareas(despues_de: Optional[int] = Query(None, ge=0),
+               limite: int = Query(100, ge=1, le=1000),
+               formato: str = Query("json", pattern="^(json|ndjson)$"),
+               incluir_archivadas: bool = False,
+               campos: Optional[str] = None,
+               autorizado: bool = Depends(verificar_credenciales)):
+    #Con ?incluir_archivadas=true tambien se listan las tareas archivadas, ordenadas por ID junto con las demas.
+    #Con ?campos=id,titulo cada tarea trae solo esas columnas: SQLite arma el JSON sin leer las demas.
+    if campos is not None:
+        campos = [campo.strip() for campo in campos.split(",") if campo.strip()]
+        try:
+            json_tarea(campos)
+        except ValueError as error:
+            raise HTTPException(status_code=422, detail=f"{error}. Campos posibles: {', '.join(CAMPOS_JSON)}")
+    if despues_de is not None:
+        #Modo paginado: se devuelve una sola pagina y el ID desde el cual pedir la siguiente.
+        pagina = admin_tarea.traer_json_pagina(despues_de, limite, incluir_archivadas, campos)
+        siguiente = pagina[-1][0] if len(pagina) == limite else None
+        cuerpo = '{"tareas":[' + ",".join(tarea_json for tarea_id, tarea_json in pagina) + '],"siguiente":' + json.dumps(siguiente) + "}"
+        return Response(content=cuerpo, media_type="application/json")
+
+    #Sin "despues_de" se envian todas las tareas, pero de a bloques a medida que se leen de la base de datos.
+    bloques = admin_tarea.iterar_json(limite, incluir_archivadas, campos)
+    if formato == "ndjson":
+        return StreamingResponse(generar_ndjson(bloques), media_type="application/x-ndjson")
+    return StreamingResponse(generar_json(bloques), media_type="application/json")
+
+
+@app.get("/cambios")
+def ver_cambios(desde: str = "0",
+                limite: int = Query(1000, ge=1, le=10000),
+                autorizado: bool = Depends(verificar_credenciales)):
+    #Sincronizacion incremental: el cliente guarda la "version" de la respuesta y la manda como "desde" en la
+    #siguiente consulta, asi solo recibe las tareas que cambiaron. Con "mas" en true conviene pedir de nuevo enseguida.
+    #Si "reiniciar" es true el cliente quedo demasiado atras: tiene que volver a leer /listar y seguir desde "version".
+    #Con una sola base la version es un numero; con particiones es un texto (ver particiones.py) que se devuelve tal cual.
+    if particiones == 1:
+        if not desde.isdigit():
+            raise HTTPException(status_code=422, detail="El parametro desde no es valido")
+        desde = int(desde)
+    cambios, version, reiniciar = admin_tarea.cambios_desde(desde, limite)
+    cuerpo = ('{"version":' + json.dumps(version) + ',"reiniciar":' + json.dumps(reiniciar) +
+              ',"mas":' + json.dumps(len(cambios) == limite) + ',"cambios":[' + ",".join(cambios) + "]}")
+    return Response(content=cuerpo, media_type="application/json")
+
+
+def leer_lote(cuerpo: bytes, ndjson: bool) -> Iterator[Tarea]:
+    #Acepta un arreglo JSON o NDJSON (un objeto por linea). En NDJSON las lineas se van leyendo
+    #a medida que se insertan, sin armar antes una lista con todas las tareas.
+    if ndjson:
+        posicion = 0
+        for linea in cuerpo.splitlines():
+            if linea.strip():
+                posicion += 1
+                yield tarea_desde_dict(json.loads(linea), posicion)
+    else:
+        datos = json.loads(cuerpo)
+        if not isinstance(datos, list):
+            raise ValueError("Se esperaba un arreglo JSON de tareas")
+        for posicion, item in enumerate(datos, start=1):
+            yield tarea_desde_dict(item, posicion)
+
+
+@app.post("/tareas/lote")
+async def agregar_tareas_lote(request: Request, autorizado: bool = Depends(verificar_credenciales)):
+    cuerpo = await request.body()
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    try:
+        #La insercion bloquea, por eso se ejecuta en el pool de hilos y no en el bucle de eventos
+        rango = await run_in_threadpool(admin_tarea.agregar_tareas_lote, leer_lote(cuerpo, ndjson))
+    except ValueError as error:     #json.JSONDecodeError tambien es un ValueError; el lote entero se deshace
+        raise HTTPException(status_code=422, detail=str(error))
+
+    if rango is None:
+        return {"mensaje": "No habia tareas para agregar", "cantidad": 0}
+    return {"mensaje": "Tareas agregadas correctamente", "cantidad": rango[1] - rango[0] + 1,
+            "primer_id": rango[0], "ultimo_id": rango[1]}
+
+
+@app.get("/exportar")
+def exportar_tareas(formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+                    autorizado: bool = Depends(verificar_credenciales)):
+    #Descarga todas las tareas como archivo; se envian de a bloques a medida que se leen de la base de datos
+    tipos = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+    return StreamingResponse(transferencia.exportar(admin_tarea, formato), media_type=tipos[formato],
+                             headers={"Content-Disposition": f'attachment; filename="tareas.{formato}"'})
+
+
+@app.post("/importar")
+async def importar_tareas(request: Request,
+                          formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+                          autorizado: bool = Depends(verificar_credenciales)):
+    #El archivo va tal cual en el cuerpo (por ejemplo: curl --data-binary @tareas.csv). Se lee de a partes
+    #a medida que llega y se guarda de a bloques, sin tener nunca el archivo entero en memoria.
+    #Si una tarea no es valida se responde 422 con "importadas": las de los bloques anteriores ya se guardaron.
+    partes = request.stream().__aiter__()
+
+    async def siguiente_parte():
+        try:
+            return await partes.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def leer_partes():      #Corre en el hilo de la importacion y le pide cada parte del cuerpo al bucle de eventos
+        while True:
+            parte = anyio.from_thread.run(siguiente_parte)
+            if parte is None:
+                return
+            yield parte
+
+    try:
+        importadas = await run_in_threadpool(transferencia.importar, admin_tarea,
+                                             transferencia.abrir_bloques(leer_partes()), formato)
+    except transferencia.ErrorImportacion as error:      #Tambien si el archivo no esta en UTF-8
+        raise HTTPException(status_code=422, detail={"error": str(error), "importadas": error.importadas})
+    return {"mensaje": "Tareas importadas correctamente", "cantidad": importadas}
+
+
+@app.get("/tareas")
+def filtrar_tareas(estado: str,
+                   orden: str = "fecha_actualizada",
+                   limite: int = Query(100, ge=1, le=1000),
+                   despues_de: Optional[str] = None,
+                   autorizado: bool = Depends(verificar_credenciales)):
+    #"orden" es el nombre de una columna de ORDENES; con un "-" adelante el orden es descendente.
+    #"despues_de" es el valor "siguiente" que devolvio la pagina anterior. Tiene la forma "valor|id"; si la ultima
+    #tarea no tenia fecha (NULL) el valor queda vacio, por ejemplo "|42".
+    if estado not in ESTADOS:
+        raise HTTPException(status_code=422, detail=f"Estado invalido, debe ser uno de: {', '.join(ESTADOS)}")
+    descendente = orden.startswith("-")
+    columna = orden.lstrip("-")
+    if columna not in ORDENES:
+        raise HTTPException(status_code=422, detail=f"Orden invalido, debe ser uno de: {', '.join(ORDENES)}")
+
+    cursor = None
+    if despues_de is not None:
+        valor, _, ultimo_id = despues_de.rpartition("|")
+        if not ultimo_id.isdigit():
+            raise HTTPException(status_code=422, detail="El parametro despues_de no es valido")
+        cursor = (valor or None, int(ultimo_id))
+
+    tareas = admin_tarea.traer_tareas_por_estado(estado, columna, descendente, limite, cursor)
+    siguiente = None
+    if len(tareas) == limite:
+        ultima = tareas[-1]
+        valor = getattr(ultima, columna)
+        siguiente = f"{'' if valor is None else valor}|{ultima.id}"
+    return {"tareas": [tarea_a_dict(tarea) for tarea in tareas], "siguiente": siguiente}
+
+
+@app.get("/tareas/vencidas")
+def tareas_vencidas(hasta: Optional[str] = None,
+                    limite: int = Query(100, ge=1, le=1000),
+                    despues_de: Optional[str] = None,
+                    autorizado: bool = Depends(verificar_credenciales)):
+    #Tareas no completadas cuya fecha de vencimiento ya paso (o es anterior a "hasta"), de la mas atrasada a la
+    #mas reciente. Se leen recorriendo un rango del indice de vencimientos. "despues_de" es el "siguiente" anterior.
+    try:
+        hasta = normalizar_vencimiento(hasta) or datetime.datetime.now().strftime(FORMATO_FECHA)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    cursor = None
+    if despues_de is not None:
+        fecha, _, ultimo_id = despues_de.rpartition("|")    #El cursor tiene la forma "fecha|id"
+        if not ultimo_id.isdigit():
+            raise HTTPException(status_code=422, detail="El parametro despues_de no es valido")
+        cursor = (fecha, int(ultimo_id))
+
+    tareas = admin_tarea.traer_vencimientos(hasta, limite, cursor)
+    siguiente = None
+    if len(tareas) == limite:
+        siguiente = f"{tareas[-1].fecha_vencimiento}|{tareas[-1].id}"
+    return {"tareas": [tarea_a_dict(tarea) for tarea in tareas], "siguiente": siguiente}
+
+
+class Vencimiento(BaseModel):   #Cuerpo de PATCH /tarea/{id}/vencimiento: {"fecha_vencimiento": "2024-06-30 18:00"}
+    fecha_vencimiento: Optional[str] = None     #null quita el vencimiento
+
+
+@app.patch("/tarea/{tarea_id}/vencimiento")
+def actualizar_vencimiento(tarea_id: int, cambio: Vencimiento, autorizado: bool = Depends(verificar_credenciales)):
+    try:
+        actualizada = admin_tarea.actualizar_vencimiento(tarea_id, cambio.fecha_vencimiento)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    if actualizada:
+        return {"mensaje": "Vencimiento actualizado correctamente"}
+    return {"error": "No se pudo encontrar la tarea"}
+
+
+#Subtareas: cada tarea puede tener un padre. Los subarboles, los ancestros y el avance salen de la tabla de
+#clausura (ver la migracion 9 en nucleo.py) con una sola consulta, sin importar la profundidad del arbol.
+
+class Subtarea(BaseModel):      #Cuerpo de POST /tarea/{id}/subtareas: {"titulo": "...", "descripcion": "..."}
+    titulo: str
+    descripcion: str = ""
+    fecha_vencimiento: Optional[str] = None
+
+
+@app.post("/tarea/{tarea_id}/subtareas")
+def agregar_subtarea(tarea_id: int, subtarea: Subtarea, autorizado: bool = Depends(verificar_credenciales)):
+    #Como cualquier tarea nueva, la subtarea empieza "Pendiente"
+    if admin_tarea.obtener_tarea(tarea_id) is None:
+        return {"error": "No se pudo encontrar la tarea"}
+    ahora = datetime.datetime.now().strftime(FORMATO_FECHA)
+    try:
+        tarea = Tarea(None, subtarea.titulo, subtarea.descripcion, "Pendiente", ahora, ahora,
+                      normalizar_vencimiento(subtarea.fecha_vencimiento))
+        subtarea_id = admin_tarea.agregar_tarea(tarea, tarea_id)
+    except ValueError as error:     #Fecha invalida, o la tarea se elimino mientras tanto
+        raise HTTPException(status_code=422, detail=str(error))
+    return {"mensaje": "Subtarea agregada correctamente", "id": subtarea_id}
+
+
+@app.get("/tarea/{tarea_id}/subarbol")
+def ver_subarbol(tarea_id: int, profundidad: Optional[int] = Query(None, ge=1),
+                 autorizado: bool = Depends(verificar_credenciales)):
+    #La tarea con sus subtareas anidadas (cada una con su lista "subtareas"), hasta "profundidad" niveles
+    tarea = admin_tarea.obtener_tarea(tarea_id)
+    if tarea is None:
+        return {"error": "No se pudo encontrar la tarea"}
+    raiz = dict(tarea_a_dict(tarea), subtareas=[])
+    nodos = {tarea_id: raiz}
+    #Vienen por nivel, asi el padre de cada subtarea ya esta en "nodos"
+    for nivel, padre_id, subtarea in admin_tarea.traer_descendientes(tarea_id, profundidad):
+        nodo = nodos[subtarea.id] = dict(tarea_a_dict(subtarea), subtareas=[])
+        nodos[padre_id]["subtareas"].append(nodo)
+    return raiz
+
+
+@app.get("/tarea/{tarea_id}/ancestros")
+def ver_ancestros(tarea_id: int, autorizado: bool = Depends(verificar_credenciales)):
+    #Desde la tarea de primer nivel hasta el padre; vacio si la tarea no es subtarea de otra
+    if admin_tarea.obtener_tarea(tarea_id) is None:
+        return {"error": "No se pudo encontrar la tarea"}
+    return [tarea_a_dict(tarea) for tarea in admin_tarea.traer_ancestros(tarea_id)]
+
+
+@app.get("/tarea/{tarea_id}/progreso")
+def ver_progreso(tarea_id: int, autorizado: bool = Depends(verificar_credenciales)):
+    #Cuantas subtareas tiene la tarea (a cualquier nivel), cuantas estan completadas y el porcentaje
+    progreso = admin_tarea.progreso(tarea_id)
+    if progreso is None:
+        return {"error": "No se pudo encontrar la tarea"}
+    return progreso
+
+
+class Padre(BaseModel):         #Cuerpo de PATCH /tarea/{id}/padre: {"padre_id": 3}
+    padre_id: Optional[int] = None      #null deja la tarea sin padre
+
+
+@app.patch("/tarea/{tarea_id}/padre")
+def mover_tarea(tarea_id: int, cambio: Padre, autorizado: bool = Depends(verificar_credenciales)):
+    #Mueve la tarea, con todas sus subtareas, debajo de otra. Si eso formaria un ciclo (el padre nuevo es una
+    #de sus subtareas) o el padre no existe, responde 422 y no cambia nada.
+    try:
+        movida = admin_tarea.mover_tarea(tarea_id, cambio.padre_id)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    if movida:
+        return {"mensaje": "Tarea movida correctamente"}
+    return {"error": "No se pudo encontrar la tarea"}
+
+
+class IdsLote(BaseModel):       #Cuerpo de DELETE /tareas: {"ids": [1, 2, 3]}
+    ids: List[int]
+
+
+class EstadoLote(IdsLote):      #Cuerpo de PATCH /tareas/estado: {"ids": [1, 2, 3], "estado": "Completada"}
+    estado: str
+
+
+@app.patch("/tareas/estado")
+def actualizar_estado_lote(cambio: EstadoLote, autorizado: bool = Depends(verificar_credenciales)):
+    #Cambia el estado de todas las tareas de "ids" en una sola transaccion. Como en la ventana, una tarea
+    #solo puede pasar a uno de ESTADOS_VALIDOS (no puede volver a "Pendiente").
+    if cambio.estado not in ESTADOS_VALIDOS:
+        raise HTTPException(status_code=422, detail=f"Estado invalido, debe ser uno de: {', '.join(ESTADOS_VALIDOS)}")
+    cantidad = admin_tarea.actualizar_estado_lote(cambio.ids, cambio.estado)
+    return {"mensaje": "Estados actualizados correctamente", "cantidad": cantidad}
+
+
+@app.delete("/tareas")
+def eliminar_lote(lote: IdsLote, autorizado: bool = Depends(verificar_credenciales)):
+    #Elimina todas las tareas de "ids" en una sola transaccion; "cantidad" no cuenta los IDs que no existian
+    cantidad = admin_tarea.eliminar_lote(lote.ids)
+    return {"mensaje": "Tareas eliminadas correctamente", "cantidad": cantidad}
+
+
+@app.get("/buscar")
+def buscar_tareas(q: str, limite: int = Query(50, ge=1, le=500), autorizado: bool = Depends(verificar_credenciales)):
+    tareas = admin_tarea.buscar(q, limite)      #Las tareas vienen ordenadas de mas a menos relevante
+    return [tarea_a_dict(tarea) for tarea in tareas]
+
+
+#Avisos en vivo: /eventos (Server-Sent Events) y /ws (WebSocket) reciben un mensaje JSON por cada tarea
+#agregada, actualizada o eliminada, con la "version" del registro de cambios (ver GET /cambios). Cuando una
+#tarea cambia de padre llega {"tipo": "mover", "ids": [id], "padre_id": ...}.
+#Con un mensaje {"tipo": "resincronizar"} el cliente se quedo atras y tiene que pedir /cambios?desde=<version>.
+#Los avisos del planificador de vencimientos llegan como {"tipo": "vencida"} o {"tipo": "recordatorio"}, con el
+#"id", el "titulo" y la "fecha_vencimiento" de la tarea (no tienen "version": no son cambios de la base).
+#Estas rutas son "async def": mientras esperan no ocupan ningun hilo, solo una tarea del bucle de eventos.
+
+def credenciales_validas(encabezado: Optional[str]) -> bool:     #Para /ws, donde no se puede usar HTTPBasic
+    tipo, _, valor = (encabezado or "").partition(" ")
+    if tipo.lower() != "basic":
+        return False
+    try:
+        nombre, separador, clave = base64.b64decode(valor).decode("utf-8").partition(":")
+    except ValueError:      #Base64 o UTF-8 invalido
+        return False
+    return bool(separador) and admin_usuario.verificar(nombre, clave) is not None
+
+
+@app.get("/eventos")
+async def eventos_sse(autorizado: bool = Depends(verificar_credenciales)):
+    suscripcion = central_eventos.suscribir()
+
+    async def generar():
+        try:
+            yield ": conectado\n\n"
+            while True:
+                mensaje = await suscripcion.siguiente(espera=15)
+                if suscripcion.cerrada:     #El cliente no leia los avisos y se lo desconecto
+                    return
+                if mensaje is None:
+                    yield ": ping\n\n"      #Comentario SSE cada 15 segundos sin avisos, para detectar conexiones caidas
+                else:
+                    yield "data: " + mensaje + "\n\n"
+        finally:
+            central_eventos.desuscribir(suscripcion)
+
+    return StreamingResponse(generar(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.websocket("/ws")
+async def eventos_ws(websocket: WebSocket):
+    if not await run_in_threadpool(credenciales_validas, websocket.headers.get("authorization")):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    suscripcion = central_eventos.suscribir()
+
+    async def enviar():
+        while True:
+            mensaje = await suscripcion.siguiente()
+            if mensaje is None:
+                return
+            await websocket.send_text(mensaje)
+
+    async def recibir():        #Solo sirve para enterarse enseguida de que el cliente se desconecto
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tareas = [asyncio.ensure_future(enviar()), asyncio.ensure_future(recibir())]
+    try:
+        await asyncio.wait(tareas, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        central_eventos.desuscribir(suscripcion)
+    if suscripcion.cerrada:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+#Contadores de la cache de obtener_tarea, leidos en el momento en que se pide /metrics
+metricas.Valores("tareas_cache_eventos_total", "Aciertos, fallos y desalojos de la cache de tareas", "counter", ("evento",),
+                 lambda: {(evento,): admin_tarea.cache.estadisticas()[evento] for evento in ("aciertos", "fallos", "desalojos")})
+metricas.Valores("tareas_cache_entradas", "Tareas guardadas en la cache", "gauge", (),
+                 lambda: {(): admin_tarea.cache.estadisticas()["tamaño"]})
+metricas.Valores("tareas_eventos_clientes", "Clientes conectados a /eventos y /ws", "gauge", (),
+                 lambda: {(): central_eventos.estadisticas()["clientes"]})
+metricas.Valores("tareas_eventos_total", "Avisos enviados y clientes lentos resincronizados o desconectados", "counter",
+                 ("evento",), lambda: {(evento,): central_eventos.estadisticas()[evento]
+                                       for evento in ("enviados", "resincronizados", "desconectados")})
+metricas.Valores("tareas_vencimientos_avisos_total", "Avisos de vencimiento y recordatorios enviados", "counter", (),
+                 lambda: {(): planificador.avisos})
+
+
+@app.get("/metrics")
+def ver_metricas(autorizado: bool = Depends(verificar_credenciales)):
+    #Formato de texto de Prometheus: latencia por ruta, por sentencia SQL y contadores de la cache
+    return Response(content=metricas.exportar(), media_type="text/plain; version=0.0.4")
+
+
+#Punto de entrada del servidor: "python API.py" (o "uvicorn API:app"). La ventana se abre con "python Interfaz.py";
+#las dos usan las clases de nucleo.py, asi el servidor no necesita tkinter ni una pantalla para arrancar.
+if __name__ == "__main__":
+    import uvicorn     #Solo hace falta para servir la API, no para importar "app" (por ejemplo en las pruebas)
+
+    uvicorn.run(app, host=os.environ.get("TAREAS_HOST", "127.0.0.1"), port=int(os.environ.get("TAREAS_PUERTO", "8000")))
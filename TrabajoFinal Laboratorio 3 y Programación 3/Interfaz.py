@@ -1,164 +1,409 @@
-import hashlib
+#Interfaz grafica (Tkinter) del administrador de tareas. Las clases del dominio y de la base de datos estan en
+#nucleo.py; aca solo queda la ventana. Para el servidor ver API.py.
 import datetime
+import os
 import tkinter as tk
 from tkinter import messagebox
-import sqlite3
-from fastapi import FastAPI
-from typing import List
-
-class Persona:
-    def __init__(self, id, nombre, apellido, fecha_nacimiento, dni):
-        self.id = id
-        self.nombre = nombre
-        self.apellido = apellido
-        self.fecha_nacimiento = fecha_nacimiento
-        self.dni = dni
-
-class Usuario(Persona):
-    def __init__(self, id, nombre, apellido, fecha_nacimiento, dni, contraseña):
-        super().__init__(id, nombre, apellido, fecha_nacimiento, dni)
-        self.contraseña = self.encriptar_contraseña(contraseña)    #Encriptamos la contraseña del nuevo Usuario que creemos.
-        self.ultimo_acceso = None
-
-    def encriptar_contraseña(self, contraseña):
-        # Utilizamos el algoritmo SHA256 para encriptar la contraseña que el usuario ingrese, y asi compararlas.
-        sha256 = hashlib.sha256()
-        sha256.update(contraseña.encode('utf-8'))
-        return sha256.hexdigest()
-
-    def verificar_contraseña(self, contraseña):
-        # Verifica si la contraseña ingresada coincide con la contraseña almacenada encriptada
-        encriptada = self.encriptar_contraseña(contraseña) #Aqui encriptamos la contraseña ingresada por el Usuario
-
-        return encriptada == self.contraseña #Verificamos si esa Contraseña ingresada es igual a la ya guardada.
-
-    def registrar_acceso(self):
-        # Registra el tiempo del último acceso
-        self.ultimo_acceso = datetime.datetime.now()
-        print(f"Fecha de Ingreso: {self.ultimo_acceso}")
-        
-
-class Tarea:
-    def __init__(self, id: int, titulo: str, descripcion: str, estado: str, fecha_creada: str, fecha_actualizada: str):
-        self.id = id
-        self.titulo = titulo
-        self.descripcion = descripcion
-        self.estado = estado
-        self.fecha_creada = fecha_creada
-        self.fecha_actualizada = fecha_actualizada
-
-class AdminTarea:
-    def __init__(self, db_nombre: str):    #La clase AdminTarea recibe a la base de datos "db_nombre" como parametro
-        self.conn = sqlite3.connect(db_nombre)   #Creamos una conexion a la base de Datos "db_nombre" con Sqlite3, la conexion se guarda en self.conn
-
-        self.cursor = self.conn.cursor() #se crea un objeto cursor que permite interactuar con la base de datos
-
-        self._crear_tabla()  #Se crea la tabla si es que no existe con el metodo _crear_tabla
-
-
-
-    def _crear_tabla(self):     #Aqui se crea una Tabla llamada "tareas" almacenada en la variable query 
-
-        query = '''                          
-        CREATE TABLE IF NOT EXISTS tareas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            titulo TEXT NOT NULL,
-            descripcion TEXT,
-            estado TEXT,
-            fecha_creada TEXT,
-            fecha_actualizada TEXT
-        )
-        '''
-        self.cursor.execute(query) # Aqui se ejecuta la "consulta SQL" almacenada en "query"
-        self.conn.commit() #Aqui se confirman los cambios y se guardan de forma permanente en la base de Datos
-
-    def agregar_tarea(self, tarea: Tarea) -> int:  #Esta clase recibe como parametro una variable tipo Tarea
-        query = '''
-        INSERT INTO tareas (titulo, descripcion, estado, fecha_creada, fecha_actualizada)
-        VALUES (?, ?, ?, ?, ?)
-        '''
-        values = (tarea.titulo, tarea.descripcion, tarea.estado, tarea.fecha_creada, tarea.fecha_actualizada)
-        self.cursor.execute(query, values)    #Los valores de la tarea en "value" se insertan en Tabla "tareas"
-        self.conn.commit()                      #confirmando los cambios
-
-        return self.cursor.lastrowid    #se devuelve el ID de la última fila insertada utilizando self.cursor.lastrowid
-
-
-    def actualizar_estado_tarea(self, tarea_id: int, estado: str):
-        query = '''
-        UPDATE tareas SET estado = ?, fecha_actualizada = datetime('now') WHERE id = ?
-        '''
-        self.cursor.execute(query, (estado, tarea_id))
-        self.conn.commit()
-
-    def eliminar_tarea(self, tarea_id: int) -> bool: #Funcion para eliminar una tarea usando como Parametro su ID, el cual es un entero.
-        
-        query = '''
-        DELETE FROM tareas WHERE id = ?
-        '''             
-        self.cursor.execute(query, (tarea_id,))
-        rows_affected = self.cursor.rowcount
-
-        self.conn.commit()
+import queue
+import threading
+import time
+from array import array
+from nucleo import AdminTarea, AdminUsuario, Tarea, ESTADOS, ESTADOS_VALIDOS, normalizar_vencimiento
+from vencimientos import PlanificadorVencimientos, VENCIDA
+from typing import Iterable, List, Optional, Tuple
+
+class TrabajadorBD:
+    #Ejecuta el trabajo con la base de datos en un hilo aparte, asi la ventana nunca se congela esperando a SQLite.
+    #La interfaz le envia pedidos (una funcion y sus argumentos) y el resultado vuelve por otra cola,
+    #que se revisa cada "intervalo_ms" con after(): los callbacks siempre corren en el hilo de Tkinter.
+    def __init__(self, ventana, indicador=None, intervalo_ms: int = 16):
+        self.ventana = ventana
+        self.indicador = indicador        #Label donde se muestra "Cargando..." mientras haya pedidos sin terminar
+        self.intervalo_ms = intervalo_ms  #16 ms: se revisan las respuestas unas 60 veces por segundo
+        self.pedidos = queue.Queue()
+        self.respuestas = queue.Queue()
+        self.pendientes = {}              #clave -> pedido que todavia no empezo a ejecutarse
+        self.lock = threading.Lock()
+        self.en_curso = 0                 #Pedidos enviados cuya respuesta todavia no se proceso
+        self.avisos = queue.Queue()       #Funciones que otros hilos piden correr en el hilo de Tkinter (ver en_ventana)
+        self.cerrado = False
+
+        self.hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self.hilo.start()
+        self.ventana.after(self.intervalo_ms, self._revisar)
+
+    def enviar(self, funcion, *args, al_terminar=None, al_error=None, clave=None):
+        #Si se indica una "clave" y ya hay un pedido con esa clave esperando, no se encola otro: se reemplaza
+        #el que esperaba. Asi diez pedidos seguidos de "recargar la lista" terminan en una sola consulta.
+        pedido = [funcion, args, al_terminar, al_error]
+        if clave is not None:
+            with self.lock:
+                if clave in self.pendientes:
+                    self.pendientes[clave][:] = pedido
+                    return
+                self.pendientes[clave] = pedido
+        self.en_curso += 1
+        self._mostrar_indicador()
+        self.pedidos.put((clave, pedido))
+
+    def en_ventana(self, funcion, *args):
+        #Para otros hilos (por ejemplo el planificador de vencimientos): funcion(*args) se ejecuta en el hilo de
+        #Tkinter en la proxima revision, porque los widgets solo se pueden tocar desde ese hilo
+        self.avisos.put((funcion, args))
+
+    def cerrar(self):
+        self.cerrado = True
+        self.pedidos.put(None)      #Le avisa al hilo que termine
+
+    def _trabajar(self):          #Corre en el hilo de la base de datos
+        while True:
+            item = self.pedidos.get()
+            if item is None:
+                return
+            clave, pedido = item
+            with self.lock:
+                if clave is not None:
+                    del self.pendientes[clave]   #Desde ahora, un pedido nuevo con esta clave se encola aparte
+                funcion, args, al_terminar, al_error = pedido
+            try:
+                self.respuestas.put((al_terminar, al_error, funcion(*args), None))
+            except Exception as error:
+                self.respuestas.put((al_terminar, al_error, None, error))
+
+    def _revisar(self):           #Corre en el hilo de Tkinter
+        limite = time.perf_counter() + 0.008     #No mas de 8 ms por vuelta, para no trabar el dibujado de la ventana
+        while time.perf_counter() < limite:
+            try:
+                al_terminar, al_error, resultado, error = self.respuestas.get_nowait()
+            except queue.Empty:
+                break
+            self.en_curso -= 1
+            if error is not None:
+                if al_error is not None:
+                    al_error(error)
+                else:
+                    messagebox.showerror("Error", f"No se pudo acceder a la base de datos: {error}")
+            elif al_terminar is not None:
+                al_terminar(resultado)
+        while not self.avisos.empty():
+            funcion, args = self.avisos.get_nowait()
+            funcion(*args)
+        self._mostrar_indicador()
+        if not self.cerrado:
+            self.ventana.after(self.intervalo_ms, self._revisar)
+
+    def _mostrar_indicador(self):
+        if self.indicador is not None:
+            self.indicador.config(text="Cargando..." if self.en_curso > 0 else "")
+
+
+
+def texto_tarea(tarea: Tarea) -> str:     #Texto con el que se muestra una tarea en la lista
+    vence = f", Vence: {tarea.fecha_vencimiento}" if tarea.fecha_vencimiento else ""
+    return f"ID: {tarea.id}, Título: {tarea.titulo}, Estado: {tarea.estado}, Fecha: {tarea.fecha_creada}{vence}, Descripcion: {tarea.descripcion}"
+
+
+class ArbolTareasVirtual:
+    #Arbol de tareas "virtualizado": de las filas desplegadas solo se guardan los IDs y el nivel de cada una (en
+    #arrays compactos), y el Listbox tiene unicamente las filas que se ven en pantalla. Al hacer scroll se le piden
+    #a AdminTarea solo las tareas visibles, asi que con 100 o con 100.000 tareas la ventana usa la misma memoria.
+    #Al principio se ven las tareas de primer nivel; con doble click se despliegan o se pliegan las subtareas de
+    #una tarea, y las que tienen subtareas muestran cuantas de todo su arbol estan completadas.
+    #Las consultas se hacen a traves del TrabajadorBD, por eso nunca bloquean la ventana.
+    def __init__(self, padre, admin_tareas: AdminTarea, trabajador: TrabajadorBD, filas: int = 10, ancho: int = 50):
+        self.admin_tareas = admin_tareas
+        self.trabajador = trabajador
+        self.filas = filas
+        self.ids = array("q")        #IDs de las filas del arbol, en el orden en que se muestran
+        self.niveles = array("H")    #Nivel de cada fila de self.ids (0 = tarea de primer nivel)
+        self.abiertas = set()        #IDs de las tareas desplegadas
+        self.inicio = 0              #Posicion dentro de self.ids de la primera fila visible
+        self.visibles = []           #IDs de las filas que estan dibujadas ahora en el Listbox
+        self.textos = {}             #Texto de las ultimas tareas leidas, para redibujar sin consultar otra vez
+        self.progreso = {}           #(subtareas, completadas) de las ultimas tareas leidas que tienen subtareas
+        self.seleccionados = set()   #IDs de las tareas seleccionadas (se mantienen aunque se haga scroll)
+
+        self.marco = tk.Frame(padre)
+        #Seleccion extendida: con Control se agregan tareas sueltas y con Shift un rango
+        self.listbox = tk.Listbox(self.marco, width=ancho, height=filas, exportselection=False, selectmode=tk.EXTENDED)
+        self.scrollbar = tk.Scrollbar(self.marco, orient=tk.VERTICAL, command=self._scroll)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<ButtonPress-1>", self._al_hacer_click)
+        self.listbox.bind("<<ListboxSelect>>", self._al_seleccionar)
+        self.listbox.bind("<Double-Button-1>", self._al_hacer_doble_click)
+        self.listbox.bind("<MouseWheel>", lambda evento: self._mover(-3 if evento.delta > 0 else 3))   #Windows y macOS
+        self.listbox.bind("<Button-4>", lambda evento: self._mover(-3))     #Rueda del mouse en Linux
+        self.listbox.bind("<Button-5>", lambda evento: self._mover(3))
+
+    def grid(self, **opciones):
+        self.marco.grid(**opciones)
+
+    def mostrar(self, ids):        #Muestra solo estas tareas, sin subtareas (por ejemplo el resultado de una busqueda)
+        ids = array("q", ids)
+        self.abiertas.clear()
+        self.inicio = 0
+        self._reemplazar((ids, array("H", [0]) * len(ids)))
+
+    def recargar(self):
+        #Vuelve a armar el arbol: las tareas de primer nivel y las subtareas de las que estaban desplegadas.
+        #Varios pedidos seguidos se juntan en uno.
+        self.trabajador.enviar(self._leer_arbol, set(self.abiertas), al_terminar=self._reemplazar, clave="recargar")
+
+    def _leer_arbol(self, abiertas) -> Tuple[array, array]:     #Corre en el hilo de la base de datos
+        ids, niveles = array("q"), array("H")
+        def agregar(tarea_id: int, nivel: int):
+            ids.append(tarea_id)
+            niveles.append(nivel)
+            if tarea_id in abiertas:
+                for subtarea in self.admin_tareas.traer_subtareas(tarea_id):
+                    agregar(subtarea.id, nivel + 1)
+        for tarea_id in self.admin_tareas.traer_ids_raices():
+            agregar(tarea_id, 0)
+        return ids, niveles
+
+    def _reemplazar(self, arbol: Tuple[array, array]):
+        self.ids, self.niveles = arbol
+        presentes = set(self.ids)
+        self.seleccionados &= presentes
+        self.abiertas &= presentes
+        self.textos.clear()
+        self._dibujar()
+
+    def ids_seleccionados(self) -> List[int]:
+        return sorted(self.seleccionados)
+
+    def _posicion(self, tarea_id: int) -> Optional[int]:
+        #El arbol no esta ordenado por ID: se busca recorriendo el array (array.index lo hace en C)
+        try:
+            return self.ids.index(tarea_id)
+        except ValueError:
+            return None
+
+    def agregar(self, tarea_id: int, padre_id: Optional[int] = None):
+        #Una tarea nueva de primer nivel tiene el ID mas alto, asi que va al final sin reconstruir el arbol.
+        #Una subtarea cambia el avance de su padre; si el padre esta desplegado, tambien sus filas.
+        if padre_id is not None:
+            if padre_id in self.abiertas:
+                self.recargar()
+            else:
+                self.actualizar([padre_id])
+            return
+        if self.ids and tarea_id < max(self.ids):
+            self.recargar()
+            return
+        self.ids.append(tarea_id)
+        self.niveles.append(0)
+        if len(self.ids) <= self.inicio + self.filas:
+            self._dibujar()
+        else:
+            self._actualizar_scrollbar()
+
+    def actualizar(self, ids: Iterable[int]):
+        #Vuelve a leer estas tareas y reemplaza unicamente sus filas, si es que estan visibles. Las filas con
+        #subtareas tambien se vuelven a leer, porque su avance depende de las tareas de abajo.
+        for tarea_id in ids:
+            self.textos.pop(tarea_id, None)
+        for tarea_id in self.progreso:
+            self.textos.pop(tarea_id, None)
+        faltantes = [tarea_id for tarea_id in self.visibles if tarea_id not in self.textos]
+        if faltantes:
+            self.trabajador.enviar(self._leer_filas, faltantes, al_terminar=self._recibir_tareas)
+
+    def quitar(self, ids: Iterable[int]):
+        quitados = set(ids)
+        posiciones = [posicion for posicion, tarea_id in enumerate(self.ids) if tarea_id in quitados]
+        if not posiciones:
+            return
+        self.seleccionados -= quitados
+        if any(self.ids[posicion] in self.progreso or self.ids[posicion] in self.abiertas for posicion in posiciones):
+            #Las subtareas de una tarea eliminada pasan a la tarea de arriba: se vuelve a armar el arbol
+            self.recargar()
+            return
+        antes_del_inicio = sum(1 for posicion in posiciones if posicion < self.inicio)
+        if len(posiciones) == 1:
+            del self.ids[posiciones[0]]
+            del self.niveles[posiciones[0]]
+        else:
+            borrar = set(posiciones)
+            self.ids = array("q", (tarea_id for posicion, tarea_id in enumerate(self.ids) if posicion not in borrar))
+            self.niveles = array("H", (nivel for posicion, nivel in enumerate(self.niveles) if posicion not in borrar))
+        for tarea_id in quitados:
+            self.textos.pop(tarea_id, None)
+        for tarea_id in self.progreso:      #Puede haber cambiado el avance de las tareas de arriba
+            self.textos.pop(tarea_id, None)
+        self.inicio -= antes_del_inicio     #Si se quitaron tareas de mas arriba se corre el inicio para seguir viendo las mismas
+        self._dibujar()
+
+    def _desplegar(self, tarea_id: int, subtareas: List[Tarea]):
+        posicion = self._posicion(tarea_id)
+        if posicion is None or tarea_id in self.abiertas:     #Mientras tanto se quito de la lista o ya se desplego
+            return
+        if not subtareas:       #No tiene (o ya no tiene) subtareas: solo se vuelve a leer su fila
+            self.actualizar([tarea_id])
+            return
+        self.abiertas.add(tarea_id)
+        self.ids[posicion + 1:posicion + 1] = array("q", (subtarea.id for subtarea in subtareas))
+        self.niveles[posicion + 1:posicion + 1] = array("H", [self.niveles[posicion] + 1]) * len(subtareas)
+        self._dibujar()
+
+    def _plegar(self, posicion: int):     #Quita las filas de abajo de la tarea que tienen mas nivel que ella
+        fin = posicion + 1
+        while fin < len(self.ids) and self.niveles[fin] > self.niveles[posicion]:
+            fin += 1
+        self.abiertas.discard(self.ids[posicion])
+        self.abiertas.difference_update(self.ids[posicion + 1:fin])
+        del self.ids[posicion + 1:fin]
+        del self.niveles[posicion + 1:fin]
+        self._dibujar()
+
+    def _texto_fila(self, fila: int) -> str:     #Con sangria segun el nivel y, si tiene subtareas, su avance
+        tarea_id = self.visibles[fila]
+        texto = self.textos.get(tarea_id, f"ID: {tarea_id}, ...")
+        if tarea_id in self.progreso:
+            subtareas, completadas = self.progreso[tarea_id]
+            marca = "▾ " if tarea_id in self.abiertas else "▸ "
+            texto = f"{marca}[{completadas}/{subtareas}] {texto}"
+        else:
+            texto = "  " + texto
+        return "    " * self.niveles[self.inicio + fila] + texto
+
+    def _dibujar(self):
+        #Dibuja enseguida las filas visibles con lo que ya se conoce y pide en segundo plano solo las que faltan
+        self.inicio = max(0, min(self.inicio, len(self.ids) - self.filas))
+        self.visibles = list(self.ids[self.inicio:self.inicio + self.filas])
+        if len(self.textos) > self.filas * 20:      #Se conservan solo los textos de las filas visibles
+            self.textos = {tarea_id: self.textos[tarea_id] for tarea_id in self.visibles if tarea_id in self.textos}
+            self.progreso = {tarea_id: self.progreso[tarea_id] for tarea_id in self.visibles if tarea_id in self.progreso}
+
+        self.listbox.delete(0, tk.END)
+        for fila, tarea_id in enumerate(self.visibles):
+            self.listbox.insert(tk.END, self._texto_fila(fila))
+            if tarea_id in self.seleccionados:
+                self.listbox.selection_set(fila)
+        self._actualizar_scrollbar()
+
+        faltantes = [tarea_id for tarea_id in self.visibles if tarea_id not in self.textos]
+        if faltantes:
+            #Con la clave "filas", si el usuario sigue haciendo scroll solo se consulta la ultima posicion
+            self.trabajador.enviar(self._leer_filas, faltantes, al_terminar=self._recibir_tareas, clave="filas")
+
+    def _leer_filas(self, ids: List[int]):      #Corre en el hilo de la base de datos: las tareas y su avance
+        return self.admin_tareas.obtener_tareas(ids), self.admin_tareas.progreso_lote(ids)
+
+    def _recibir_tareas(self, resultado):
+        tareas, progreso = resultado
+        for tarea in tareas:
+            self.textos[tarea.id] = texto_tarea(tarea)
+            if tarea.id in progreso:
+                self.progreso[tarea.id] = progreso[tarea.id]
+            else:
+                self.progreso.pop(tarea.id, None)
+            if tarea.id in self.visibles:        #Si mientras tanto se hizo scroll, la fila puede ya no estar visible
+                fila = self.visibles.index(tarea.id)
+                self.listbox.delete(fila)
+                self.listbox.insert(fila, self._texto_fila(fila))
+                if tarea.id in self.seleccionados:
+                    self.listbox.selection_set(fila)
+
+    def _actualizar_scrollbar(self):
+        total = len(self.ids)
+        if total <= self.filas:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.inicio / total, (self.inicio + self.filas) / total)
 
-        return rows_affected > 0
-    
+    def _scroll(self, accion, cantidad, unidad=None):     #La llama la Scrollbar al arrastrarla o usar sus flechas
+        if accion == "moveto":
+            self.inicio = int(float(cantidad) * len(self.ids))
+            self._dibujar()
+        else:
+            self._mover(int(cantidad) * (self.filas if unidad == "pages" else 1))
 
-    def obtener_tarea(self, tarea_id: int) -> Tarea:
+    def _mover(self, filas: int):
+        self.inicio += filas
+        self._dibujar()     #_dibujar se encarga de no pasarse del principio ni del final
 
-        query = '''
-        SELECT * FROM tareas WHERE id = ?
-        '''  
-        self.cursor.execute(query, (tarea_id,))
-        tarea_result = self.cursor.fetchone()
+    def _al_hacer_click(self, evento):
+        #Un click sin Shift ni Control empieza una seleccion nueva, tambien para las tareas que no estan visibles
+        if not evento.state & (0x0001 | 0x0004):
+            self.seleccionados.clear()
 
-        if tarea_result is not None:
-            # Suponiendo que la clase Tarea tiene un constructor que acepta los datos de la fila de la consulta
-            # Por ejemplo: Tarea(id, nombre, descripcion, fecha)
-            tarea = Tarea(*tarea_result)
-            return tarea
+    def _al_hacer_doble_click(self, evento):      #Despliega o pliega las subtareas de la fila
+        fila = self.listbox.nearest(evento.y)
+        if not 0 <= fila < len(self.visibles):
+            return
+        tarea_id = self.visibles[fila]
+        if tarea_id in self.abiertas:
+            self._plegar(self.inicio + fila)
         else:
-             # Si no se encontró una tarea con el ID proporcionado, retornar None o lanzar una excepción según el caso
-            return None  # O levantar una excepción, por ejemplo: raise ValueError("Tarea no encontrada con ese ID")
+            self.trabajador.enviar(self.admin_tareas.traer_subtareas, tarea_id,
+                                   al_terminar=lambda subtareas: self._desplegar(tarea_id, subtareas))
 
+    def _al_seleccionar(self, evento):
+        #El Listbox solo conoce las filas visibles: se actualizan esas y se conserva la seleccion del resto
+        self.seleccionados.difference_update(self.visibles)
+        self.seleccionados.update(self.visibles[fila] for fila in self.listbox.curselection() if fila < len(self.visibles))
 
 
-        
-    def eliminar_todas_tareas(self):       #Funcion para eliminar todas las tareas
-        #query contiene una "consulta" que al ejecutarse eliminará todo el contenido de la Tabla "tareas"
-        query = '''
-        DELETE FROM tareas          
-        '''
-        self.cursor.execute(query) #Aqui se ejecuta la "consulta" dentro de "query", que es eliminar los datos
-        rows_affected = self.cursor.rowcount
-        self.conn.commit()    #Se confirman los cambios.
-
-        #Esta parte es para restablecer los numeros de "ID" al borrar todas las tareas, que empiece en 1 de nuevo
-        query = '''
-        DELETE FROM sqlite_sequence WHERE name='tareas'  
-        '''                            
-        self.cursor.execute(query) #Se ejecuta la nueva consulta
-        self.conn.commit() # Se confirman los cambios.
-        return rows_affected > 0
 
-    
-    def traer_todas_tareas(self) -> List[Tarea]: #La funcion devuelve una Lista de objetos tipo "Tarea"
-        query = '''
-        SELECT * FROM tareas 
-        '''                                #aqui "query" selecciona todas las columnas de la Tabla "tareas"
-        self.cursor.execute(query)         #Ejecutamos la consulta "query"
+#Esta función solo se ejecutará si los datos ingresados en la interfaz son correctos.
+def Administrador_de_Tareas(admin_tareas: AdminTarea):
+    ventana = tk.Toplevel(root)
+    ventana.title("Administrador de Tareas")
 
-        result = self.cursor.fetchall()    #Aqui simplemente se almacenan los datos de la consulta ejecutada anteriormente
-        tareas = [Tarea(*row) for row in result]
-        return tareas
+    # Etiqueta que muestra "Cargando..." mientras el hilo de la base de datos esta trabajando
+    cargando_label = tk.Label(ventana, text="")
+    cargando_label.grid(row=5, column=2, padx=10, pady=10)
 
+    # Todas las consultas a la base de datos pasan por este trabajador, asi la ventana no se congela
+    trabajador = TrabajadorBD(ventana, cargando_label)
 
+    # Avisos de tareas que vencen (o estan por vencer), del planificador de vencimientos
+    avisos_label = tk.Label(ventana, text="", fg="red")
+    avisos_label.grid(row=1, column=0, columnspan=3, padx=10)
 
-#Esta función solo se ejecutará si los datos ingresados en la interfaz son correctos.
-def Administrador_de_Tareas():
-    ventana = tk.Toplevel(root)
-    ventana.title("Administrador de Tareas")
-    admin_tareas = AdminTarea("tareas.db")
+    def mostrar_aviso(aviso):
+        if aviso["tipo"] == VENCIDA:
+            avisos_label.config(text=f"Vencio la tarea {aviso['id']}: {aviso['titulo']}")
+        else:
+            avisos_label.config(text=f"La tarea {aviso['id']} ({aviso['titulo']}) vence el {aviso['fecha_vencimiento']}")
+        lista_tareas.actualizar([aviso["id"]])
+        ventana.bell()
+
+    # El planificador corre en su propio hilo: los avisos pasan por el trabajador para mostrarse en el hilo de la ventana
+    planificador = PlanificadorVencimientos(admin_tareas, anticipacion=float(os.environ.get("TAREAS_RECORDATORIO_MIN", "60")) * 60)
+    planificador.suscribir(lambda aviso: trabajador.en_ventana(mostrar_aviso, aviso))
+
+    def cerrar_ventana():
+        planificador.cerrar()
+        trabajador.cerrar()
+        ventana.destroy()
+
+    ventana.protocol("WM_DELETE_WINDOW", cerrar_ventana)
+
+    # Franja con la cantidad de tareas en cada estado. Se lee de las tablas de resumen, asi que
+    # cuesta lo mismo sin importar cuantas tareas haya y se puede refrescar seguido.
+    contadores_frame = tk.Frame(ventana)
+    contadores_frame.grid(row=0, column=0, columnspan=3, padx=10, pady=5)
+    contadores = {}
+    for columna, estado in enumerate(ESTADOS):
+        contadores[estado] = tk.Label(contadores_frame, text=f"{estado}: -")
+        contadores[estado].grid(row=0, column=columna, padx=5)
+
+    def mostrar_contadores(resumen):
+        for estado, etiqueta in contadores.items():
+            etiqueta.config(text=f"{estado}: {resumen['por_estado'][estado]}")
+
+    def actualizar_contadores():
+        trabajador.enviar(admin_tareas.estadisticas, 0, al_terminar=mostrar_contadores, clave="estadisticas")
+
+    def refrescar_contadores():
+        # Cada 5 segundos, por si otro programa (por ejemplo la API) modifico las tareas
+        if not trabajador.cerrado:
+            actualizar_contadores()
+            ventana.after(5000, refrescar_contadores)
          
     #Funcion que utiliza el boton "Agregar Tarea" para ingresar una nueva tarea
     def agregar_tarea():
@@ -169,67 +414,142 @@ def Administrador_de_Tareas():
             return
         
         descripcion = descripcion_entry.get("1.0", tk.END).strip()  # Obtener el texto completo del widget de entrada de varias líneas
+        try:
+            fecha_vencimiento = normalizar_vencimiento(vencimiento_entry.get())    # Vacio: la tarea no vence
+        except ValueError:
+            messagebox.showwarning("Error", "La fecha de vencimiento tiene que ser AAAA-MM-DD o AAAA-MM-DD HH:MM")
+            return
+        try:
+            padre_id = leer_padre()
+        except ValueError:
+            messagebox.showwarning("Error", "El ID de la tarea padre tiene que ser un numero")
+            return
         estado = "Pendiente"
         fecha_creada = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         fecha_actualizada = fecha_creada
         
         
         # Crear una instancia de la tarea
-        tarea = Tarea(None, titulo, descripcion, estado, fecha_creada, fecha_actualizada)
-
-        # Agregar la tarea a la base de datos
-        admin_tareas.agregar_tarea(tarea)
+        tarea = Tarea(None, titulo, descripcion, estado, fecha_creada, fecha_actualizada, fecha_vencimiento)
 
         # Limpiar los widgets de entrada
         tarea_entry.delete(0, tk.END)
         descripcion_entry.delete("1.0", tk.END)
+        vencimiento_entry.delete(0, tk.END)
+
+        def tarea_agregada(tarea_id):
+            # Agregar solo la nueva tarea a la lista, sin volver a cargarla entera
+            lista_tareas.agregar(tarea_id, padre_id)
+            actualizar_contadores()
 
+            # Mostrar un mensaje de éxito
+            messagebox.showinfo("Tarea agregada", "La tarea se agregó correctamente.")
 
-        # Actualizar la lista de tareas
-        actualizar_lista_tareas()
+        # Agregar la tarea a la base de datos (en el hilo de la base de datos; al terminar se llama a tarea_agregada)
+        trabajador.enviar(admin_tareas.agregar_tarea, tarea, padre_id, al_terminar=tarea_agregada,
+                          al_error=lambda error: messagebox.showerror("Error", f"No se pudo agregar la tarea: {error}"))
 
-        # Mostrar un mensaje de éxito
-        messagebox.showinfo("Tarea agregada", "La tarea se agregó correctamente.")
+
+    def leer_padre():
+        # ID escrito en "Subtarea de (ID)"; vacio es None (sin tarea padre). Lanza ValueError si no es un numero
+        texto = padre_entry.get().strip()
+        return int(texto) if texto else None
 
 
 
     def actualizar_lista_tareas():
-        # Limpiar la lista de tareas
-        lista_tareas.delete(0, tk.END)
+        # Se cargan los IDs de todas las tareas; los datos de cada una se leen recien cuando se hacen visibles
+        lista_tareas.recargar()
 
-        # Obtener todas las tareas desde la base de datos
-        tareas = admin_tareas.traer_todas_tareas()
 
-        # Agregar las tareas a la lista
-        for tarea in tareas:
-            lista_tareas.insert(tk.END, f"ID: {tarea.id}, Título: {tarea.titulo}, Estado: {tarea.estado}, Fecha: {tarea.fecha_creada}, Descripcion: {tarea.descripcion}")
+    def buscar_tareas():
+        texto = buscar_entry.get().strip()
+        if not texto:                   #Si no se escribio nada se vuelven a mostrar todas las tareas
+            actualizar_lista_tareas()
+            return
+
+        # Mostrar en la lista solo las tareas que coinciden con la busqueda, las mas relevantes primero
+        trabajador.enviar(admin_tareas.buscar, texto, clave="buscar",
+                          al_terminar=lambda tareas: lista_tareas.mostrar([tarea.id for tarea in tareas]))
 
 
     def actualizar_estado():
-        # Obtener la tarea seleccionada en la lista
-        seleccion = lista_tareas.curselection()
-        if len(seleccion) == 0:
+        # Obtener las IDs de las tareas seleccionadas en la lista (con Control o Shift se pueden elegir varias)
+        ids = lista_tareas.ids_seleccionados()
+        if not ids:
             messagebox.showerror("Error", "Por favor, seleccione una tarea.")
             return
 
-        # Metodo para obtener la ID de la tarea seleccionada
-        tarea_id = int(lista_tareas.get(seleccion[0]).split(",")[0].split(":")[1].strip())
-
         # Obtener el nuevo estado de la tarea desde el usuario
         estado = estado_entry.get()
 
-        if(estado == "Completada") or (estado == "En Progreso") or (estado == "Por hacer") or (estado =="Postergada"):
+        if estado in ESTADOS_VALIDOS:
 
-            # Actualizar el estado de la tarea en la base de datos
-            admin_tareas.actualizar_estado_tarea(tarea_id, estado)
+            def estado_actualizado(cantidad):
+                # Actualizar solo las filas de esas tareas
+                lista_tareas.actualizar(ids)
+                actualizar_contadores()
 
-            # Actualizar la lista de tareas
-            actualizar_lista_tareas()
+                # Mostramos el mensaje
+                if len(ids) == 1:
+                    messagebox.showinfo("Tarea actualizada", "El estado de la tarea se actualizó correctamente.")
+                else:
+                    messagebox.showinfo("Tareas actualizadas", f"Se actualizó el estado de {cantidad} tareas.")
 
-            # Mostramos el mensaje
-            messagebox.showinfo("Tarea actualizada", "El estado de la tarea se actualizó correctamente.")
+            # Actualizar el estado de todas las tareas seleccionadas en la base de datos, en una sola transaccion
+            trabajador.enviar(admin_tareas.actualizar_estado_lote, ids, estado, al_terminar=estado_actualizado)
         else:
             messagebox.showerror("Error", "Ese no es un estado valido para una Tarea")
+
+
+    def eliminar_tarea():
+        # Obtener las IDs de las tareas seleccionadas en la lista
+        ids = lista_tareas.ids_seleccionados()
+        if not ids:
+            messagebox.showerror("Error", "Por favor, seleccione una tarea.")
+            return
+        if len(ids) > 1 and not messagebox.askyesno("Eliminar tareas", f"¿Eliminar las {len(ids)} tareas seleccionadas?"):
+            return
+
+        def tarea_eliminada(cantidad):
+            # Quitar solo esas filas de la lista
+            lista_tareas.quitar(ids)
+            actualizar_contadores()
+
+            # Mostrar un mensaje de éxito
+            if len(ids) == 1:
+                messagebox.showinfo("Tarea eliminada", "La tarea se eliminó correctamente.")
+            else:
+                messagebox.showinfo("Tareas eliminadas", f"Se eliminaron {cantidad} tareas.")
+
+        # Eliminar las tareas de la base de datos usando sus IDs, en una sola transaccion
+        trabajador.enviar(admin_tareas.eliminar_lote, ids, al_terminar=tarea_eliminada)
+
+
+    def mover_tareas():
+        # Pasar las tareas seleccionadas (con sus subtareas) debajo de la tarea escrita en "Subtarea de (ID)";
+        # con ese campo vacio quedan como tareas de primer nivel
+        ids = lista_tareas.ids_seleccionados()
+        if not ids:
+            messagebox.showerror("Error", "Por favor, seleccione una tarea.")
+            return
+        try:
+            padre_id = leer_padre()
+        except ValueError:
+            messagebox.showwarning("Error", "El ID de la tarea padre tiene que ser un numero")
+            return
+
+        def tareas_movidas(cantidad):
+            lista_tareas.recargar()
+            messagebox.showinfo("Tareas movidas", f"Se movieron {cantidad} tareas.")
+
+        def no_se_pudo_mover(error):
+            # Se mueven todas en una transaccion: si una no se puede mover (por ejemplo porque el padre es
+            # una de sus subtareas) no se movio ninguna
+            messagebox.showerror("Error", f"No se pudieron mover las tareas: {error}")
+
+        trabajador.enviar(admin_tareas.mover_tareas, ids, padre_id, al_terminar=tareas_movidas,
+                          al_error=no_se_pudo_mover)
     
 
 
@@ -241,6 +561,13 @@ def Administrador_de_Tareas():
     tarea_entry = tk.Entry(ventana)
     tarea_entry.grid(row=3, column=1, padx=10, pady=10)
 
+    # Fecha de vencimiento opcional, al lado del titulo (por ejemplo 2024-06-30 o 2024-06-30 18:00)
+    vencimiento_frame = tk.Frame(ventana)
+    vencimiento_frame.grid(row=3, column=2, padx=10, pady=10)
+    tk.Label(vencimiento_frame, text="Vence (opcional):").pack(side=tk.LEFT)
+    vencimiento_entry = tk.Entry(vencimiento_frame, width=16)
+    vencimiento_entry.pack(side=tk.LEFT)
+
     # Crear un widget de etiqueta para la descripción
     descripcion_label = tk.Label(ventana, text="Descripción(opcional):")
     descripcion_label.grid(row=4, column=0, padx=10, pady=10)
@@ -254,12 +581,20 @@ def Administrador_de_Tareas():
     agregar_boton = tk.Button(ventana, text="Agregar tarea", command=agregar_tarea)
     agregar_boton.grid(row=5, column=0, padx=10, pady=10)
 
+    # Campo opcional con el ID de la tarea padre: la tarea nueva se agrega como subtarea de esa, y el boton
+    # "Mover" pasa las tareas seleccionadas debajo de ella
+    padre_frame = tk.Frame(ventana)
+    padre_frame.grid(row=5, column=1, padx=10, pady=10)
+    tk.Label(padre_frame, text="Subtarea de (ID):").pack(side=tk.LEFT)
+    padre_entry = tk.Entry(padre_frame, width=8)
+    padre_entry.pack(side=tk.LEFT)
+
     # Crear un botón para ver las tareas
     ver_boton = tk.Button(ventana, text="Ver tareas", command=actualizar_lista_tareas)
     ver_boton.grid(row=6, column=2, padx=10, pady=10)
 
-    # Crear un widget de lista para mostrar las tareas
-    lista_tareas = tk.Listbox(ventana, width=50)
+    # Crear un widget de arbol para mostrar las tareas (solo dibuja las filas visibles; doble click despliega las subtareas)
+    lista_tareas = ArbolTareasVirtual(ventana, admin_tareas, trabajador, filas=10, ancho=50)
     lista_tareas.grid(row=6, column=0, columnspan=2, padx=10, pady=10)
 
     # Crear un widget de etiqueta para el estado
@@ -274,57 +609,99 @@ def Administrador_de_Tareas():
     actualizar_boton = tk.Button(ventana, text="Actualizar estado", command=actualizar_estado)
     actualizar_boton.grid(row=8, column=0, padx=10, pady=10)
 
-    # Iniciar el bucle de eventos de la ventana secundaria
-    ventana.mainloop()
+    # Crear un botón para mover las tareas seleccionadas debajo de la tarea de "Subtarea de (ID)"
+    mover_boton = tk.Button(ventana, text="Mover", command=mover_tareas)
+    mover_boton.grid(row=8, column=1, padx=10, pady=10)
 
+    # Crear un botón para eliminar la tarea seleccionada
+    eliminar_boton = tk.Button(ventana, text="Eliminar tarea", command=eliminar_tarea)
+    eliminar_boton.grid(row=8, column=2, padx=10, pady=10)
 
+    # Crear un widget de entrada y un botón para buscar tareas por texto
+    buscar_entry = tk.Entry(ventana)
+    buscar_entry.grid(row=9, column=1, padx=10, pady=10)
+    buscar_entry.bind("<Return>", lambda evento: buscar_tareas())
 
-# Crear una instancia de la ventana principal
-root = tk.Tk()
-root.title("Inicio de sesión")
-
-def verificar_clave():
-    nombre = nombre_entry.get()                 #"nombre" es igual a la entrada que ingresa el usuario en la interfaz informal
-    clave = clave_entry.get()                   #lo mismo con la variable "clave"
-
-    usuario = Usuario("1","Admin","Tesla","07/03/1989","44999380","12345") #Estos son los datos para ingresar.
-    
-    #Si el nombre y contraseña ingresados son igual al de "usuario" entonces se abrirá el Administrador_de_Tareas()
-    if usuario.verificar_contraseña(clave) and nombre == usuario.nombre:
-        usuario.registrar_acceso()
-        messagebox.showinfo("Acceso permitido!", f"Bienvenido {usuario.nombre} {usuario.apellido}!\nDNI: {usuario.dni}\nNacimiento: {usuario.fecha_nacimiento}")
-        
-        root.withdraw()                                               
-        Administrador_de_Tareas()         #Y se ejecuta la ventana "Administrador de Tareas"
-    else:
-        messagebox.showerror("Acceso denegado", "Nombre de usuario o clave incorrectos.")
-
-# Crear un widget de etiqueta para el nombre
-nombre_label = tk.Label(root, text="Nombre:")
-nombre_label.grid(row=0, column=0, padx=10, pady=10)
-
-# Crear un widget de entrada para el nombre
-nombre_entry = tk.Entry(root)
-nombre_entry.grid(row=0, column=1, padx=10, pady=10)
-
-# Crear un widget de etiqueta para la clave
-clave_label = tk.Label(root, text="Clave:")
-clave_label.grid(row=1, column=0, padx=10, pady=10)
-
-# Crear un widget de entrada para la clave (oculta)
-clave_entry = tk.Entry(root, show="*")
-clave_entry.grid(row=1, column=1, padx=10, pady=10)
-
-# Crear un botón para verificar la clave
-boton = tk.Button(root, text="Ingresar", command=verificar_clave)
-boton.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
-
-# Iniciar el bucle de eventos de la ventana principal
-root.mainloop()
-
+    buscar_boton = tk.Button(ventana, text="Buscar", command=buscar_tareas)
+    buscar_boton.grid(row=9, column=0, padx=10, pady=10)
 
+    # Mostrar los contadores enseguida y mantenerlos al dia
+    refrescar_contadores()
 
+    # Iniciar el bucle de eventos de la ventana secundaria
+    ventana.mainloop()
 
 
 
+#La ventana de inicio de sesion solo se crea al ejecutar este archivo; al importarlo solo se definen las
+#funciones, sin abrir ninguna ventana.
+if __name__ == "__main__":
+    # Crear una instancia de la ventana principal
+    root = tk.Tk()
+    root.title("Inicio de sesión")
 
+    #Con TAREAS_PARTICIONES=N se abren las mismas particiones que usa la API (ver particiones.py)
+    particiones = int(os.environ.get("TAREAS_PARTICIONES", "1"))
+    if particiones > 1:
+        from particiones import AdminTareaParticionada
+        admin_tareas = AdminTareaParticionada("tareas.db", particiones)
+    else:
+        admin_tareas = AdminTarea("tareas.db")
+    admin_usuarios = AdminUsuario(admin_tareas.pool)    #Los usuarios estan en la misma base de datos que las tareas
+
+    def verificar_clave():
+        nombre = nombre_entry.get()                 #"nombre" es igual a la entrada que ingresa el usuario en la interfaz informal
+        clave = clave_entry.get()                   #lo mismo con la variable "clave"
+
+        def verificar():
+            #Corre en el hilo de la base de datos: el hash de la clave (PBKDF2) es lento a proposito y congelaria la ventana
+            usuario = admin_usuarios.verificar(nombre, clave)   #Busca el usuario en la tabla "usuarios" y verifica su clave
+            if usuario is not None:
+                admin_usuarios.registrar_acceso(usuario)
+            return usuario
+
+        def clave_verificada(usuario):
+            boton.config(state=tk.NORMAL)
+            #Si el nombre y contraseña ingresados son correctos entonces se abrirá el Administrador_de_Tareas()
+            if usuario is not None:
+                messagebox.showinfo("Acceso permitido!", f"Bienvenido {usuario.nombre} {usuario.apellido}!\nDNI: {usuario.dni}\nNacimiento: {usuario.fecha_nacimiento}")
+
+                root.withdraw()
+                Administrador_de_Tareas(admin_tareas)         #Y se ejecuta la ventana "Administrador de Tareas"
+            else:
+                messagebox.showerror("Acceso denegado", "Nombre de usuario o clave incorrectos.")
+
+        def no_se_pudo_verificar(error):
+            boton.config(state=tk.NORMAL)
+            messagebox.showerror("Error", f"No se pudo acceder a la base de datos: {error}")
+
+        boton.config(state=tk.DISABLED)     #Hasta que termine la verificacion, para no mandarla dos veces
+        trabajador.enviar(verificar, al_terminar=clave_verificada, al_error=no_se_pudo_verificar)
+
+    # Crear un widget de etiqueta para el nombre
+    nombre_label = tk.Label(root, text="Nombre:")
+    nombre_label.grid(row=0, column=0, padx=10, pady=10)
+
+    # Crear un widget de entrada para el nombre
+    nombre_entry = tk.Entry(root)
+    nombre_entry.grid(row=0, column=1, padx=10, pady=10)
+
+    # Crear un widget de etiqueta para la clave
+    clave_label = tk.Label(root, text="Clave:")
+    clave_label.grid(row=1, column=0, padx=10, pady=10)
+
+    # Crear un widget de entrada para la clave (oculta)
+    clave_entry = tk.Entry(root, show="*")
+    clave_entry.grid(row=1, column=1, padx=10, pady=10)
+
+    # Crear un botón para verificar la clave
+    boton = tk.Button(root, text="Ingresar", command=verificar_clave)
+    boton.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
+
+    # Mientras se verifica la clave se muestra "Cargando..." aca; la verificacion la hace el trabajador en su hilo
+    verificando_label = tk.Label(root, text="")
+    verificando_label.grid(row=3, column=0, columnspan=2)
+    trabajador = TrabajadorBD(root, verificando_label)
+
+    # Iniciar el bucle de eventos de la ventana principal
+    root.mainloop()
@@ -0,0 +1,185 @@
+#Benchmark de las operaciones de AdminTarea a distintas escalas.
+#
+#Para cada tamaño de base (10k, 100k y 1M tareas por defecto) y cada tipo de base (en memoria y en disco)
+#carga tareas de prueba y mide agregar_tarea, traer_todas_tareas, obtener_tarea, actualizar_estado_tarea,
+#eliminar_tarea y eliminar_todas_tareas: operaciones por segundo, latencia p50/p99 y pico de memoria (RSS).
+#Cada escenario corre en un proceso aparte, asi el pico de memoria de uno no se mezcla con el de otro.
+#
+#Uso:
+#  python benchmark_admin_tarea.py --salida resultados.json
+#  python benchmark_admin_tarea.py --tamaños 10000 100000 --bases disco --comparar resultados.json
+#Con --comparar se muestran las diferencias contra una corrida anterior y, si alguna operacion es mas lenta
+#que el --umbral, el programa termina con codigo 1 (sirve para frenar un despliegue).
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from nucleo import AdminTarea, Tarea, ESTADOS_VALIDOS
+
+try:
+    import resource     #Solo existe en Linux y macOS
+except ImportError:
+    resource = None
+
+
+def pico_memoria_mb() -> float:
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024    #macOS lo da en bytes, Linux en KiB
+    try:
+        import psutil       #En Windows, si esta instalado
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def resumen(latencias) -> dict:      #latencias en segundos -> estadisticas en milisegundos
+    total = sum(latencias)
+    return {
+        "operaciones": len(latencias),
+        "ops_por_segundo": len(latencias) / total if total > 0 else None,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+
+def medir(funcion, argumentos) -> list:
+    latencias = []
+    for args in argumentos:
+        inicio = time.perf_counter()
+        funcion(*args)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def tarea_de_prueba(i: int) -> Tarea:
+    fecha = "2024-01-01 10:00:00"
+    return Tarea(None, f"Tarea de prueba {i}", f"Descripcion de la tarea {i}", "Pendiente", fecha, fecha)
+
+
+def correr_escenario(base: str, tamaño: int, operaciones: int) -> dict:
+    azar = random.Random(42)     #Semilla fija: todas las corridas hacen exactamente las mismas operaciones
+    with tempfile.TemporaryDirectory() as carpeta:
+        db_nombre = ":memory:" if base == "memoria" else os.path.join(carpeta, "benchmark.db")
+        admin = AdminTarea(db_nombre, tamaño_cache=0)     #Sin cache, para medir la base de datos y no la memoria
+
+        inicio = time.perf_counter()
+        admin.agregar_tareas_lote(tarea_de_prueba(i) for i in range(tamaño))
+        carga = time.perf_counter() - inicio
+
+        ids = [azar.randint(1, tamaño) for _ in range(operaciones)]
+        resultados = {}
+        resultados["agregar_tarea"] = resumen(medir(admin.agregar_tarea,
+                                                    [(tarea_de_prueba(tamaño + i),) for i in range(operaciones)]))
+        resultados["obtener_tarea"] = resumen(medir(admin.obtener_tarea, [(i,) for i in ids]))
+        resultados["actualizar_estado_tarea"] = resumen(medir(admin.actualizar_estado_tarea,
+                                                              [(i, azar.choice(ESTADOS_VALIDOS)) for i in ids]))
+        #traer_todas_tareas lee la tabla entera, asi que se repite pocas veces
+        resultados["traer_todas_tareas"] = resumen(medir(admin.traer_todas_tareas, [()] * 3))
+        resultados["eliminar_tarea"] = resumen(medir(admin.eliminar_tarea, [(i,) for i in azar.sample(range(1, tamaño + 1), min(operaciones, tamaño))]))
+        resultados["eliminar_todas_tareas"] = resumen(medir(admin.eliminar_todas_tareas, [()]))
+        admin.cerrar()
+
+    return {
+        "base": base,
+        "tamaño": tamaño,
+        "carga_segundos": carga,
+        "pico_memoria_mb": pico_memoria_mb(),
+        "operaciones": resultados,
+    }
+
+
+def escenario_en_otro_proceso(base: str, tamaño: int, operaciones: int) -> dict:
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--escenario", base, str(tamaño), "--operaciones", str(operaciones)],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    return json.loads(salida.stdout)
+
+
+def mostrar(escenario: dict):
+    memoria = escenario["pico_memoria_mb"]
+    print(f"\n{escenario['base']} - {escenario['tamaño']} tareas (carga {escenario['carga_segundos']:.1f} s, "
+          f"pico de memoria {f'{memoria:.0f} MB' if memoria is not None else 'no disponible'})")
+    print(f"  {'operacion':<26}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre, datos in escenario["operaciones"].items():
+        print(f"  {nombre:<26}{datos['ops_por_segundo']:>12.0f}{datos['p50_ms']:>10.3f}{datos['p99_ms']:>10.3f}")
+
+
+def comparar(anterior: dict, actual: dict, umbral: float) -> bool:
+    #Compara la latencia p50 de cada operacion; devuelve True si alguna empeoro mas que el umbral
+    previos = {(e["base"], e["tamaño"]): e for e in anterior["escenarios"]}
+    hubo_regresion = False
+    print(f"\nComparacion con la corrida del {anterior['fecha']} (p50, umbral {umbral:.0%}):")
+    for escenario in actual["escenarios"]:
+        previo = previos.get((escenario["base"], escenario["tamaño"]))
+        if previo is None:
+            continue
+        for nombre, datos in escenario["operaciones"].items():
+            antes = previo["operaciones"].get(nombre, {}).get("p50_ms")
+            if not antes:
+                continue
+            cambio = datos["p50_ms"] / antes - 1
+            marca = ""
+            if cambio > umbral:
+                marca = "  <-- REGRESION"
+                hubo_regresion = True
+            print(f"  {escenario['base']:<8}{escenario['tamaño']:>9} {nombre:<26}{antes:>10.3f} -> {datos['p50_ms']:>10.3f} ms ({cambio:+.0%}){marca}")
+    return hubo_regresion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las operaciones de AdminTarea")
+    parser.add_argument("--tamaños", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--bases", nargs="+", choices=["memoria", "disco"], default=["memoria", "disco"])
+    parser.add_argument("--operaciones", type=int, default=1000, help="Operaciones medidas por tipo")
+    parser.add_argument("--salida", default="benchmark_resultados.json")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%)")
+    parser.add_argument("--escenario", nargs=2, metavar=("BASE", "TAMAÑO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.escenario:      #Modo interno: corre un solo escenario y escribe el resultado en la salida estandar
+        print(json.dumps(correr_escenario(args.escenario[0], int(args.escenario[1]), args.operaciones)))
+        return
+
+    resultados = {
+        "fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "escenarios": [],
+    }
+    for tamaño in args.tamaños:
+        for base in args.bases:
+            escenario = escenario_en_otro_proceso(base, tamaño, args.operaciones)
+            mostrar(escenario)
+            resultados["escenarios"].append(escenario)
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        if comparar(anterior, resultados, args.umbral):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
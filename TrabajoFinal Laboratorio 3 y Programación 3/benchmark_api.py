@@ -0,0 +1,243 @@
+#Prueba de carga de la API (app de API.py) con varios clientes simultaneos.
+#
+#Cada "trabajador" es un cliente que hace peticiones una detras de otra, eligiendo la ruta al azar segun la
+#--mezcla (por ejemplo 70% /tarea/{id}, 20% /listar y 10% /eliminar/{id}), siempre con autenticacion Basic.
+#Se corre con 1, 2, 4 y 8 trabajadores y para cada ruta se muestran peticiones por segundo, latencia
+#p50/p95/p99 y porcentaje de errores (respuestas 4xx/5xx o fallas de conexion). Asi se ve a partir de cuantos
+#clientes la API deja de escalar.
+#
+#Con --tasas se fija cuantas peticiones por segundo se envian en total (repartidas entre los trabajadores);
+#0 es "lo mas rapido posible". Con una tasa fija la latencia se mide desde el momento en que la peticion
+#tendria que haber salido, asi una API saturada muestra la espera real de los clientes y no solo lo que tarda
+#cada peticion una vez enviada.
+#
+#Uso:
+#  python benchmark_api.py                                  (en el mismo proceso, con httpx.ASGITransport)
+#  python benchmark_api.py --lanzar                         (levanta "uvicorn API:app" en un puerto libre)
+#  python benchmark_api.py --url http://127.0.0.1:8000 --ids 5000
+#  python benchmark_api.py --mezcla tarea=80 listar=15 eliminar=5 --tasas 200 0 --salida carga.json
+#Con la API en el mismo proceso o con --lanzar se usa una base nueva en una carpeta temporal, cargada con
+#--tareas tareas de prueba; con --url se trabaja sobre la base del servidor (cuidado con eliminar y borrar).
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmark_admin_tarea import percentil, tarea_de_prueba
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+#Nombre en la mezcla -> (metodo, funcion que arma la URL a partir del generador al azar y del ID mas alto)
+RUTAS = {
+    "tarea": ("GET", lambda azar, ids: f"/tarea/{azar.randint(1, ids)}"),
+    "listar": ("GET", lambda azar, ids: f"/listar?limite=100&despues_de={azar.randint(0, ids)}"),
+    "eliminar": ("DELETE", lambda azar, ids: f"/eliminar/{azar.randint(1, ids)}"),
+    "borrar": ("DELETE", lambda azar, ids: "/borrar"),
+}
+MEZCLA = ("tarea=70", "listar=20", "eliminar=10", "borrar=0")
+
+
+def leer_mezcla(valores: List[str]) -> Dict[str, float]:
+    mezcla = {}
+    for valor in valores:
+        ruta, _, peso = valor.partition("=")
+        if ruta not in RUTAS:
+            raise SystemExit(f"Ruta desconocida en --mezcla: {ruta!r} (opciones: {', '.join(RUTAS)})")
+        mezcla[ruta] = float(peso or 1)
+    mezcla = {ruta: peso for ruta, peso in mezcla.items() if peso > 0}
+    if not mezcla:
+        raise SystemExit("La --mezcla no tiene ninguna ruta con peso mayor a 0")
+    return mezcla
+
+
+async def trabajador(cliente: httpx.AsyncClient, numero: int, mezcla: Dict[str, float], tasa: float,
+                     desfase: float, fin: float, ids: int, resultados: Dict[str, List[Tuple[float, bool]]]):
+    azar = random.Random(numero)     #Semilla fija: cada corrida hace las mismas peticiones
+    rutas, pesos = list(mezcla), list(mezcla.values())
+    intervalo = 1 / tasa if tasa else 0
+    proximo = time.perf_counter() + desfase
+    while time.perf_counter() < fin:
+        if intervalo:
+            espera = proximo - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            inicio = proximo         #Si la API viene atrasada, la demora tambien cuenta como latencia
+            proximo += intervalo
+        else:
+            inicio = time.perf_counter()
+        ruta = azar.choices(rutas, pesos)[0]
+        metodo, armar_url = RUTAS[ruta]
+        try:
+            respuesta = await cliente.request(metodo, armar_url(azar, ids))
+            error = respuesta.status_code >= 400
+        except httpx.HTTPError:
+            error = True
+        resultados[ruta].append((time.perf_counter() - inicio, error))
+
+
+def resumen(mediciones: List[Tuple[float, bool]], segundos: float) -> dict:
+    latencias = [latencia for latencia, _ in mediciones]
+    errores = sum(1 for _, error in mediciones if error)
+    return {
+        "peticiones": len(mediciones),
+        "por_segundo": len(mediciones) / segundos,
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p95_ms": percentil(latencias, 95) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "errores": errores / len(mediciones),
+    }
+
+
+async def correr_paso(cliente: httpx.AsyncClient, trabajadores: int, tasa: float, mezcla: Dict[str, float],
+                      duracion: float, ids: int) -> dict:
+    resultados: Dict[str, List[Tuple[float, bool]]] = {ruta: [] for ruta in mezcla}
+    inicio = time.perf_counter()
+    #Con tasa fija cada trabajador arranca un poco despues del anterior, asi las peticiones quedan parejas
+    #en el tiempo en lugar de salir todas juntas
+    await asyncio.gather(*(trabajador(cliente, numero, mezcla, tasa / trabajadores, numero / tasa if tasa else 0,
+                                      inicio + duracion, ids, resultados)
+                           for numero in range(trabajadores)))
+    segundos = time.perf_counter() - inicio
+    todas = [medicion for mediciones in resultados.values() for medicion in mediciones]
+    return {
+        "trabajadores": trabajadores,
+        "tasa": tasa,
+        "segundos": segundos,
+        "total": resumen(todas, segundos) if todas else None,
+        "rutas": {ruta: resumen(mediciones, segundos) for ruta, mediciones in resultados.items() if mediciones},
+    }
+
+
+def mostrar(paso: dict):
+    tasa = f"{paso['tasa']:.0f} peticiones/s" if paso["tasa"] else "sin limite de tasa"
+    print(f"\n{paso['trabajadores']} trabajador(es), {tasa}")
+    print(f"  {'ruta':<10}{'peticiones':>11}{'pet/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}")
+    filas = list(paso["rutas"].items()) + ([("TOTAL", paso["total"])] if paso["total"] else [])
+    for ruta, datos in filas:
+        print(f"  {ruta:<10}{datos['peticiones']:>11}{datos['por_segundo']:>10.0f}{datos['p50_ms']:>10.2f}"
+              f"{datos['p95_ms']:>10.2f}{datos['p99_ms']:>10.2f}{datos['errores']:>9.1%}")
+
+
+def cargar_tareas(db_nombre: str, cantidad: int):
+    from nucleo import AdminTarea
+    admin = AdminTarea(db_nombre, tamaño_cache=0, umbral_lento_ms=None)
+    admin.agregar_tareas_lote(tarea_de_prueba(i) for i in range(cantidad))
+    admin.cerrar()
+
+
+def puerto_libre() -> int:
+    with socket.socket() as conexion:
+        conexion.bind(("127.0.0.1", 0))
+        return conexion.getsockname()[1]
+
+
+def lanzar_servidor(carpeta: str) -> Tuple[subprocess.Popen, str]:
+    #Levanta la API con uvicorn en otro proceso, trabajando sobre la tareas.db de "carpeta"
+    puerto = puerto_libre()
+    entorno = dict(os.environ, PYTHONPATH=CARPETA)
+    servidor = subprocess.Popen([sys.executable, "-m", "uvicorn", "API:app", "--port", str(puerto), "--log-level", "warning"],
+                                cwd=carpeta, env=entorno)
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        if servidor.poll() is not None:
+            raise SystemExit("El servidor termino al arrancar (¿esta instalado uvicorn?)")
+        try:
+            httpx.get(url + "/docs", timeout=1)
+            return servidor, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    servidor.terminate()
+    raise SystemExit("El servidor no respondio en 30 segundos")
+
+
+async def correr(args, mezcla: Dict[str, float], transporte=None, url: str = "http://api") -> List[dict]:
+    pasos = []
+    limites = httpx.Limits(max_connections=max(args.trabajadores), max_keepalive_connections=max(args.trabajadores))
+    async with httpx.AsyncClient(base_url=url, transport=transporte, auth=(args.usuario, args.clave),
+                                 limits=limites, timeout=30) as cliente:
+        respuesta = await cliente.get("/cache")     #Calienta la cache de credenciales: el primer hash es lento a proposito
+        if respuesta.status_code == 401:
+            raise SystemExit("Usuario o clave incorrectos (ver --usuario y --clave)")
+        for tasa in args.tasas:
+            for trabajadores in args.trabajadores:
+                paso = await correr_paso(cliente, trabajadores, tasa, mezcla, args.duracion, args.ids)
+                mostrar(paso)
+                pasos.append(paso)
+    return pasos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de tareas")
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument("--url", help="API ya levantada (por defecto se usa la app en este mismo proceso)")
+    destino.add_argument("--lanzar", action="store_true", help="Levanta la API con uvicorn en otro proceso")
+    parser.add_argument("--mezcla", nargs="+", default=list(MEZCLA), metavar="RUTA=PESO",
+                        help=f"Peso de cada ruta ({', '.join(RUTAS)}); por defecto {' '.join(MEZCLA)}")
+    parser.add_argument("--trabajadores", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--tasas", type=float, nargs="+", default=[0],
+                        help="Peticiones por segundo entre todos los trabajadores (0 = sin limite)")
+    parser.add_argument("--duracion", type=float, default=10, help="Segundos por cada combinacion")
+    parser.add_argument("--tareas", type=int, default=10_000, help="Tareas de prueba en la base temporal")
+    parser.add_argument("--ids", type=int, help="ID mas alto a pedir (por defecto --tareas)")
+    parser.add_argument("--usuario", default="Admin")
+    parser.add_argument("--clave", default="12345")
+    parser.add_argument("--salida", help="Guarda los resultados en este JSON")
+    args = parser.parse_args()
+    args.ids = args.ids or args.tareas
+    mezcla = leer_mezcla(args.mezcla)
+
+    if args.url:
+        modo = args.url
+        pasos = asyncio.run(correr(args, mezcla, url=args.url))
+    else:
+        with tempfile.TemporaryDirectory() as carpeta:
+            cargar_tareas(os.path.join(carpeta, "tareas.db"), args.tareas)
+            if args.lanzar:
+                modo = "uvicorn"
+                servidor, url = lanzar_servidor(carpeta)
+                try:
+                    pasos = asyncio.run(correr(args, mezcla, url=url))
+                finally:
+                    servidor.terminate()
+                    servidor.wait()
+            else:
+                modo = "en proceso"
+                anterior = os.getcwd()
+                os.chdir(carpeta)       #API.py abre "tareas.db" en la carpeta actual
+                try:
+                    import API
+                    pasos = asyncio.run(correr(args, mezcla, transporte=httpx.ASGITransport(app=API.app)))
+                    API.planificador.cerrar()
+                    API.admin_tarea.cerrar()
+                finally:
+                    os.chdir(anterior)
+
+    if args.salida:
+        resultados = {
+            "fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "modo": modo,
+            "mezcla": mezcla,
+            "pasos": pasos,
+        }
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
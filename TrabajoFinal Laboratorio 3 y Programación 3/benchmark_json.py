@@ -0,0 +1,117 @@
+#Compara las dos formas de convertir las tareas de la base de datos a JSON:
+#  - "objetos": fila de sqlite -> Tarea -> diccionario -> json.dumps (como lo hacia /listar antes)
+#  - "directo": SQLite arma el JSON de cada fila (JSON_TAREA) y solo se unen los textos
+#Tambien compara el tamaño de una Tarea con __slots__ contra una Tarea con __dict__ (la version anterior).
+#
+#Uso:  python benchmark_json.py [--filas 1000000] [--bloque 1000]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from nucleo import AdminTarea, Tarea
+
+
+class TareaConDict:     #Copia de la Tarea anterior, sin __slots__, solo para comparar
+    def __init__(self, id, titulo, descripcion, estado, fecha_creada, fecha_actualizada):
+        self.id = id
+        self.titulo = titulo
+        self.descripcion = descripcion
+        self.estado = estado
+        self.fecha_creada = fecha_creada
+        self.fecha_actualizada = fecha_actualizada
+
+
+def a_dict(tarea) -> dict:
+    return {
+        "id": tarea.id,
+        "titulo": tarea.titulo,
+        "descripcion": tarea.descripcion,
+        "estado": tarea.estado,
+        "fecha_creada": tarea.fecha_creada,
+        "fecha_actualizada": tarea.fecha_actualizada
+    }
+
+
+def listar_con_objetos(admin: AdminTarea, bloque: int, clase) -> int:
+    #Recorre todas las tareas de a paginas y las convierte a JSON pasando por objetos y diccionarios
+    total = 0
+    ultimo_id = 0
+    query = "SELECT * FROM tareas WHERE id > ? ORDER BY id LIMIT ?"
+    while True:
+        with admin.pool.lectura() as conn:
+            filas = conn.execute(query, (ultimo_id, bloque)).fetchall()
+        if not filas:
+            return total
+        tareas = [clase(*fila) for fila in filas]
+        texto = ",".join(json.dumps(a_dict(tarea), ensure_ascii=False) for tarea in tareas)
+        total += len(texto.encode("utf-8"))
+        ultimo_id = tareas[-1].id
+
+
+def listar_directo(admin: AdminTarea, bloque: int) -> int:
+    #Recorre todas las tareas de a paginas con el JSON armado por SQLite
+    total = 0
+    for textos in admin.iterar_json(bloque):
+        total += len(",".join(textos).encode("utf-8"))
+    return total
+
+
+def medir(nombre: str, funcion, filas: int):
+    #Primero se mide el tiempo (sin tracemalloc, que lo hace mas lento) y despues la memoria reservada
+    inicio_cpu = time.process_time()
+    inicio = time.perf_counter()
+    bytes_json = funcion()
+    segundos = time.perf_counter() - inicio
+    cpu = time.process_time() - inicio_cpu
+
+    tracemalloc.start()
+    funcion()
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{nombre:<22} {segundos:8.2f} s  {cpu:8.2f} s CPU  {cpu / filas * 1e6:7.2f} us/fila  "
+          f"pico de memoria {pico / 1024:9.0f} KiB  ({bytes_json / 1e6:.0f} MB de JSON)")
+    return cpu
+
+
+def tamaño_tarea(tarea) -> int:     #Bytes que ocupa el objeto (mas su __dict__, si tiene)
+    tamaño = sys.getsizeof(tarea)
+    if hasattr(tarea, "__dict__"):
+        tamaño += sys.getsizeof(tarea.__dict__)
+    return tamaño
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la conversion de tareas a JSON")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--bloque", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        admin = AdminTarea(os.path.join(carpeta, "benchmark.db"), tamaño_cache=0)
+        print(f"Cargando {args.filas} tareas...")
+        admin.agregar_tareas_lote(
+            Tarea(None, f"Tarea {i}", f"Descripcion de la tarea {i}\nsegunda linea", "Pendiente",
+                  "2024-01-01 10:00:00", "2024-01-01 10:00:00")
+            for i in range(args.filas)
+        )
+
+        fila = ("1", "titulo", "descripcion", "Pendiente", "2024-01-01 10:00:00", "2024-01-01 10:00:00")
+        print(f"Tamaño por objeto: Tarea con __dict__ {tamaño_tarea(TareaConDict(*fila))} bytes, "
+              f"Tarea con __slots__ {tamaño_tarea(Tarea(*fila))} bytes")
+
+        cpu_dict = medir("objetos (__dict__)", lambda: listar_con_objetos(admin, args.bloque, TareaConDict), args.filas)
+        cpu_slots = medir("objetos (__slots__)", lambda: listar_con_objetos(admin, args.bloque, Tarea), args.filas)
+        cpu_directo = medir("directo (SQLite JSON)", lambda: listar_directo(admin, args.bloque), args.filas)
+        print(f"El camino directo usa {cpu_dict / cpu_directo:.1f}x menos CPU que el anterior "
+              f"({cpu_slots / cpu_directo:.1f}x menos que con __slots__)")
+        admin.cerrar()
+
+
+if __name__ == "__main__":
+    main()
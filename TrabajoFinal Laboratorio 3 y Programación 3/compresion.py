@@ -0,0 +1,140 @@
+#Middleware ASGI que comprime las respuestas grandes de la API (listados, exportaciones, /metrics) con brotli
+#o gzip, segun lo que acepte el cliente en "Accept-Encoding". Brotli comprime mas el JSON, pero solo se usa
+#si esta instalado el paquete "brotli"; gzip siempre esta disponible.
+#
+#Las respuestas de menos de "minimo" bytes se envian tal cual: comprimir un JSON chico casi no ahorra nada
+#y cuesta CPU. Para saberlo se juntan los primeros bloques hasta llegar al minimo, asi tambien funciona con
+#las respuestas que van de a bloques (StreamingResponse), que despues se comprimen bloque por bloque sin
+#juntar el cuerpo entero. Los eventos en vivo (text/event-stream) nunca se comprimen ni se demoran.
+
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli       #Opcional: pip install brotli
+except ImportError:
+    brotli = None
+
+#Tipos de contenido que vale la pena comprimir (las imagenes o los archivos ya comprimidos no)
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "text/csv", "text/plain")
+
+
+def elegir_codificacion(encabezado: str) -> Optional[str]:
+    #Lee "Accept-Encoding" (por ejemplo "gzip, deflate, br;q=0.9") y devuelve "br", "gzip" o None.
+    #Gana la de mayor "q"; si empatan se prefiere brotli.
+    preferencias = {}
+    for parte in encabezado.split(","):
+        nombre, _, parametros = parte.partition(";")
+        calidad = 1.0
+        clave, _, valor = parametros.strip().partition("=")
+        if clave.strip() == "q":
+            try:
+                calidad = float(valor)
+            except ValueError:
+                calidad = 0.0
+        preferencias[nombre.strip().lower()] = calidad
+    comodin = preferencias.get("*", 0.0)
+    disponibles = (["br"] if brotli is not None else []) + ["gzip"]
+    calidad, _, codificacion = max((preferencias.get(nombre, comodin), -orden, nombre)
+                                   for orden, nombre in enumerate(disponibles))
+    return codificacion if calidad > 0 else None
+
+
+class Compresor:
+    def __init__(self, codificacion: str, nivel_gzip: int = 6, calidad_brotli: int = 4):
+        if codificacion == "br":
+            self.objeto = brotli.Compressor(quality=calidad_brotli)
+            self.comprimir = self.objeto.process
+            self.terminar = self.objeto.finish
+        else:
+            self.objeto = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 31)     #31 = formato gzip (con encabezado y CRC)
+            self.comprimir = self.objeto.compress
+            self.terminar = self.objeto.flush
+
+
+def _encabezado(encabezados: List[Tuple[bytes, bytes]], nombre: bytes) -> Optional[bytes]:
+    for clave, valor in encabezados:
+        if clave.lower() == nombre:
+            return valor
+    return None
+
+
+class CompresionHTTP:
+    def __init__(self, app, minimo: int = 1024):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion((_encabezado(scope["headers"], b"accept-encoding") or b"").decode("latin-1"))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        estado = {"inicio": None, "compresor": None, "decidido": False}
+        pendientes: List[bytes] = []
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                encabezados = mensaje.get("headers", [])
+                tipo = (_encabezado(encabezados, b"content-type") or b"").decode("latin-1").split(";")[0].strip()
+                if (tipo not in TIPOS_COMPRIMIBLES or _encabezado(encabezados, b"content-encoding") is not None
+                        or mensaje["status"] in (204, 304)):
+                    estado["decidido"] = True       #No se comprime: todo pasa sin cambios
+                    await send(mensaje)
+                else:
+                    estado["inicio"] = mensaje      #Se envia cuando se sepa si el cuerpo llega al minimo
+                return
+            if mensaje["type"] != "http.response.body":
+                await send(mensaje)
+                return
+
+            cuerpo = mensaje.get("body", b"")
+            mas = mensaje.get("more_body", False)
+            compresor = estado["compresor"]
+            if estado["decidido"]:
+                if compresor is None:
+                    await send(mensaje)
+                    return
+                datos = compresor.comprimir(cuerpo)
+                if not mas:
+                    datos += compresor.terminar()
+                if datos or not mas:        #El compresor puede no devolver nada hasta juntar mas datos
+                    await send({"type": "http.response.body", "body": datos, "more_body": mas})
+                return
+
+            pendientes.append(cuerpo)
+            juntado = sum(len(parte) for parte in pendientes)
+            if mas and juntado < self.minimo:
+                return
+            estado["decidido"] = True
+            inicio = estado["inicio"]
+            encabezados = [(clave, valor) for clave, valor in inicio.get("headers", []) if clave.lower() != b"vary"]
+            vary = _encabezado(inicio.get("headers", []), b"vary")
+            #Vary avisa a los proxies y navegadores que la respuesta depende de Accept-Encoding
+            encabezados.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            cuerpo = b"".join(pendientes)
+            pendientes.clear()
+            if juntado < self.minimo:
+                await send(dict(inicio, headers=encabezados))
+                await send({"type": "http.response.body", "body": cuerpo, "more_body": False})
+                return
+
+            compresor = estado["compresor"] = Compresor(codificacion)
+            datos = compresor.comprimir(cuerpo)
+            if not mas:
+                datos += compresor.terminar()
+            encabezados = [(clave, valor) for clave, valor in encabezados if clave.lower() != b"content-length"]
+            if not mas:
+                encabezados.append((b"content-length", str(len(datos)).encode("latin-1")))
+            encabezados.append((b"content-encoding", codificacion.encode("latin-1")))
+            #El cuerpo comprimido ya no es identico byte a byte: el ETag pasa a ser debil (W/"..."),
+            #que sigue sirviendo para If-None-Match
+            encabezados = [(clave, b"W/" + valor if clave.lower() == b"etag" and not valor.startswith(b"W/") else valor)
+                           for clave, valor in encabezados]
+            await send(dict(inicio, headers=encabezados))
+            await send({"type": "http.response.body", "body": datos, "more_body": mas})
+
+        await self.app(scope, receive, enviar)
@@ -0,0 +1,101 @@
+#Central de eventos de la API: reparte a los clientes conectados (WebSocket o Server-Sent Events) un aviso
+#por cada tarea agregada, actualizada o eliminada con AdminTarea (ver AdminTarea.suscribir).
+#
+#Cada cliente tiene su propia cola acotada. Si un cliente lento deja que su cola se llene, se descartan los
+#avisos que tenia pendientes y se le manda uno solo de tipo "resincronizar": con la ultima "version" que vio
+#puede pedir GET /cambios?desde=<version> y ponerse al dia. Si ni siquiera lee ese aviso antes de que la cola
+#se vuelva a llenar, se lo desconecta. Asi un cliente lento nunca hace crecer la memoria del servidor.
+#
+#Todo corre en el bucle de eventos de asyncio: un cliente conectado que no recibe nada es solo una tarea
+#esperando en su cola, por eso un unico proceso aguanta miles de conexiones inactivas. Cada aviso se
+#convierte a JSON una sola vez y el mismo texto se pone en la cola de todos los clientes.
+
+import asyncio
+import json
+from typing import Optional, Set
+
+RESINCRONIZAR = json.dumps({"tipo": "resincronizar"})
+
+
+class Suscripcion:
+    def __init__(self, capacidad: int):
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=capacidad)
+        self.resincronizando = False     #Hay un aviso "resincronizar" en la cola que el cliente todavia no leyo
+        self.cerrada = False
+
+    async def siguiente(self, espera: Optional[float] = None) -> Optional[str]:
+        #Devuelve el proximo aviso en JSON; None si pasaron "espera" segundos sin avisos (o si se cerro)
+        if self.cerrada:
+            return None
+        try:
+            mensaje = await asyncio.wait_for(self.cola.get(), espera) if espera else await self.cola.get()
+        except asyncio.TimeoutError:
+            return None
+        if mensaje is RESINCRONIZAR:
+            self.resincronizando = False
+        return mensaje
+
+
+class CentralEventos:
+    def __init__(self, capacidad_cliente: int = 256):
+        self.capacidad_cliente = capacidad_cliente
+        self.suscripciones: Set[Suscripcion] = set()
+        self.bucle: Optional[asyncio.AbstractEventLoop] = None
+        self.enviados = 0
+        self.resincronizados = 0
+        self.desconectados = 0
+
+    def suscribir(self) -> Suscripcion:      #Se llama desde el bucle de eventos (en la ruta del cliente)
+        self.bucle = asyncio.get_running_loop()
+        suscripcion = Suscripcion(self.capacidad_cliente)
+        self.suscripciones.add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion):
+        self.suscripciones.discard(suscripcion)
+
+    def publicar(self, evento: dict):
+        #Es el oyente de AdminTarea: se llama desde el hilo que hizo la escritura, asi que solo convierte
+        #el evento a JSON y le pasa el reparto al bucle de eventos.
+        if self.bucle is None or not self.suscripciones:
+            return
+        mensaje = json.dumps(evento)
+        try:
+            self.bucle.call_soon_threadsafe(self._repartir, mensaje)
+        except RuntimeError:      #El bucle ya se cerro (el servidor se esta apagando)
+            pass
+
+    def _repartir(self, mensaje: str):
+        for suscripcion in list(self.suscripciones):
+            try:
+                suscripcion.cola.put_nowait(mensaje)
+                self.enviados += 1
+            except asyncio.QueueFull:
+                self._desbordada(suscripcion)
+
+    def _desbordada(self, suscripcion: Suscripcion):
+        if suscripcion.resincronizando:
+            #Ni siquiera leyo el aviso anterior: se lo desconecta
+            suscripcion.cerrada = True
+            self.desuscribir(suscripcion)
+            self._vaciar(suscripcion)
+            suscripcion.cola.put_nowait(None)     #Despierta a la ruta del cliente para que cierre la conexion
+            self.desconectados += 1
+            return
+        self._vaciar(suscripcion)
+        suscripcion.cola.put_nowait(RESINCRONIZAR)
+        suscripcion.resincronizando = True
+        self.resincronizados += 1
+
+    @staticmethod
+    def _vaciar(suscripcion: Suscripcion):
+        while not suscripcion.cola.empty():
+            suscripcion.cola.get_nowait()
+
+    def estadisticas(self) -> dict:
+        return {
+            "clientes": len(self.suscripciones),
+            "enviados": self.enviados,
+            "resincronizados": self.resincronizados,
+            "desconectados": self.desconectados,
+        }
@@ -0,0 +1,83 @@
+#Mide cuanto tarda en arrancar cada punto de entrada (cuanto cuesta importar el modulo en un proceso nuevo)
+#y muestra los modulos que mas tiempo se llevan, segun "python -X importtime".
+#
+#Uso:
+#  python medir_arranque.py
+#  python medir_arranque.py --repeticiones 20 nucleo API
+#Cada medicion corre en un proceso nuevo y en una carpeta temporal, asi API.py crea su propia tareas.db
+#y no toca la del proyecto.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+MODULOS = ("nucleo", "Interfaz", "API", "transferencia")
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+
+def leer_importtime(texto: str, modulo: str) -> Dict[str, int]:
+    #Las lineas de -X importtime son "import time: propio | acumulado | modulo", con el modulo corrido dos
+    #espacios por cada nivel de anidamiento, y cada modulo aparece despues de los que importo.
+    #Devuelve modulo -> microsegundos acumulados, del punto de entrada y de los modulos que importo directamente.
+    tiempos = {}
+    directos = {}
+    for linea in texto.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        if nivel == 1:
+            directos[nombre.strip()] = int(acumulado)
+        elif nivel == 0:
+            if nombre.strip() == modulo:
+                tiempos = directos
+                tiempos[modulo] = int(acumulado)
+            directos = {}
+    return tiempos
+
+
+def medir(modulo: str, carpeta: str) -> Tuple[float, Dict[str, int], Optional[str]]:
+    entorno = dict(os.environ, PYTHONPATH=CARPETA)
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                             cwd=carpeta, env=entorno, capture_output=True, text=True)
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode != 0:
+        return segundos, {}, proceso.stderr.strip().splitlines()[-1]
+    return segundos, leer_importtime(proceso.stderr, modulo), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de cada punto de entrada")
+    parser.add_argument("modulos", nargs="*", default=MODULOS)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--top", type=int, default=5, help="Cuantos modulos importados mostrar por punto de entrada")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, {args.repeticiones} procesos por modulo (mediana)\n")
+    for modulo in args.modulos:
+        with tempfile.TemporaryDirectory() as carpeta:
+            medir(modulo, carpeta)      #La primera vez se compilan los .pyc: no se cuenta
+            resultados = [medir(modulo, carpeta) for _ in range(args.repeticiones)]
+        error = resultados[-1][2]
+        if error:
+            print(f"{modulo:<15} no se pudo importar: {error}\n")
+            continue
+        total = statistics.median(segundos for segundos, _, _ in resultados)
+        propio = statistics.median(tiempos.get(modulo, 0) for _, tiempos, _ in resultados) / 1000
+        print(f"{modulo:<15} proceso {total * 1000:7.1f} ms   import {propio:7.1f} ms")
+        tiempos = resultados[-1][1]
+        pesados: List[Tuple[int, str]] = sorted(((us, nombre) for nombre, us in tiempos.items() if nombre != modulo),
+                                                reverse=True)
+        for us, nombre in pesados[:args.top]:
+            print(f"    {us / 1000:7.1f} ms  {nombre}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#Metricas de rendimiento en el formato de texto de Prometheus.
+#Las usan AdminTarea (tiempo de cada sentencia SQL) y la API (tiempo de cada ruta); se leen en GET /metrics.
+#Esta pensado para dejarlo siempre activo: registrar un valor es un bisect y una suma dentro de un lock.
+
+import bisect
+import functools
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+#Limites de los "buckets" de los histogramas, en segundos (de medio milisegundo a 10 segundos)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+log_sql = logging.getLogger("tareas.sql")
+
+_metricas = []      #Todas las metricas creadas, en el orden en que se muestran en /metrics
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...], buckets=BUCKETS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        self.series: Dict[tuple, list] = {}     #valores de las etiquetas -> [cuentas por bucket..., suma, total]
+        self.lock = threading.Lock()
+        _metricas.append(self)
+
+    def observar(self, valores: tuple, segundos: float):
+        posicion = bisect.bisect_left(self.buckets, segundos)
+        with self.lock:
+            serie = self.series.get(valores)
+            if serie is None:
+                serie = self.series[valores] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            serie[posicion] += 1      #La ultima posicion de cuentas es el bucket "+Inf"
+            serie[-2] += segundos
+            serie[-1] += 1
+
+    def exportar(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self.lock:
+            series = [(valores, list(serie)) for valores, serie in self.series.items()]
+        for valores, serie in series:
+            etiquetas = ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(self.etiquetas, valores))
+            separador = "," if etiquetas else ""
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets + (float("inf"),), serie):
+                acumulado += cuenta      #En Prometheus cada bucket cuenta todo lo que esta por debajo de su limite
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                lineas.append(f'{self.nombre}_bucket{{{etiquetas}{separador}le="{le}"}} {acumulado}')
+            lineas.append(f"{self.nombre}_sum{{{etiquetas}}} {serie[-2]}")
+            lineas.append(f"{self.nombre}_count{{{etiquetas}}} {serie[-1]}")
+        return lineas
+
+
+class Valores:
+    #Metrica cuyos valores se leen en el momento de exportar, con una funcion que devuelve {etiquetas: valor}.
+    #Sirve para mostrar contadores que ya existen en otro lado (por ejemplo los de la cache de tareas).
+    def __init__(self, nombre: str, ayuda: str, tipo: str, etiquetas: Tuple[str, ...], leer: Callable[[], dict]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.tipo = tipo
+        self.etiquetas = etiquetas
+        self.leer = leer
+        _metricas.append(self)
+
+    def exportar(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for valores, valor in self.leer().items():
+            etiquetas = ",".join(f'{nombre}="{_escapar(v)}"' for nombre, v in zip(self.etiquetas, valores))
+            lineas.append(f"{self.nombre}{{{etiquetas}}} {valor}")
+        return lineas
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exportar() -> str:      #Texto completo para la ruta /metrics
+    lineas = []
+    for metrica in _metricas:
+        lineas.extend(metrica.exportar())
+    return "\n".join(lineas) + "\n"
+
+
+latencia_http = Histograma("tareas_http_duracion_segundos", "Duracion de las peticiones HTTP por ruta",
+                           ("metodo", "ruta", "estado"))
+latencia_sql = Histograma("tareas_sql_duracion_segundos", "Duracion de cada sentencia SQL (incluye leer los resultados)",
+                          ("sentencia",))
+
+
+@functools.lru_cache(maxsize=1024)
+def normalizar_sql(sql: str) -> str:
+    #Deja una version corta y estable de la sentencia para usarla como etiqueta: sin espacios repetidos
+    #y con las listas "?, ?, ?" de largo variable reducidas a "?...", asi no aparece una serie por cada largo.
+    sql = " ".join(sql.split())
+    sql = re.sub(r"\?(\s*,\s*\?)+", "?...", sql)
+    return sql[:120]
+
+
+class PerfiladorSQL:
+    #Mide cuanto tarda cada sentencia SQL. Cada sentencia empieza cuando se llama a execute, executemany o commit
+    #(ver ConexionMedida) y se considera que termina cuando empieza la siguiente en la misma conexion o cuando
+    #la conexion vuelve al pool, asi el tiempo incluye leer las filas con fetchall.
+    #Las sentencias que superan "umbral_lento_ms" se escriben en el log "tareas.sql".
+    def __init__(self, umbral_lento_ms: float = 100):
+        self.umbral_lento = umbral_lento_ms / 1000
+        self.en_curso: Dict[int, tuple] = {}     #id de la conexion -> (sentencia, momento en que empezo)
+
+    def empieza(self, conn, sql: str):
+        self.terminar(conn)
+        self.en_curso[id(conn)] = (sql, time.perf_counter())
+
+    def terminar(self, conn):
+        actual = self.en_curso.pop(id(conn), None)
+        if actual is None:
+            return
+        sql, inicio = actual
+        segundos = time.perf_counter() - inicio
+        sentencia = normalizar_sql(sql)
+        latencia_sql.observar((sentencia,), segundos)
+        if segundos >= self.umbral_lento:
+            log_sql.warning("Consulta lenta (%.1f ms): %s", segundos * 1000, sentencia)
+
+
+class ConexionMedida(sqlite3.Connection):
+    #Conexion de sqlite3 que avisa al PerfiladorSQL antes de cada sentencia. Se usa esto y no set_trace_callback
+    #porque el trace recibe la sentencia con los valores ya reemplazados (una etiqueta distinta por cada valor)
+    #y se llama una vez por fila en executemany, lo que encarece mucho las cargas masivas.
+    perfilador: Optional[PerfiladorSQL] = None
+
+    def execute(self, sql, *args):
+        if self.perfilador is not None:
+            self.perfilador.empieza(self, sql)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        if self.perfilador is not None:
+            self.perfilador.empieza(self, sql)
+        return super().executemany(sql, *args)
+
+    def commit(self):
+        if self.perfilador is not None:
+            self.perfilador.empieza(self, "COMMIT")     #Aca es donde se escribe en disco
+        return super().commit()
+
+
+class MedidorHTTP:
+    #Middleware ASGI que mide cada peticion hasta que se termina de enviar la respuesta (tambien las que van
+    #de a bloques, como /listar). Se etiqueta con la ruta declarada ("/tarea/{tarea_id}") y no con la URL real,
+    #para que no aparezca una serie distinta por cada ID.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+            latencia_http.observar((scope["method"], ruta, str(estado[0])), time.perf_counter() - inicio)
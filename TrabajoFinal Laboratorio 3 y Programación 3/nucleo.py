@@ -0,0 +1,1440 @@
+#Nucleo del administrador de tareas: las clases del dominio (Persona, Usuario, Tarea) y el acceso a la base de
+#datos (AdminTarea, AdminUsuario). No importa tkinter ni fastapi y no hace nada al importarse, asi lo pueden
+#usar tanto la ventana (Interfaz.py) como la API (API.py) o los scripts sin cargar lo que no necesitan.
+
+import hashlib
+import hmac
+import itertools
+import json
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from metricas import ConexionMedida, PerfiladorSQL
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+class Persona:
+    def __init__(self, id, nombre, apellido, fecha_nacimiento, dni):
+        self.id = id
+        self.nombre = nombre
+        self.apellido = apellido
+        self.fecha_nacimiento = fecha_nacimiento
+        self.dni = dni
+
+#Cantidad de veces que se repite el hash al encriptar una contraseña. Es lento a proposito: a quien intente
+#adivinar contraseñas por fuerza bruta le cuesta lo mismo por cada intento.
+ITERACIONES_PBKDF2 = 600_000
+
+
+class Usuario(Persona):
+    def __init__(self, id, nombre, apellido, fecha_nacimiento, dni, contraseña, encriptada: bool = False):
+        super().__init__(id, nombre, apellido, fecha_nacimiento, dni)
+        #Encriptamos la contraseña del nuevo Usuario que creemos (si viene de la base de datos ya esta encriptada).
+        self.contraseña = contraseña if encriptada else self.encriptar_contraseña(contraseña)
+        self.ultimo_acceso = None
+
+    def encriptar_contraseña(self, contraseña, sal: Optional[bytes] = None, iteraciones: int = ITERACIONES_PBKDF2):
+        # Utilizamos PBKDF2 con SHA256 y una "sal" aleatoria distinta para cada usuario, asi dos usuarios con la
+        # misma contraseña no tienen el mismo hash. Se guarda todo junto: "pbkdf2_sha256$iteraciones$sal$hash".
+        if sal is None:
+            sal = os.urandom(16)
+        clave = hashlib.pbkdf2_hmac("sha256", contraseña.encode('utf-8'), sal, iteraciones)
+        return f"pbkdf2_sha256${iteraciones}${sal.hex()}${clave.hex()}"
+
+    def verificar_contraseña(self, contraseña):
+        # Verifica si la contraseña ingresada coincide con la contraseña almacenada encriptada
+        algoritmo, iteraciones, sal, _ = self.contraseña.split("$")
+        #Aqui encriptamos la contraseña ingresada por el Usuario con la misma sal e iteraciones que la guardada
+        encriptada = self.encriptar_contraseña(contraseña, bytes.fromhex(sal), int(iteraciones))
+
+        return hmac.compare_digest(encriptada, self.contraseña) #Verificamos si esa Contraseña ingresada es igual a la ya guardada.
+
+    def registrar_acceso(self):
+        # Registra el tiempo del último acceso
+        self.ultimo_acceso = datetime.datetime.now()
+        print(f"Fecha de Ingreso: {self.ultimo_acceso}")
+        
+
+class Tarea:
+    #Con __slots__ cada Tarea guarda sus atributos en lugares fijos en vez de en un diccionario propio,
+    #lo que la hace mas chica y mas rapida de crear (importa cuando se crean miles por consulta).
+    __slots__ = ("id", "titulo", "descripcion", "estado", "fecha_creada", "fecha_actualizada", "fecha_vencimiento")
+
+    def __init__(self, id: int, titulo: str, descripcion: str, estado: str, fecha_creada: str, fecha_actualizada: str,
+                 fecha_vencimiento: Optional[str] = None):
+        self.id = id
+        self.titulo = titulo
+        self.descripcion = descripcion
+        self.estado = estado
+        self.fecha_creada = fecha_creada
+        self.fecha_actualizada = fecha_actualizada
+        self.fecha_vencimiento = fecha_vencimiento     #"AAAA-MM-DD HH:MM:SS" en hora local, o None si no vence
+
+#Estados que puede tener una tarea. Toda tarea nueva empieza "Pendiente" y despues solo puede pasar a ESTADOS_VALIDOS.
+ESTADOS_VALIDOS = ("Completada", "En Progreso", "Por hacer", "Postergada")
+ESTADOS = ("Pendiente",) + ESTADOS_VALIDOS
+
+#ID del padre de la tarea "id" (null si no es subtarea), sacado de la tabla de clausura de la migracion 9
+PADRE_ID = "(SELECT ancestro FROM tareas_jerarquia WHERE descendiente = id AND profundidad = 1)"
+
+#Expresion SQL que arma el JSON de una tarea dentro de SQLite (con la extension JSON incluida en SQLite).
+#Asi las rutas que devuelven JSON reciben el texto listo, sin crear una Tarea ni un diccionario por fila.
+JSON_TAREA = f"""json_object('id', id, 'titulo', titulo, 'descripcion', descripcion, 'estado', estado,
+                            'fecha_creada', fecha_creada, 'fecha_actualizada', fecha_actualizada,
+                            'fecha_vencimiento', fecha_vencimiento, 'padre_id', {PADRE_ID})"""
+
+#Ultima version del registro de cambios (ver la migracion 5); 0 si todavia no hubo ningun cambio
+ULTIMA_VERSION = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'cambios'), 0)"
+
+#Columnas por las que se pueden ordenar los listados filtrados (todas tienen indice junto con "estado")
+ORDENES = ("fecha_actualizada", "fecha_creada", "id")
+
+#Lo mismo para una fila de "tareas_archivo", que ademas tiene la fecha en que se archivo
+JSON_TAREA_ARCHIVADA = f"json_set({JSON_TAREA}, '$.fecha_archivada', fecha_archivada)"
+
+#Columnas de la tabla "tareas", en el mismo orden que los argumentos de Tarea
+COLUMNAS = ("id", "titulo", "descripcion", "estado", "fecha_creada", "fecha_actualizada", "fecha_vencimiento")
+
+#Campos del JSON de una tarea (ver json_tarea): las columnas mas el ID del padre
+CAMPOS_JSON = COLUMNAS + ("padre_id",)
+
+#Tareas que todavia pueden vencer: tienen fecha y no estan completadas. Es la misma condicion del indice
+#parcial de la migracion 8; las consultas la repiten tal cual para que SQLite pueda usar ese indice.
+POR_VENCER = "fecha_vencimiento IS NOT NULL AND estado IS NOT 'Completada'"
+
+#Formato de las fechas que se guardan como texto: ordenadas como texto quedan ordenadas por fecha
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+
+def json_tarea(campos: Optional[Iterable[str]] = None) -> str:
+    #Como JSON_TAREA, pero solo con algunos campos (en el orden de CAMPOS_JSON). SQLite no copia ni convierte
+    #las que no se piden, y una descripcion larga guardada en paginas de desborde ni siquiera se lee.
+    #Con campos=None es la tarea completa.
+    if campos is None:
+        return JSON_TAREA
+    campos = set(campos)
+    desconocidos = campos - set(CAMPOS_JSON)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    if not campos:
+        raise ValueError("Hay que pedir al menos un campo")
+    expresiones = {"padre_id": PADRE_ID}
+    return "json_object(" + ", ".join(f"'{campo}', {expresiones.get(campo, campo)}"
+                                      for campo in CAMPOS_JSON if campo in campos) + ")"
+
+
+def normalizar_vencimiento(valor: Optional[str]) -> Optional[str]:
+    #Acepta "AAAA-MM-DD", "AAAA-MM-DD HH:MM" o "AAAA-MM-DD HH:MM:SS" (tambien con "T" en lugar del espacio),
+    #en hora local, y la devuelve siempre como "AAAA-MM-DD HH:MM:SS": asi ordenar el texto es ordenar las fechas
+    #y el indice sirve para buscar por rango. Una fecha sin hora vence al final de ese dia. Vacio o None: no vence.
+    if valor is None or not str(valor).strip():
+        return None
+    texto = str(valor).strip().replace("T", " ")
+    for formato in (FORMATO_FECHA, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            fecha = datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+        if formato == "%Y-%m-%d":
+            fecha = fecha.replace(hour=23, minute=59, second=59)
+        return fecha.strftime(FORMATO_FECHA)
+    raise ValueError(f"Fecha de vencimiento invalida: {valor!r} (se espera AAAA-MM-DD o AAAA-MM-DD HH:MM)")
+
+
+#Migraciones del esquema de la base de datos: (version, lista de sentencias SQL).
+#Una sentencia tambien puede ser una funcion que recibe la conexion, para pasos que no se pueden escribir en SQL.
+#La version aplicada se guarda en "PRAGMA user_version", asi al abrir un tareas.db viejo solo se ejecutan
+#las migraciones que le faltan. Para cambiar el esquema se agrega una nueva al final, nunca se edita una existente.
+MIGRACIONES = [
+    (1, ['''
+        CREATE TABLE IF NOT EXISTS tareas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT NOT NULL,
+            descripcion TEXT,
+            estado TEXT,
+            fecha_creada TEXT,
+            fecha_actualizada TEXT
+        )
+        ''']),
+    (2, [
+        'CREATE INDEX IF NOT EXISTS idx_tareas_estado_actualizada ON tareas (estado, fecha_actualizada)',
+        'CREATE INDEX IF NOT EXISTS idx_tareas_estado_creada ON tareas (estado, fecha_creada)',
+    ]),
+    #Busqueda de texto completo: "tareas_fts" es un indice FTS5 sobre titulo y descripcion que no guarda
+    #una copia del texto (content='tareas'); los triggers lo mantienen sincronizado con la tabla "tareas".
+    (3, [
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS tareas_fts USING fts5(
+            titulo, descripcion, content='tareas', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_fts_insertar AFTER INSERT ON tareas BEGIN
+            INSERT INTO tareas_fts (rowid, titulo, descripcion) VALUES (new.id, new.titulo, new.descripcion);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_fts_borrar AFTER DELETE ON tareas BEGIN
+            INSERT INTO tareas_fts (tareas_fts, rowid, titulo, descripcion) VALUES ('delete', old.id, old.titulo, old.descripcion);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_fts_actualizar AFTER UPDATE OF titulo, descripcion ON tareas BEGIN
+            INSERT INTO tareas_fts (tareas_fts, rowid, titulo, descripcion) VALUES ('delete', old.id, old.titulo, old.descripcion);
+            INSERT INTO tareas_fts (rowid, titulo, descripcion) VALUES (new.id, new.titulo, new.descripcion);
+        END''',
+        "INSERT INTO tareas_fts (tareas_fts) VALUES ('rebuild')",     #Indexa las tareas que ya existian
+    ]),
+    #Usuarios de la ventana de inicio de sesion y de la API. El usuario inicial lo crea AdminUsuario.
+    (4, [
+        '''CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL UNIQUE,
+            apellido TEXT,
+            fecha_nacimiento TEXT,
+            dni TEXT,
+            contraseña TEXT NOT NULL,
+            ultimo_acceso TEXT
+        )''',
+    ]),
+    #Registro de cambios para sincronizar clientes (GET /cambios): los triggers anotan cada alta, cambio y baja
+    #de "tareas" con un numero de version que siempre crece (AUTOINCREMENT nunca reutiliza un numero).
+    #Las bajas quedan como "lapidas" (operacion 'eliminar'), asi el cliente se entera de que tiene que borrarla.
+    #Para que el registro no crezca sin limite, cada 1000 versiones se borran las que quedaron mas de "retener"
+    #versiones atras; "version_minima" indica desde donde el registro esta completo.
+    (5, [
+        '''CREATE TABLE IF NOT EXISTS cambios (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarea_id INTEGER NOT NULL,
+            operacion TEXT NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_cambios_tarea ON cambios (tarea_id, version)',
+        '''CREATE TABLE IF NOT EXISTS sincronizacion (
+            clave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )''',
+        "INSERT OR IGNORE INTO sincronizacion (clave, valor) VALUES ('version_minima', 0), ('retener', 100000)",
+        '''CREATE TRIGGER IF NOT EXISTS tareas_cambios_insertar AFTER INSERT ON tareas BEGIN
+            INSERT INTO cambios (tarea_id, operacion) VALUES (new.id, 'insertar');
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_cambios_actualizar AFTER UPDATE ON tareas BEGIN
+            INSERT INTO cambios (tarea_id, operacion) VALUES (new.id, 'actualizar');
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_cambios_borrar AFTER DELETE ON tareas BEGIN
+            INSERT INTO cambios (tarea_id, operacion) VALUES (old.id, 'eliminar');
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS cambios_recortar AFTER INSERT ON cambios WHEN new.version % 1000 = 0 BEGIN
+            UPDATE sincronizacion
+            SET valor = max(valor, new.version - (SELECT valor FROM sincronizacion WHERE clave = 'retener'))
+            WHERE clave = 'version_minima';
+            DELETE FROM cambios WHERE version <= (SELECT valor FROM sincronizacion WHERE clave = 'version_minima');
+        END''',
+        #Las tareas que ya existian entran como altas, asi un cliente que empieza desde 0 recibe todo
+        "INSERT INTO cambios (tarea_id, operacion) SELECT id, 'insertar' FROM tareas ORDER BY id",
+    ]),
+    #Tareas completadas que se sacaron de "tareas" con AdminTarea.archivar_completadas. Conservan su ID
+    #(sin AUTOINCREMENT: el ID lo trae la tarea), asi se pueden seguir consultando con el mismo numero.
+    (6, [
+        '''CREATE TABLE IF NOT EXISTS tareas_archivo (
+            id INTEGER PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            descripcion TEXT,
+            estado TEXT,
+            fecha_creada TEXT,
+            fecha_actualizada TEXT,
+            fecha_archivada TEXT
+        )''',
+    ]),
+    #Resumenes para el tablero de estadisticas, mantenidos por triggers: cuantas tareas hay en cada estado
+    #y cuantas se crearon cada dia. Leerlos cuesta lo mismo con 100 o con 10 millones de tareas.
+    #"creadas" es historico: no baja cuando una tarea se elimina o se archiva.
+    (7, [
+        '''CREATE TABLE IF NOT EXISTS estadisticas_estado (
+            estado TEXT PRIMARY KEY,
+            cantidad INTEGER NOT NULL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS estadisticas_dia (
+            dia TEXT PRIMARY KEY,
+            creadas INTEGER NOT NULL
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_estadisticas_insertar AFTER INSERT ON tareas BEGIN
+            INSERT INTO estadisticas_estado (estado, cantidad) VALUES (coalesce(new.estado, ''), 1)
+                ON CONFLICT (estado) DO UPDATE SET cantidad = cantidad + 1;
+            INSERT INTO estadisticas_dia (dia, creadas) VALUES (coalesce(substr(new.fecha_creada, 1, 10), ''), 1)
+                ON CONFLICT (dia) DO UPDATE SET creadas = creadas + 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_estadisticas_actualizar AFTER UPDATE OF estado ON tareas
+        WHEN old.estado IS NOT new.estado BEGIN
+            UPDATE estadisticas_estado SET cantidad = cantidad - 1 WHERE estado = coalesce(old.estado, '');
+            INSERT INTO estadisticas_estado (estado, cantidad) VALUES (coalesce(new.estado, ''), 1)
+                ON CONFLICT (estado) DO UPDATE SET cantidad = cantidad + 1;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_estadisticas_borrar AFTER DELETE ON tareas BEGIN
+            UPDATE estadisticas_estado SET cantidad = cantidad - 1 WHERE estado = coalesce(old.estado, '');
+        END''',
+        #Se cargan los resumenes con las tareas que ya existian
+        '''INSERT INTO estadisticas_estado (estado, cantidad)
+        SELECT coalesce(estado, ''), COUNT(*) FROM tareas GROUP BY 1''',
+        '''INSERT INTO estadisticas_dia (dia, creadas)
+        SELECT coalesce(substr(fecha_creada, 1, 10), ''), COUNT(*) FROM tareas GROUP BY 1''',
+    ]),
+    #Fecha de vencimiento (ver normalizar_vencimiento). El indice es parcial: solo tiene las tareas con fecha
+    #que no estan completadas, que son las unicas que pueden vencer, asi no crece con las tareas sin fecha
+    #y buscar las vencidas (o las proximas a vencer) es recorrer un rango del indice ya ordenado.
+    (8, [
+        'ALTER TABLE tareas ADD COLUMN fecha_vencimiento TEXT',
+        'ALTER TABLE tareas_archivo ADD COLUMN fecha_vencimiento TEXT',
+        '''CREATE INDEX IF NOT EXISTS idx_tareas_vencimiento ON tareas (fecha_vencimiento)
+        WHERE fecha_vencimiento IS NOT NULL AND estado IS NOT 'Completada'
+        ''',
+    ]),
+    #Subtareas, con una tabla de clausura: una fila (ancestro, descendiente) por cada tarea y cada una de las que
+    #tiene debajo a cualquier nivel, con la distancia entre las dos, mas la de cada tarea consigo misma
+    #(profundidad 0). Asi "todo el subarbol", "todos los ancestros" o el avance de un arbol entero son una sola
+    #consulta por indice, sin bajar nivel por nivel. La clave empieza por (ancestro, profundidad): los hijos
+    #directos (profundidad 1) y el subarbol salen de un rango; el indice (descendiente, profundidad) da el padre
+    #y los ancestros. Al eliminar (o archivar) una tarea, sus subtareas pasan a colgar de la tarea de arriba
+    #(y quedan en el registro de cambios, porque cambio su padre).
+    (9, [
+        '''CREATE TABLE IF NOT EXISTS tareas_jerarquia (
+            ancestro INTEGER NOT NULL,
+            profundidad INTEGER NOT NULL,
+            descendiente INTEGER NOT NULL,
+            PRIMARY KEY (ancestro, profundidad, descendiente)
+        ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_jerarquia_descendiente ON tareas_jerarquia (descendiente, profundidad)',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_jerarquia_insertar AFTER INSERT ON tareas BEGIN
+            INSERT INTO tareas_jerarquia (ancestro, profundidad, descendiente) VALUES (new.id, 0, new.id);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS tareas_jerarquia_borrar AFTER DELETE ON tareas BEGIN
+            INSERT INTO cambios (tarea_id, operacion)
+            SELECT descendiente, 'actualizar' FROM tareas_jerarquia WHERE ancestro = old.id AND profundidad = 1;
+            UPDATE tareas_jerarquia SET profundidad = profundidad - 1
+            WHERE ancestro IN (SELECT ancestro FROM tareas_jerarquia WHERE descendiente = old.id AND profundidad > 0)
+              AND descendiente IN (SELECT descendiente FROM tareas_jerarquia WHERE ancestro = old.id AND profundidad > 0);
+            DELETE FROM tareas_jerarquia WHERE descendiente = old.id;
+            DELETE FROM tareas_jerarquia WHERE ancestro = old.id;
+        END''',
+        "INSERT INTO tareas_jerarquia (ancestro, profundidad, descendiente) SELECT id, 0, id FROM tareas",
+    ]),
+]
+
+#Cuelga el subarbol de :tarea (que no tiene padre) debajo de :padre: cada ancestro de :padre (incluido el mismo)
+#pasa a ser ancestro de cada tarea del subarbol, a la suma de las dos distancias mas uno
+COLGAR = '''
+INSERT INTO tareas_jerarquia (ancestro, profundidad, descendiente)
+SELECT arriba.ancestro, arriba.profundidad + abajo.profundidad + 1, abajo.descendiente
+FROM tareas_jerarquia AS arriba, tareas_jerarquia AS abajo
+WHERE arriba.descendiente = :padre AND abajo.ancestro = :tarea
+'''
+
+#Lo contrario: separa el subarbol de :tarea de todos sus ancestros (queda como tarea sin padre)
+DESCOLGAR = '''
+DELETE FROM tareas_jerarquia
+WHERE descendiente IN (SELECT descendiente FROM tareas_jerarquia WHERE ancestro = :tarea)
+  AND ancestro IN (SELECT ancestro FROM tareas_jerarquia WHERE descendiente = :tarea AND profundidad > 0)
+'''
+
+
+class PoolConexiones:
+    #Administra las conexiones a la base de datos para que varios hilos puedan usarla al mismo tiempo:
+    #hay varias conexiones de solo lectura y una unica conexion de escritura (SQLite admite un solo escritor).
+    def __init__(self, db_nombre: str, lectores: Optional[int] = None, busy_timeout_ms: int = 5000,
+                 umbral_lento_ms: Optional[float] = 100, sincronizacion_normal: bool = False):
+        self.db_nombre = db_nombre
+        self.busy_timeout_ms = busy_timeout_ms
+        #Por defecto "synchronous=FULL": cada commit se escribe al disco antes de volver, asi un corte de luz no
+        #pierde nada ya confirmado. Con sincronizacion_normal=True se usa NORMAL, que en WAL es bastante mas rapido
+        #pero ante un corte de luz puede perder las ultimas transacciones confirmadas (sirve para benchmarks).
+        self.sincronizacion = "NORMAL" if sincronizacion_normal else "FULL"
+        #Mide cada sentencia SQL para GET /metrics y avisa en el log las que tardan mas de umbral_lento_ms.
+        #Con umbral_lento_ms=None no se mide nada.
+        self.perfilador = PerfiladorSQL(umbral_lento_ms) if umbral_lento_ms is not None else None
+        self.memoria = db_nombre == ":memory:"     #Cada conexion a ":memory:" es una base distinta, asi que ahi se comparte una sola
+
+        self.escritor = self._conectar()
+        self.lock_escritura = threading.Lock()     #Solo un hilo a la vez puede escribir
+
+        if lectores is None:
+            lectores = os.cpu_count() or 4
+        self.lectores = queue.Queue(maxsize=lectores)    #Cola acotada: si todos los lectores estan ocupados, el hilo espera
+        if not self.memoria:
+            for _ in range(lectores):
+                self.lectores.put(self._conectar())
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_nombre, timeout=self.busy_timeout_ms / 1000, check_same_thread=False,
+                               factory=ConexionMedida)
+        if not self.memoria:
+            #En una base nueva se activa el vacuum incremental (solo tiene efecto antes de que se escriba el archivo),
+            #asi despues de archivar tareas se puede devolver el espacio libre al disco de a poco
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            #WAL permite que los lectores sigan leyendo mientras el escritor escribe
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.sincronizacion}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.perfilador = self.perfilador     #Si es None la conexion no mide nada
+        return conn
+
+    def _terminar_medicion(self, conn):      #La ultima sentencia de la conexion termina cuando vuelve al pool
+        if self.perfilador is not None:
+            self.perfilador.terminar(conn)
+
+    @contextmanager
+    def lectura(self):
+        if self.memoria:
+            with self.lock_escritura:
+                try:
+                    yield self.escritor
+                finally:
+                    self._terminar_medicion(self.escritor)
+            return
+        conn = self.lectores.get()     #Tomamos una conexion libre de la cola
+        try:
+            yield conn
+        finally:
+            self._terminar_medicion(conn)
+            self.lectores.put(conn)    #Y la devolvemos para que la use otro hilo
+
+    @contextmanager
+    def escritura(self):
+        with self.lock_escritura:
+            try:
+                yield self.escritor
+                self.escritor.commit()      #Si todo salio bien se confirman los cambios
+            except BaseException:
+                self.escritor.rollback()    #Si hubo un error se deshace la transaccion
+                raise
+            finally:
+                self._terminar_medicion(self.escritor)
+
+    def cerrar(self):
+        while not self.lectores.empty():
+            self.lectores.get_nowait().close()
+        self.escritor.close()
+
+
+class CacheLRU:
+    #Cache en memoria de tamaño acotado: cuando se llena se descarta la entrada usada hace mas tiempo.
+    #Lleva la cuenta de aciertos, fallos y desalojos para poder elegir un buen tamaño.
+    def __init__(self, capacidad: int = 1024):
+        self.capacidad = capacidad
+        self.entradas = OrderedDict()
+        self.lock = threading.Lock()
+        self.generacion = 0         #Aumenta con cada invalidacion (ver guardar)
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        with self.lock:
+            valor = self.entradas.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self.entradas.move_to_end(clave)    #Pasa a ser la entrada usada mas recientemente
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor, generacion: int):
+        #"generacion" es la que habia antes de leer el valor de la base de datos. Si mientras tanto hubo una
+        #invalidacion el valor leido puede estar desactualizado, y entonces no se guarda.
+        if self.capacidad <= 0:
+            return
+        with self.lock:
+            if generacion != self.generacion:
+                return
+            self.entradas[clave] = valor
+            self.entradas.move_to_end(clave)
+            if len(self.entradas) > self.capacidad:
+                self.entradas.popitem(last=False)   #Se descarta la entrada menos usada
+                self.desalojos += 1
+
+    def invalidar(self, *claves):
+        with self.lock:
+            self.generacion += 1
+            for clave in claves:
+                self.entradas.pop(clave, None)
+
+    def invalidar_rango(self, desde: int, hasta: int):     #Invalida las claves entre "desde" y "hasta" inclusive
+        with self.lock:
+            self.generacion += 1
+            for clave in [clave for clave in self.entradas if desde <= clave <= hasta]:
+                del self.entradas[clave]
+
+    def limpiar(self):
+        with self.lock:
+            self.generacion += 1
+            self.entradas.clear()
+
+    def estadisticas(self) -> dict:
+        with self.lock:
+            return {"capacidad": self.capacidad, "tamaño": len(self.entradas), "aciertos": self.aciertos,
+                    "fallos": self.fallos, "desalojos": self.desalojos}
+
+
+class EscritorAgrupado:
+    #Modo de escritura agrupada ("group commit"): en vez de que cada alta, cambio o baja haga su propio commit,
+    #un unico hilo junta las operaciones que van llegando y las confirma todas juntas en una sola transaccion.
+    #El grupo se cierra cuando ya hay "max_grupo" operaciones o cuando pasaron "espera_ms" desde la primera.
+    #Con espera_ms=0 no se espera: el grupo son las operaciones que llegaron mientras se confirmaba el anterior,
+    #que con muchos hilos escribiendo ya son varias. Esperar unos milisegundos solo conviene si el disco es lento.
+    #Cada operacion corre dentro de un SAVEPOINT: si una falla se deshace solo esa y las demas siguen.
+    #El Future de cada operacion se completa recien despues del commit, asi que cuando quien la pidio recibe
+    #el resultado el cambio ya esta guardado en el disco (igual que en el modo normal): el pool usa
+    #synchronous=FULL, que sobrevive a un corte de luz. Solo si el AdminTarea se crea con
+    #sincronizacion_normal=True un corte puede perder los ultimos grupos confirmados.
+    def __init__(self, pool: PoolConexiones, espera_ms: float = 0, max_grupo: int = 256):
+        self.pool = pool
+        self.espera = espera_ms / 1000
+        self.max_grupo = max_grupo
+        self.pendientes = queue.Queue()     #(Future, funcion que recibe la conexion de escritura)
+        self.abierto = True
+        self.hilo = threading.Thread(target=self._trabajar, name="escritor-agrupado", daemon=True)
+        self.hilo.start()
+
+    def enviar(self, operacion) -> Future:
+        futuro = Future()
+        if not self.abierto:
+            raise RuntimeError("El escritor agrupado ya esta cerrado")
+        self.pendientes.put((futuro, operacion))
+        return futuro
+
+    def cerrar(self):      #Confirma lo que quedo en la cola y termina el hilo
+        if self.abierto:
+            self.abierto = False
+            self.pendientes.put(None)
+            self.hilo.join()
+
+    def _trabajar(self):
+        terminar = False
+        while not terminar:
+            primero = self.pendientes.get()
+            if primero is None:
+                return
+            grupo = [primero]
+            limite = time.monotonic() + self.espera
+            while len(grupo) < self.max_grupo:
+                try:
+                    #Lo que ya esta en la cola se toma sin esperar; despues se espera hasta el limite
+                    restante = limite - time.monotonic()
+                    pedido = self.pendientes.get(timeout=restante) if restante > 0 else self.pendientes.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    terminar = True
+                    break
+                grupo.append(pedido)
+            self._confirmar(grupo)
+
+    def _confirmar(self, grupo):
+        resultados = []
+        try:
+            with self.pool.escritura() as conn:
+                conn.execute("BEGIN")     #Sin el BEGIN, el RELEASE del primer SAVEPOINT haria commit solo
+                for futuro, operacion in grupo:
+                    if not futuro.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT operacion")
+                    try:
+                        resultado = operacion(conn)
+                    except Exception as error:
+                        conn.execute("ROLLBACK TO operacion")
+                        resultados.append((futuro, None, error))
+                    else:
+                        resultados.append((futuro, resultado, None))
+                    conn.execute("RELEASE operacion")
+        except BaseException as error:     #Fallo el commit: ninguna operacion del grupo quedo guardada
+            for futuro, _ in grupo:
+                if futuro.running():
+                    futuro.set_exception(error)
+            return
+        for futuro, resultado, error in resultados:
+            if error is None:
+                futuro.set_result(resultado)
+            else:
+                futuro.set_exception(error)
+
+
+class AdminTarea:
+    def __init__(self, db_nombre: str, lectores: Optional[int] = None, tamaño_cache: int = 1024,
+                 umbral_lento_ms: Optional[float] = 100, escritura_agrupada: bool = False,
+                 espera_grupo_ms: float = 0, max_grupo: int = 256,
+                 sincronizacion_normal: bool = False):    #La clase AdminTarea recibe a la base de datos "db_nombre" como parametro
+        #Las conexiones a "db_nombre" las maneja el pool, asi cada hilo usa la suya. sincronizacion_normal=True
+        #cambia durabilidad por velocidad (ver PoolConexiones); por defecto nunca se pierde un cambio confirmado.
+        self.pool = PoolConexiones(db_nombre, lectores, umbral_lento_ms=umbral_lento_ms,
+                                   sincronizacion_normal=sincronizacion_normal)
+
+        #Cache de las filas que devuelve obtener_tarea. Antes de usarla se revisa el registro de cambios, asi
+        #tambien se entera de lo que modifiquen otras conexiones u otros procesos (por ejemplo la interfaz y la API
+        #sobre el mismo tareas.db); ver _sincronizar_cache.
+        self.cache = CacheLRU(tamaño_cache)
+        self.lock_cache = threading.Lock()
+
+        self._migrar()  #Se crea o actualiza el esquema (tabla "tareas", indices, etc.) con el metodo _migrar
+
+        #Version del registro de cambios hasta la que la cache esta al dia (la cache arranca vacia)
+        with self.pool.lectura() as conn:
+            self.version_cache = conn.execute(ULTIMA_VERSION).fetchone()[0]
+
+        #Con escritura_agrupada=True las altas, cambios y bajas sueltas se confirman de a grupos (ver EscritorAgrupado).
+        #Conviene cuando muchos hilos escriben a la vez, como en la API; con un solo hilo no se gana nada.
+        self.escritor = EscritorAgrupado(self.pool, espera_grupo_ms, max_grupo) if escritura_agrupada else None
+
+        #Funciones que se llaman despues de cada alta, cambio o baja ya confirmada (ver suscribir)
+        self.oyentes: List[Callable[[dict], None]] = []
+
+
+
+    def _migrar(self):     #Aplica en orden las MIGRACIONES que todavia no se ejecutaron sobre esta base de datos
+        with self.pool.escritura() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for numero, sentencias in MIGRACIONES:
+                if numero <= version:
+                    continue
+                conn.execute("BEGIN")      #Cada migracion es atomica: o se aplica entera o no se aplica
+                for query in sentencias:
+                    if callable(query):
+                        self.pool._terminar_medicion(conn)   #Lo que tarde la funcion no se le cuenta a la sentencia anterior
+                        query(conn)
+                    else:
+                        conn.execute(query)
+                conn.execute(f"PRAGMA user_version = {numero}")
+                conn.commit()
+
+    def cerrar(self):    #Cierra todas las conexiones a la base de datos
+        if self.escritor is not None:
+            self.escritor.cerrar()     #Antes se confirma lo que haya quedado pendiente
+        self.pool.cerrar()
+
+    def _escribir(self, operacion):
+        #Ejecuta operacion(conn) en la conexion de escritura y devuelve (resultado, version) cuando ya esta
+        #confirmado, en su propia transaccion o, en modo agrupado, junto con las operaciones de otros hilos.
+        #"version" es la del registro de cambios justo despues de la operacion.
+        def con_version(conn):
+            return operacion(conn), conn.execute(ULTIMA_VERSION).fetchone()[0]
+        if self.escritor is not None:
+            return self.escritor.enviar(con_version).result()
+        with self.pool.escritura() as conn:
+            return con_version(conn)
+
+    def suscribir(self, oyente: Callable[[dict], None]):
+        #Registra una funcion que recibe un evento por cada escritura confirmada, por ejemplo
+        #{"tipo": "actualizar", "version": 42, "ids": [7]}. Los tipos son "insertar", "actualizar", "eliminar",
+        #"archivar", "vaciar" y "mover" (cambio de tarea padre, con "padre_id"); las altas en lote mandan
+        #"rango": [primer_id, ultimo_id] en vez de "ids".
+        #Se llama desde el hilo que hizo la escritura, asi que tiene que ser rapida y no bloquear.
+        #Solo ve las escrituras hechas con esta instancia de AdminTarea (las demas estan en GET /cambios).
+        self.oyentes.append(oyente)
+
+    def desuscribir(self, oyente: Callable[[dict], None]):
+        self.oyentes.remove(oyente)
+
+    def _avisar(self, tipo: str, version: int, **datos):    #Se llama despues del commit y de invalidar la cache
+        if not self.oyentes:
+            return
+        evento = {"tipo": tipo, "version": version, **datos}
+        for oyente in self.oyentes:
+            oyente(evento)
+
+    #Las altas usan el ID de la tarea si ya trae uno (por ejemplo las que reparte AdminTareaParticionada,
+    #ver particiones.py); con id=None, como siempre, SQLite asigna el siguiente.
+    #Con "padre_id" la tarea nueva queda como subtarea de esa (ValueError si no existe).
+    def agregar_tarea(self, tarea: Tarea, padre_id: Optional[int] = None) -> int:  #Esta clase recibe como parametro una variable tipo Tarea
+        query = '''
+        INSERT INTO tareas (id, titulo, descripcion, estado, fecha_creada, fecha_actualizada, fecha_vencimiento)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        '''
+        values = (tarea.id, tarea.titulo, tarea.descripcion, tarea.estado, tarea.fecha_creada, tarea.fecha_actualizada,
+                  normalizar_vencimiento(tarea.fecha_vencimiento))
+        def insertar(conn):
+            tarea_id = conn.execute(query, values).lastrowid
+            if padre_id is not None:
+                self._colgar(conn, tarea_id, padre_id)
+            return tarea_id
+        #Los valores de la tarea en "value" se insertan en Tabla "tareas", confirmando los cambios antes de volver
+        tarea_id, version = self._escribir(insertar)
+        self.cache.invalidar(tarea_id)
+        self._avisar("insertar", version, ids=[tarea_id])
+
+        return tarea_id    #se devuelve el ID de la última fila insertada (cursor.lastrowid)
+
+
+    def agregar_tareas_lote(self, tareas: Iterable[Tarea], tamaño_bloque: int = 1000) -> Optional[Tuple[int, int]]:
+        #Inserta muchas tareas de una sola vez. Todo se hace dentro de una unica transaccion (un solo commit),
+        #usando executemany de a bloques para no tener todas las tareas en memoria al mismo tiempo.
+        #Devuelve el rango de IDs asignados (primer_id, ultimo_id), o None si no habia tareas.
+        #Las tareas del lote tienen que venir todas sin ID o todas con su ID; en ese caso el rango va del menor
+        #al mayor y puede incluir IDs que no son del lote.
+        query = '''
+        INSERT INTO tareas (id, titulo, descripcion, estado, fecha_creada, fecha_actualizada, fecha_vencimiento)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        '''
+        iterador = iter(tareas)
+        primer_id = ultimo_id = None
+        with self.pool.escritura() as conn:    #Si falla cualquier bloque se deshace todo el lote
+            while True:
+                bloque = [(t.id, t.titulo, t.descripcion, t.estado, t.fecha_creada, t.fecha_actualizada,
+                           normalizar_vencimiento(t.fecha_vencimiento))
+                          for t in itertools.islice(iterador, tamaño_bloque)]
+                if not bloque:
+                    break
+                conn.executemany(query, bloque)
+                if bloque[0][0] is None:
+                    #Mientras tenemos el lock de escritura nadie mas inserta, asi que los IDs del bloque son consecutivos
+                    ultimo_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    if primer_id is None:
+                        primer_id = ultimo_id - len(bloque) + 1
+                else:
+                    ids = [fila[0] for fila in bloque]
+                    primer_id = min(ids) if primer_id is None else min(primer_id, *ids)
+                    ultimo_id = max(ids) if ultimo_id is None else max(ultimo_id, *ids)
+            version = conn.execute(ULTIMA_VERSION).fetchone()[0]
+
+        if primer_id is None:
+            return None
+        self.cache.invalidar_rango(primer_id, ultimo_id)
+        self._avisar("insertar", version, rango=[primer_id, ultimo_id])
+        return primer_id, ultimo_id
+
+
+    def actualizar_estado_tarea(self, tarea_id: int, estado: str):
+        query = '''
+        UPDATE tareas SET estado = ?, fecha_actualizada = datetime('now') WHERE id = ?
+        '''
+        actualizadas, version = self._escribir(lambda conn: conn.execute(query, (estado, tarea_id)).rowcount)
+        self.cache.invalidar(tarea_id)    #Se invalida despues del commit, asi nadie vuelve a guardar la fila vieja
+        if actualizadas:
+            self._avisar("actualizar", version, ids=[tarea_id])
+
+    def actualizar_vencimiento(self, tarea_id: int, fecha_vencimiento: Optional[str]) -> bool:
+        #Cambia (o con None quita) la fecha de vencimiento; la fecha pasa por normalizar_vencimiento.
+        #Devuelve False si la tarea no existe.
+        fecha_vencimiento = normalizar_vencimiento(fecha_vencimiento)
+        query = '''
+        UPDATE tareas SET fecha_vencimiento = ?, fecha_actualizada = datetime('now') WHERE id = ?
+        '''
+        actualizadas, version = self._escribir(lambda conn: conn.execute(query, (fecha_vencimiento, tarea_id)).rowcount)
+        self.cache.invalidar(tarea_id)
+        if actualizadas:
+            self._avisar("actualizar", version, ids=[tarea_id])
+        return actualizadas > 0
+
+    @staticmethod
+    def _colgar(conn, tarea_id: int, padre_id: int):     #Pone a tarea_id (sin padre) como subtarea de padre_id
+        if conn.execute("SELECT 1 FROM tareas WHERE id = ?", (padre_id,)).fetchone() is None:
+            raise ValueError(f"No existe la tarea {padre_id}")
+        #Si padre_id esta en el subarbol de tarea_id (o es la misma tarea) se formaria un ciclo
+        if conn.execute("SELECT 1 FROM tareas_jerarquia WHERE descendiente = ? AND ancestro = ?",
+                        (padre_id, tarea_id)).fetchone() is not None:
+            raise ValueError("Una tarea no puede ser subtarea de si misma ni de una de sus subtareas")
+        conn.execute(COLGAR, {"tarea": tarea_id, "padre": padre_id})
+
+    def mover_tarea(self, tarea_id: int, padre_id: Optional[int]) -> bool:
+        #Pasa la tarea, con todas sus subtareas, a ser subtarea de padre_id (con None queda sin padre).
+        #Todo en una transaccion; si el movimiento formaria un ciclo o el padre no existe lanza ValueError
+        #y no cambia nada. Devuelve False si la tarea no existe.
+        return self.mover_tareas([tarea_id], padre_id) > 0
+
+    def mover_tareas(self, ids: Iterable[int], padre_id: Optional[int]) -> int:
+        #Lo mismo para varias tareas, una despues de otra pero todas en la misma transaccion: si alguna no se
+        #puede mover se lanza ValueError y no se mueve ninguna. Devuelve cuantas se movieron (los IDs que no
+        #existen se ignoran) y manda un solo evento con esas.
+        ids = [int(tarea_id) for tarea_id in ids]
+        def mover(conn) -> List[int]:
+            movidas = []
+            for tarea_id in dict.fromkeys(ids):     #Sin repetidos, en el orden en que vinieron
+                if conn.execute("SELECT 1 FROM tareas WHERE id = ?", (tarea_id,)).fetchone() is None:
+                    continue
+                conn.execute(DESCOLGAR, {"tarea": tarea_id})
+                if padre_id is not None:
+                    self._colgar(conn, tarea_id, padre_id)
+                #La fila de "tareas" no cambia, asi que ningun trigger lo anota: se anota aca, para GET /cambios
+                #y para que la cache (que guarda el JSON con "padre_id") la vuelva a leer
+                conn.execute("INSERT INTO cambios (tarea_id, operacion) VALUES (?, 'actualizar')", (tarea_id,))
+                movidas.append(tarea_id)
+            return movidas
+        movidas, version = self._escribir(mover)
+        if movidas:
+            self._avisar("mover", version, ids=sorted(movidas), padre_id=padre_id)
+        return len(movidas)
+
+    def eliminar_tarea(self, tarea_id: int) -> bool: #Funcion para eliminar una tarea usando como Parametro su ID, el cual es un entero.
+        
+        query = '''
+        DELETE FROM tareas WHERE id = ?
+        '''             
+        rows_affected, version = self._escribir(lambda conn: conn.execute(query, (tarea_id,)).rowcount)
+        self.cache.invalidar(tarea_id)
+        if rows_affected:
+            self._avisar("eliminar", version, ids=[tarea_id])
+
+        return rows_affected > 0
+
+
+    #Versiones de actualizar_estado_tarea y eliminar_tarea para muchas tareas a la vez: una sola sentencia
+    #y una sola transaccion para todas. Los IDs se pasan como un arreglo JSON en un unico parametro
+    #(json_each lo convierte en tabla), asi no hay limite de parametros ni una consulta distinta por cantidad.
+    #Devuelven cuantas tareas se modificaron; los IDs que no existen se ignoran. Con RETURNING se sabe cuales
+    #se modificaron de verdad, y el evento lleva solo esos.
+    def actualizar_estado_lote(self, ids: Iterable[int], estado: str) -> int:
+        ids = [int(tarea_id) for tarea_id in ids]
+        query = '''
+        UPDATE tareas SET estado = ?, fecha_actualizada = datetime('now')
+        WHERE id IN (SELECT value FROM json_each(?))
+        RETURNING id
+        '''
+        actualizadas, version = self._escribir(
+            lambda conn: sorted(fila[0] for fila in conn.execute(query, (estado, json.dumps(ids)))))
+        self.cache.invalidar(*ids)
+        if actualizadas:
+            self._avisar("actualizar", version, ids=actualizadas)
+        return len(actualizadas)
+
+    def eliminar_lote(self, ids: Iterable[int]) -> int:
+        ids = [int(tarea_id) for tarea_id in ids]
+        query = '''
+        DELETE FROM tareas WHERE id IN (SELECT value FROM json_each(?))
+        RETURNING id
+        '''
+        eliminadas, version = self._escribir(
+            lambda conn: sorted(fila[0] for fila in conn.execute(query, (json.dumps(ids),))))
+        self.cache.invalidar(*ids)
+        if eliminadas:
+            self._avisar("eliminar", version, ids=eliminadas)
+        return len(eliminadas)
+    
+
+    def obtener_tarea(self, tarea_id: int) -> Tarea:
+        tarea, etag = self.obtener_tarea_y_etag(tarea_id)
+        return tarea
+
+
+    def obtener_tarea_y_etag(self, tarea_id: int) -> Tuple[Optional[Tarea], Optional[str]]:
+        #Igual que obtener_tarea, pero ademas devuelve un ETag: un identificador que cambia cada vez que cambia la tarea.
+        entrada = self._entrada_cache(tarea_id)
+        if entrada is None:
+            return None, None
+        tarea_result, etag, tarea_json = entrada
+        return Tarea(*tarea_result), etag
+
+
+    def obtener_tarea_json(self, tarea_id: int) -> Tuple[Optional[bytes], Optional[str]]:
+        #Devuelve la tarea ya convertida a JSON (en bytes) y su ETag, sin crear ningun objeto intermedio.
+        entrada = self._entrada_cache(tarea_id)
+        if entrada is None:
+            return None, None
+        tarea_result, etag, tarea_json = entrada
+        return tarea_json, etag
+
+
+    def obtener_archivada_json(self, tarea_id: int) -> Optional[bytes]:
+        #Busca la tarea en "tareas_archivo". No pasa por la cache: las archivadas casi no se consultan.
+        query = f'''
+        SELECT {JSON_TAREA_ARCHIVADA} FROM tareas_archivo WHERE id = ?
+        '''
+        with self.pool.lectura() as conn:
+            fila = conn.execute(query, (tarea_id,)).fetchone()
+        return fila[0].encode("utf-8") if fila else None
+
+    def archivar_completadas(self, dias: float = 30, tamaño_bloque: int = 500, pausa: float = 0.01) -> int:
+        #Pasa a "tareas_archivo" las tareas "Completada" que no se actualizan hace mas de "dias" dias, asi la
+        #tabla "tareas" (y sus indices) solo tiene las tareas en uso. Se mueven de a "tamaño_bloque" tareas,
+        #cada bloque en una transaccion corta, y entre bloque y bloque se espera "pausa" segundos para que
+        #las demas escrituras no tengan que esperar a que termine todo el archivado.
+        #Despues se devuelve al disco el espacio que quedo libre (ver liberar_espacio). Devuelve cuantas se archivaron.
+        limite = f"-{float(dias)} days"
+        buscar = '''
+        SELECT json_group_array(id) FROM (
+            SELECT id FROM tareas WHERE estado = 'Completada' AND fecha_actualizada < datetime('now', ?)
+            ORDER BY fecha_actualizada LIMIT ?
+        )
+        '''                          #Usa el indice (estado, fecha_actualizada)
+        copiar = '''
+        INSERT INTO tareas_archivo (id, titulo, descripcion, estado, fecha_creada, fecha_actualizada, fecha_vencimiento,
+                                    fecha_archivada)
+        SELECT id, titulo, descripcion, estado, fecha_creada, fecha_actualizada, fecha_vencimiento, datetime('now')
+        FROM tareas WHERE id IN (SELECT value FROM json_each(?))
+        '''
+        borrar = '''
+        DELETE FROM tareas WHERE id IN (SELECT value FROM json_each(?))
+        '''
+
+        def mover_bloque(conn) -> List[int]:
+            ids = conn.execute(buscar, (limite, tamaño_bloque)).fetchone()[0]
+            conn.execute(copiar, (ids,))
+            conn.execute(borrar, (ids,))
+            return json.loads(ids)
+
+        archivadas = 0
+        while True:
+            ids, version = self._escribir(mover_bloque)
+            if not ids:
+                break
+            self.cache.invalidar(*ids)
+            self._avisar("archivar", version, ids=ids)
+            archivadas += len(ids)
+            if len(ids) < tamaño_bloque:
+                break
+            time.sleep(pausa)
+        if archivadas:
+            self.liberar_espacio()
+        return archivadas
+
+    def liberar_espacio(self, paginas_por_paso: int = 1000) -> int:
+        #Vacuum incremental: devuelve al sistema las paginas libres del archivo de a "paginas_por_paso",
+        #soltando el lock de escritura entre paso y paso. Solo funciona si la base tiene auto_vacuum=INCREMENTAL
+        #(las bases creadas desde esta version); en una base vieja hay que correr una vez "VACUUM" a mano
+        #despues de "PRAGMA auto_vacuum = INCREMENTAL". Devuelve cuantas paginas se liberaron.
+        liberadas = 0
+        with self.pool.lectura() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:      #2 = INCREMENTAL
+                return 0
+        while True:
+            with self.pool.escritura() as conn:
+                libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if libres == 0:
+                    return liberadas
+                conn.execute(f"PRAGMA incremental_vacuum({int(paginas_por_paso)})").fetchall()
+                quedan = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if quedan >= libres:        #No se pudo liberar nada mas
+                return liberadas
+            liberadas += libres - quedan
+
+
+    def _sincronizar_cache(self, conn) -> int:
+        #El registro de cambios (migracion 5) anota cada escritura sobre "tareas", la haga esta instancia u otra
+        #conexion. Si crecio desde la ultima vez, se sacan de la cache las tareas que cambiaron en el medio
+        #(o toda la cache, si esos cambios ya se recortaron del registro). Devuelve la version que ve "conn".
+        ultima = conn.execute(ULTIMA_VERSION).fetchone()[0]
+        with self.lock_cache:
+            if ultima <= self.version_cache:    #Nada nuevo, o "conn" ve una version anterior a la de la cache
+                return ultima
+            minima = conn.execute("SELECT valor FROM sincronizacion WHERE clave = 'version_minima'").fetchone()[0]
+            if self.version_cache < minima:
+                self.cache.limpiar()
+            else:
+                cambiadas = conn.execute("SELECT DISTINCT tarea_id FROM cambios WHERE version > ? AND version <= ?",
+                                         (self.version_cache, ultima)).fetchall()
+                self.cache.invalidar(*(fila[0] for fila in cambiadas))
+            self.version_cache = ultima
+        return ultima
+
+    def _entrada_cache(self, tarea_id: int) -> Optional[tuple]:
+        #Primero se busca en la cache y solo si no esta se consulta la base de datos.
+        #En la cache se guarda la fila (una tupla inmutable), su ETag y su JSON, nunca el objeto Tarea.
+        query = f'''
+        SELECT *, {JSON_TAREA} FROM tareas WHERE id = ?
+        '''
+        with self.pool.lectura() as conn:
+            conn.execute("BEGIN")       #La version del registro y la fila se leen de la misma version de la base
+            try:
+                version = self._sincronizar_cache(conn)
+                entrada = self.cache.obtener(tarea_id)
+                if entrada is not None:
+                    return entrada
+                generacion = self.cache.generacion
+                tarea_result = conn.execute(query, (tarea_id,)).fetchone()
+            finally:
+                conn.commit()
+
+        if tarea_result is None:
+            # Si no se encontró una tarea con el ID proporcionado se retorna None (y no se guarda en la cache)
+            return None
+        tarea_json = tarea_result[-1].encode("utf-8")
+        etag = '"' + hashlib.blake2b(tarea_json, digest_size=8).hexdigest() + '"'
+        entrada = (tarea_result[:-1], etag, tarea_json)
+        #Solo se guarda si la fila es de la version hasta la que la cache esta al dia: una fila leida de una version
+        #anterior podria ser vieja y ningun cambio futuro la sacaria. Si mientras tanto otro hilo adelanto la
+        #cache, la generacion ya cambio y guardar no hace nada.
+        if version == self.version_cache:
+            self.cache.guardar(tarea_id, entrada, generacion)
+        return entrada
+
+
+
+        
+    def eliminar_todas_tareas(self):       #Funcion para eliminar todas las tareas
+        #query contiene una "consulta" que al ejecutarse eliminará todo el contenido de la Tabla "tareas"
+        query = '''
+        DELETE FROM tareas          
+        '''
+        with self.pool.escritura() as conn:    #Se confirman los cambios al salir del "with".
+            conn.execute("DELETE FROM tareas_jerarquia")     #Antes de borrar las tareas, asi su trigger no tiene nada que mover
+
+            cursor = conn.execute(query) #Aqui se ejecuta la "consulta" dentro de "query", que es eliminar los datos
+            rows_affected = cursor.rowcount
+
+            #Esta parte es para restablecer los numeros de "ID" al borrar todas las tareas, que empiece en 1 de nuevo
+            query = '''
+            DELETE FROM sqlite_sequence WHERE name='tareas'  
+            '''                            
+            conn.execute(query) #Se ejecuta la nueva consulta
+            #Salvo que haya tareas archivadas: sus IDs no se pueden repetir, asi que se sigue despues del mayor
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'tareas', MAX(id) FROM tareas_archivo HAVING COUNT(*) > 0")
+            version = conn.execute(ULTIMA_VERSION).fetchone()[0]
+        self.cache.limpiar()     #Como los IDs vuelven a empezar en 1, no puede quedar nada en la cache
+        if rows_affected:
+            self._avisar("vaciar", version)
+        return rows_affected > 0
+
+    
+    def traer_todas_tareas(self) -> List[Tarea]: #La funcion devuelve una Lista de objetos tipo "Tarea"
+        query = '''
+        SELECT * FROM tareas 
+        '''                                #aqui "query" selecciona todas las columnas de la Tabla "tareas"
+        with self.pool.lectura() as conn:
+            result = conn.execute(query).fetchall()    #Ejecutamos la consulta "query" y se almacenan los datos
+
+        tareas = [Tarea(*row) for row in result]
+        return tareas
+
+
+    def traer_tareas_pagina(self, despues_de: int = 0, limite: int = 100) -> List[Tarea]:
+        #Paginacion por "keyset": en vez de OFFSET usamos el ultimo ID visto, asi SQLite salta directo
+        #a esa posicion usando la clave primaria y cada pagina cuesta lo mismo sin importar cuantas tareas haya.
+        query = '''
+        SELECT * FROM tareas WHERE id > ? ORDER BY id LIMIT ?
+        '''
+        with self.pool.lectura() as conn:
+            result = conn.execute(query, (despues_de, limite)).fetchall()
+        return [Tarea(*row) for row in result]
+
+
+    def traer_tareas_por_estado(self, estado: str, orden: str = "fecha_actualizada", descendente: bool = False,
+                                limite: int = 100, despues_de: Optional[Tuple] = None) -> List[Tarea]:
+        #Trae las tareas de un estado ordenadas por "orden". La consulta usa el indice (estado, orden),
+        #asi que SQLite lee solo las filas de ese estado y ya ordenadas, sin recorrer la tabla entera.
+        #"despues_de" es el par (valor de la columna de orden, id) de la ultima tarea de la pagina anterior.
+        if orden not in ORDENES:
+            raise ValueError(f"No se puede ordenar por {orden}")
+        direccion = "DESC" if descendente else "ASC"
+        comparacion = "<" if descendente else ">"
+        #Se ordena siempre tambien por id, asi el orden es total y la paginacion no repite ni saltea tareas
+        columnas = "id" if orden == "id" else f"{orden}, id"
+        #Las tareas sin fecha (NULL) van primero en orden ascendente y al final en descendente, como las ordena
+        #SQLite. Una comparacion con NULL nunca es verdadera, asi que despues de una pagina se piden por separado
+        #el resto del grupo donde quedo la pagina y el grupo siguiente: cada consulta sigue siendo un rango del indice.
+        if despues_de is None:
+            condiciones = [("", [])]
+        elif orden == "id":
+            condiciones = [(f" AND id {comparacion} ?", [despues_de[-1]])]
+        elif despues_de[0] is None:
+            condiciones = [(f" AND {orden} IS NULL AND id {comparacion} ?", [despues_de[1]])]
+            if not descendente:
+                condiciones.append((f" AND {orden} IS NOT NULL", []))
+        else:
+            condiciones = [(f" AND ({columnas}) {comparacion} (?, ?)", list(despues_de))]
+            if descendente:
+                condiciones.append((f" AND {orden} IS NULL", []))
+
+        result = []
+        with self.pool.lectura() as conn:
+            for condicion, valores in condiciones:
+                if len(result) == limite:
+                    break
+                query = (f"SELECT * FROM tareas WHERE estado = ?{condicion} "
+                         f"ORDER BY {columnas.replace(',', f' {direccion},')} {direccion} LIMIT ?")
+                result += conn.execute(query, [estado, *valores, limite - len(result)]).fetchall()
+        return [Tarea(*row) for row in result]
+
+
+    def traer_vencimientos(self, hasta: Optional[str] = None, limite: int = 100,
+                           despues_de: Optional[Tuple[str, int]] = None) -> List[Tarea]:
+        #Tareas no completadas con fecha de vencimiento, de la que vence antes a la que vence despues.
+        #Con "hasta" solo las que vencen hasta esa fecha inclusive (con la fecha actual son las vencidas).
+        #"despues_de" es el par (fecha_vencimiento, id) de la ultima tarea de la pagina anterior.
+        #Se recorre un rango del indice parcial de la migracion 8: no se lee ninguna tarea sin fecha ni completada.
+        query = f"SELECT * FROM tareas WHERE {POR_VENCER}"
+        parametros: list = []
+        if hasta is not None:
+            query += " AND fecha_vencimiento <= ?"
+            parametros.append(normalizar_vencimiento(hasta))
+        if despues_de is not None:
+            query += " AND (fecha_vencimiento, id) > (?, ?)"
+            parametros.extend(despues_de)
+        query += " ORDER BY fecha_vencimiento, id LIMIT ?"
+        parametros.append(limite)
+        with self.pool.lectura() as conn:
+            result = conn.execute(query, parametros).fetchall()
+        return [Tarea(*row) for row in result]
+
+
+    def buscar(self, texto: str, limite: int = 50) -> List[Tarea]:
+        #Busca tareas cuyo titulo o descripcion contengan todas las palabras de "texto", usando el indice FTS5.
+        #Los resultados vienen ordenados por relevancia (bm25), dandole mas peso al titulo que a la descripcion.
+        return [tarea for puntaje, tarea in self.buscar_con_puntaje(texto, limite)]
+
+    def buscar_con_puntaje(self, texto: str, limite: int = 50) -> List[Tuple[float, Tarea]]:
+        #Igual que buscar, pero cada tarea viene con su puntaje bm25 (cuanto mas bajo, mas relevante)
+        palabras = texto.split()
+        if not palabras:
+            return []
+        #Cada palabra va entre comillas para que caracteres como "-" o ":" no se interpreten como operadores FTS5;
+        #la ultima lleva "*" para que tambien encuentre palabras que empiezan asi (busqueda mientras se escribe).
+        consulta = " ".join('"' + palabra.replace('"', '""') + '"' for palabra in palabras) + "*"
+        query = '''
+        SELECT bm25(tareas_fts, 10.0, 1.0) AS puntaje, tareas.* FROM tareas_fts
+        JOIN tareas ON tareas.id = tareas_fts.rowid
+        WHERE tareas_fts MATCH ?
+        ORDER BY puntaje
+        LIMIT ?
+        '''
+        with self.pool.lectura() as conn:
+            result = conn.execute(query, (consulta, limite)).fetchall()
+        return [(row[0], Tarea(*row[1:])) for row in result]
+
+
+    def contar_por_estado(self) -> dict:     #Devuelve cuantas tareas hay en cada estado, por ejemplo {"Pendiente": 3, ...}
+        query = '''
+        SELECT estado, cantidad FROM estadisticas_estado WHERE cantidad > 0
+        '''                                 #Lo mantienen los triggers, asi no hay que recorrer la tabla "tareas"
+        with self.pool.lectura() as conn:
+            return dict(conn.execute(query).fetchall())
+
+    def estadisticas(self, dias: int = 30) -> dict:
+        #Resumen para el tablero: tareas por estado (todos los estados, aunque tengan 0), el total y
+        #cuantas se crearon en cada uno de los ultimos "dias" dias que tuvieron altas (del mas reciente al mas viejo).
+        with self.pool.lectura() as conn:
+            conn.execute("BEGIN")       #Las dos consultas tienen que ver la misma version de la base
+            try:
+                por_estado = dict(conn.execute("SELECT estado, cantidad FROM estadisticas_estado WHERE cantidad > 0"))
+                por_dia = conn.execute("SELECT dia, creadas FROM estadisticas_dia ORDER BY dia DESC LIMIT ?", (dias,)).fetchall()
+            finally:
+                conn.commit()
+        conteo = {estado: por_estado.pop(estado, 0) for estado in ESTADOS}
+        conteo.update(por_estado)       #Estados que no estan en ESTADOS (por ejemplo de tareas muy viejas)
+        return {"por_estado": conteo, "total": sum(conteo.values()), "creadas_por_dia": por_dia}
+
+
+    def traer_json_pagina(self, despues_de: int = 0, limite: int = 100, archivadas: bool = False,
+                          campos: Optional[Iterable[str]] = None) -> List[Tuple[int, str]]:
+        #Igual que traer_tareas_pagina, pero cada tarea viene como (id, texto JSON) armado por SQLite.
+        #Con archivadas=True tambien entran las de "tareas_archivo" (con su "fecha_archivada"), mezcladas por ID.
+        #Con "campos" el JSON solo tiene esas columnas (ver json_tarea).
+        tarea_json = json_tarea(campos)
+        if archivadas:
+            query = f'''
+            SELECT id, {tarea_json} FROM tareas WHERE id > ?
+            UNION ALL
+            SELECT id, json_set({tarea_json}, '$.fecha_archivada', fecha_archivada) FROM tareas_archivo WHERE id > ?
+            ORDER BY id LIMIT ?
+            '''
+            valores = (despues_de, despues_de, limite)
+        else:
+            query = f'''
+            SELECT id, {tarea_json} FROM tareas WHERE id > ? ORDER BY id LIMIT ?
+            '''
+            valores = (despues_de, limite)
+        with self.pool.lectura() as conn:
+            return conn.execute(query, valores).fetchall()
+
+
+    def iterar_json(self, tamaño_bloque: int = 500, archivadas: bool = False,
+                    campos: Optional[Iterable[str]] = None) -> Iterator[List[str]]:
+        #Como iterar_tareas, pero entrega bloques de tareas ya convertidas a texto JSON
+        ultimo_id = 0
+        while True:
+            bloque = self.traer_json_pagina(ultimo_id, tamaño_bloque, archivadas, campos)
+            if not bloque:
+                return
+            yield [tarea_json for tarea_id, tarea_json in bloque]
+            ultimo_id = bloque[-1][0]
+
+
+    def iterar_filas(self, tamaño_bloque: int = 1000) -> Iterator[List[tuple]]:
+        #Como iterar_tareas, pero entrega bloques de filas tal como las devuelve SQLite (sin crear objetos Tarea).
+        #Entre bloque y bloque no queda ninguna transaccion de lectura abierta: un cursor abierto durante
+        #toda una exportacion larga no dejaria que SQLite vacie el WAL, que creceria mientras dure.
+        query = '''
+        SELECT * FROM tareas WHERE id > ? ORDER BY id LIMIT ?
+        '''
+        ultimo_id = 0
+        while True:
+            with self.pool.lectura() as conn:
+                bloque = conn.execute(query, (ultimo_id, tamaño_bloque)).fetchall()
+            if not bloque:
+                return
+            yield bloque
+            ultimo_id = bloque[-1][0]
+
+
+    def cambios_desde(self, desde: int, limite: int = 1000) -> Tuple[List[str], int, bool]:
+        #Devuelve (cambios, version, reiniciar) para un cliente que ya tiene todo hasta la version "desde".
+        #Cada cambio es un texto JSON con la version, la operacion, el ID y la tarea como esta ahora
+        #(null si se elimino). Si una tarea cambio varias veces solo aparece su ultimo cambio.
+        #"version" es desde donde hay que pedir la proxima vez. Si el registro ya no tiene los cambios
+        #posteriores a "desde" (se recortaron), "reiniciar" es True y el cliente tiene que volver a leer todo.
+        query = f'''
+        SELECT c.version, json_object('version', c.version, 'operacion', c.operacion, 'id', c.tarea_id,
+                                      'tarea', CASE WHEN t.id IS NULL THEN NULL ELSE {JSON_TAREA} END)
+        FROM cambios c LEFT JOIN tareas t ON t.id = c.tarea_id
+        WHERE c.version > ? AND c.version <= ?
+          AND c.version = (SELECT MAX(version) FROM cambios WHERE tarea_id = c.tarea_id)
+        ORDER BY c.version LIMIT ?
+        '''
+        with self.pool.lectura() as conn:
+            conn.execute("BEGIN")       #Las dos consultas tienen que ver la misma version de la base
+            try:
+                ultima = conn.execute(ULTIMA_VERSION).fetchone()[0]
+                minima = conn.execute("SELECT valor FROM sincronizacion WHERE clave = 'version_minima'").fetchone()[0]
+                if desde < minima or desde > ultima:     #desde > ultima: la version es de otra base (o de una restaurada)
+                    return [], ultima, True
+                filas = conn.execute(query, (desde, ultima, limite)).fetchall()
+            finally:
+                conn.commit()
+        if len(filas) == limite:        #Quedan mas cambios: se sigue desde el ultimo entregado
+            return [cambio for version, cambio in filas], filas[-1][0], False
+        return [cambio for version, cambio in filas], ultima, False
+
+    def compactar_cambios(self, retener: Optional[int] = None) -> int:
+        #Deja en el registro solo el ultimo cambio de cada tarea (cambios_desde igual ignora los anteriores).
+        #Con "retener" ademas cambia cuantas versiones se conservan y recorta enseguida las mas viejas.
+        #Devuelve cuantas filas del registro se borraron.
+        def operacion(conn):
+            borradas = 0
+            if retener is not None:
+                conn.execute("UPDATE sincronizacion SET valor = ? WHERE clave = 'retener'", (retener,))
+                conn.execute(f'''
+                UPDATE sincronizacion
+                SET valor = max(valor, ({ULTIMA_VERSION}) - ?)
+                WHERE clave = 'version_minima'
+                ''', (retener,))
+                borradas += conn.execute(
+                    "DELETE FROM cambios WHERE version <= (SELECT valor FROM sincronizacion WHERE clave = 'version_minima')"
+                ).rowcount
+            borradas += conn.execute('''
+            DELETE FROM cambios
+            WHERE version < (SELECT MAX(version) FROM cambios AS posterior WHERE posterior.tarea_id = cambios.tarea_id)
+            ''').rowcount
+            return borradas
+        borradas, version = self._escribir(operacion)
+        return borradas
+
+
+    def traer_ids(self) -> array:
+        #Devuelve los IDs de todas las tareas en orden, en un array compacto (8 bytes por tarea en lugar de un objeto).
+        #Se recorre el cursor sin fetchall, y SQLite lo resuelve leyendo solo la clave primaria.
+        with self.pool.lectura() as conn:
+            return array("q", (fila[0] for fila in conn.execute("SELECT id FROM tareas ORDER BY id")))
+
+
+    def traer_ids_raices(self) -> array:
+        #Como traer_ids, pero solo las tareas que no son subtarea de otra (el primer nivel del arbol)
+        query = '''
+        SELECT id FROM tareas
+        WHERE NOT EXISTS (SELECT 1 FROM tareas_jerarquia WHERE descendiente = tareas.id AND profundidad = 1)
+        ORDER BY id
+        '''
+        with self.pool.lectura() as conn:
+            return array("q", (fila[0] for fila in conn.execute(query)))
+
+
+    #Consultas sobre subtareas. Todas son una sola consulta sobre la tabla de clausura (ver la migracion 9):
+    #cuestan lo mismo sin importar en que nivel este la tarea ni cuantos niveles tenga su arbol.
+
+    def traer_subtareas(self, tarea_id: int) -> List[Tarea]:     #Solo las subtareas directas, ordenadas por ID
+        query = '''
+        SELECT t.* FROM tareas_jerarquia j JOIN tareas t ON t.id = j.descendiente
+        WHERE j.ancestro = ? AND j.profundidad = 1
+        ORDER BY j.descendiente
+        '''
+        with self.pool.lectura() as conn:
+            return [Tarea(*row) for row in conn.execute(query, (tarea_id,))]
+
+    def traer_descendientes(self, tarea_id: int, profundidad: Optional[int] = None) -> List[Tuple[int, int, Tarea]]:
+        #Todas las subtareas de la tarea, a cualquier nivel (o hasta "profundidad" niveles), como
+        #(nivel, id del padre, Tarea). Vienen por nivel y por ID, asi cada padre aparece antes que sus subtareas.
+        query = '''
+        SELECT j.profundidad, padre.ancestro, t.* FROM tareas_jerarquia j
+        JOIN tareas_jerarquia padre ON padre.descendiente = j.descendiente AND padre.profundidad = 1
+        JOIN tareas t ON t.id = j.descendiente
+        WHERE j.ancestro = ? AND j.profundidad BETWEEN 1 AND ?
+        ORDER BY j.profundidad, j.descendiente
+        '''
+        maximo = profundidad if profundidad is not None else 2 ** 63 - 1     #Sin limite: todos los niveles
+        with self.pool.lectura() as conn:
+            return [(row[0], row[1], Tarea(*row[2:])) for row in conn.execute(query, (tarea_id, maximo))]
+
+    def traer_ancestros(self, tarea_id: int) -> List[Tarea]:     #Desde la tarea de primer nivel hasta el padre
+        query = '''
+        SELECT t.* FROM tareas_jerarquia j JOIN tareas t ON t.id = j.ancestro
+        WHERE j.descendiente = ? AND j.profundidad > 0
+        ORDER BY j.profundidad DESC
+        '''
+        with self.pool.lectura() as conn:
+            return [Tarea(*row) for row in conn.execute(query, (tarea_id,))]
+
+    def progreso(self, tarea_id: int) -> Optional[dict]:
+        #Avance del arbol de la tarea: cuantas subtareas tiene (a cualquier nivel), cuantas estan completadas y el
+        #porcentaje. Sin subtareas el porcentaje es 100 o 0 segun este completada la tarea. None si no existe.
+        query = '''
+        SELECT COUNT(*), SUM(j.profundidad > 0), SUM(j.profundidad > 0 AND t.estado = 'Completada'),
+               MAX(j.profundidad = 0 AND t.estado = 'Completada')
+        FROM tareas_jerarquia j JOIN tareas t ON t.id = j.descendiente
+        WHERE j.ancestro = ?
+        '''
+        with self.pool.lectura() as conn:
+            filas, subtareas, completadas, completa = conn.execute(query, (tarea_id,)).fetchone()
+        if filas == 0:
+            return None
+        porcentaje = 100 * completadas / subtareas if subtareas else 100.0 * completa
+        return {"subtareas": subtareas, "completadas": completadas, "porcentaje": round(porcentaje, 1)}
+
+    def progreso_lote(self, ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        #(subtareas, completadas) de cada tarea de "ids" que tiene subtareas, en una sola consulta
+        query = '''
+        SELECT j.ancestro, COUNT(*), SUM(t.estado = 'Completada')
+        FROM tareas_jerarquia j JOIN tareas t ON t.id = j.descendiente
+        WHERE j.ancestro IN (SELECT value FROM json_each(?)) AND j.profundidad > 0
+        GROUP BY j.ancestro
+        '''
+        with self.pool.lectura() as conn:
+            return {fila[0]: (fila[1], fila[2]) for fila in conn.execute(query, (json.dumps([int(i) for i in ids]),))}
+
+
+    def obtener_tareas(self, ids: List[int]) -> List[Tarea]:
+        #Trae varias tareas por su ID en una sola consulta (las que no existen simplemente no aparecen).
+        tareas = []
+        with self.pool.lectura() as conn:
+            for i in range(0, len(ids), 500):       #De a 500 para no pasar el limite de parametros de SQLite
+                bloque = ids[i:i + 500]
+                query = f"SELECT * FROM tareas WHERE id IN ({', '.join('?' * len(bloque))})"
+                tareas.extend(Tarea(*row) for row in conn.execute(query, bloque))
+        return tareas
+
+
+    def iterar_tareas(self, tamaño_bloque: int = 500) -> Iterator[Tarea]:
+        #Recorre todas las tareas de a bloques de "tamaño_bloque", pidiendo cada bloque con traer_tareas_pagina.
+        #Nunca hay mas de un bloque en memoria, asi que el consumo es el mismo con 10 o con un millon de tareas.
+        #Entre bloque y bloque la conexion vuelve al pool, asi un listado largo no acapara un lector.
+        ultimo_id = 0
+        while True:
+            bloque = self.traer_tareas_pagina(ultimo_id, tamaño_bloque)
+            if not bloque:
+                return
+            yield from bloque
+            ultimo_id = bloque[-1].id      #La siguiente pagina empieza despues de la ultima tarea entregada
+
+
+
+class CacheCredenciales:
+    #Recuerda por un tiempo limitado ("ttl_segundos") las credenciales que ya se verificaron bien, para no repetir
+    #el hash lento de PBKDF2 en cada peticion HTTP de la misma sesion. No se guarda la contraseña: la clave es
+    #un HMAC de usuario y contraseña con un secreto aleatorio que solo existe en la memoria de este proceso.
+    def __init__(self, ttl_segundos: float = 300, capacidad: int = 1024):
+        self.ttl_segundos = ttl_segundos
+        self.capacidad = capacidad
+        self.secreto = os.urandom(32)
+        self.entradas = OrderedDict()      #clave -> (momento en que vence, Usuario)
+        self.lock = threading.Lock()
+
+    def _clave(self, nombre: str, contraseña: str) -> bytes:
+        return hmac.digest(self.secreto, nombre.encode("utf-8") + b"\0" + contraseña.encode("utf-8"), "sha256")
+
+    def obtener(self, nombre: str, contraseña: str):
+        clave = self._clave(nombre, contraseña)
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada is None:
+                return None
+            vence, usuario = entrada
+            if vence < time.monotonic():
+                del self.entradas[clave]      #Ya vencio: hay que volver a verificar la contraseña
+                return None
+            return usuario
+
+    def guardar(self, nombre: str, contraseña: str, usuario):
+        if self.capacidad <= 0:
+            return
+        with self.lock:
+            self.entradas[self._clave(nombre, contraseña)] = (time.monotonic() + self.ttl_segundos, usuario)
+            if len(self.entradas) > self.capacidad:
+                self.entradas.popitem(last=False)   #Se descarta la mas vieja
+
+    def invalidar_usuario(self, nombre: str):     #Por ejemplo al cambiar la contraseña
+        with self.lock:
+            for clave in [clave for clave, (vence, usuario) in self.entradas.items() if usuario.nombre == nombre]:
+                del self.entradas[clave]
+
+
+class AdminUsuario:
+    #Guarda los usuarios en la tabla "usuarios" (creada por las MIGRACIONES) y verifica sus contraseñas.
+    #Lo usan tanto la ventana de inicio de sesion como la autenticacion de la API.
+    def __init__(self, pool: PoolConexiones, ttl_cache: float = 300):
+        self.pool = pool
+        self.cache = CacheCredenciales(ttl_cache)
+        self.ficticio: Optional[Usuario] = None
+        self._crear_admin_inicial()
+
+    def _crear_admin_inicial(self):
+        #Antes el unico usuario estaba escrito en el codigo; se guarda en la tabla para que se pueda seguir ingresando igual.
+        #No es una migracion porque las migraciones corren en cada particion (ver particiones.py) y los usuarios solo
+        #estan en la base de este pool: asi el hash, que es lento a proposito, se calcula una sola vez.
+        with self.pool.lectura() as conn:
+            if conn.execute("SELECT 1 FROM usuarios LIMIT 1").fetchone() is not None:
+                return
+        admin = Usuario(None, "Admin", "Tesla", "07/03/1989", "44999380", "12345")   #El hash se calcula antes de escribir
+        with self.pool.escritura() as conn:
+            #Otro proceso pudo haberlo creado mientras tanto
+            conn.execute('''
+            INSERT INTO usuarios (nombre, apellido, fecha_nacimiento, dni, contraseña)
+            SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM usuarios)
+            ''', (admin.nombre, admin.apellido, admin.fecha_nacimiento, admin.dni, admin.contraseña))
+
+    @property
+    def usuario_ficticio(self) -> Usuario:
+        #Hash de relleno para que verificar un usuario que no existe tarde lo mismo que uno que existe.
+        #Se crea la primera vez que se necesita: encriptar cuesta lo mismo que verificar (ver ITERACIONES_PBKDF2)
+        #y hacerlo en el constructor retrasaba el arranque de la ventana y de la API.
+        if self.ficticio is None:
+            self.ficticio = Usuario(None, "", "", "", "", os.urandom(16).hex())
+        return self.ficticio
+
+    def agregar_usuario(self, usuario: Usuario) -> int:
+        query = '''
+        INSERT INTO usuarios (nombre, apellido, fecha_nacimiento, dni, contraseña) VALUES (?, ?, ?, ?, ?)
+        '''
+        with self.pool.escritura() as conn:
+            cursor = conn.execute(query, (usuario.nombre, usuario.apellido, usuario.fecha_nacimiento, usuario.dni, usuario.contraseña))
+        return cursor.lastrowid
+
+    def obtener_usuario(self, nombre: str) -> Optional[Usuario]:
+        query = '''
+        SELECT id, nombre, apellido, fecha_nacimiento, dni, contraseña, ultimo_acceso FROM usuarios WHERE nombre = ?
+        '''
+        with self.pool.lectura() as conn:
+            fila = conn.execute(query, (nombre,)).fetchone()
+        if fila is None:
+            return None
+        usuario = Usuario(*fila[:6], encriptada=True)
+        usuario.ultimo_acceso = fila[6]
+        return usuario
+
+    def cambiar_contraseña(self, nombre: str, contraseña: str) -> bool:
+        nueva = self.usuario_ficticio.encriptar_contraseña(contraseña)
+        with self.pool.escritura() as conn:
+            cursor = conn.execute("UPDATE usuarios SET contraseña = ? WHERE nombre = ?", (nueva, nombre))
+        self.cache.invalidar_usuario(nombre)      #La contraseña anterior deja de valer de inmediato
+        return cursor.rowcount > 0
+
+    def verificar(self, nombre: str, contraseña: str) -> Optional[Usuario]:
+        #Devuelve el Usuario si el nombre y la contraseña son correctos, o None si no lo son
+        usuario = self.cache.obtener(nombre, contraseña)
+        if usuario is not None:
+            return usuario
+
+        usuario = self.obtener_usuario(nombre)
+        if usuario is None:
+            self.usuario_ficticio.verificar_contraseña(contraseña)
+            return None
+        if not usuario.verificar_contraseña(contraseña):
+            return None
+        self.cache.guardar(nombre, contraseña, usuario)
+        return usuario
+
+    def registrar_acceso(self, usuario: Usuario):
+        usuario.registrar_acceso()
+        with self.pool.escritura() as conn:
+            conn.execute("UPDATE usuarios SET ultimo_acceso = ? WHERE id = ?",
+                         (usuario.ultimo_acceso.strftime("%Y-%m-%d %H:%M:%S"), usuario.id))
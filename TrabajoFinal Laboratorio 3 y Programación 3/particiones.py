@@ -0,0 +1,447 @@
+#Almacenamiento particionado: reparte las tareas entre N archivos SQLite, cada uno con su propio AdminTarea
+#(su pool, su cache y su unico escritor). SQLite admite un solo escritor por base, asi que con N archivos
+#pueden confirmarse hasta N escrituras a la vez. AdminTareaParticionada tiene los mismos metodos que
+#AdminTarea, asi la API y la ventana la usan sin cambios (ver TAREAS_PARTICIONES en API.py).
+#
+#- Los IDs los reparte AsignadorIds, unicos entre todas las particiones, y cada tarea vive en la particion
+#  "id % N". Por eso las operaciones sobre una tarea (obtener, actualizar, eliminar) van directo a una sola.
+#- Los listados se piden a todas las particiones en paralelo y los resultados, que cada una ya devuelve
+#  ordenados, se mezclan con heapq.merge (sin volver a ordenar todo).
+#- No hay transacciones entre particiones: un lote que toca varias se confirma por separado en cada una.
+#- Cada arbol de subtareas vive entero en una particion (la tabla de clausura no cruza archivos): una
+#  subtarea recibe un ID de la particion de su padre y solo se puede mover debajo de una tarea de la misma.
+#- La cantidad de particiones queda fija al crear los archivos (se guarda en el archivo de IDs).
+#
+#Archivos para db_nombre="tareas.db" y 4 particiones: tareas.0.db ... tareas.3.db y tareas.ids.db.
+#Los usuarios (AdminUsuario) quedan en la particion 0, que es la que se expone como "pool".
+
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from nucleo import AdminTarea, Tarea, ESTADOS, ORDENES, ULTIMA_VERSION, json_tarea
+
+por_id = attrgetter("id")
+
+
+class AsignadorIds:
+    #Reparte IDs unicos para todas las particiones. El ultimo ID usado se guarda en un archivo SQLite propio,
+    #asi varios procesos con las mismas particiones nunca repiten un ID. Para no escribir ese archivo en cada
+    #alta se reservan de a "bloque" IDs por vez (los que queden sin usar al cerrar se pierden, como pasa con
+    #AUTOINCREMENT cuando se deshace una transaccion).
+    def __init__(self, db_nombre: str, particiones: int, bloque: int = 1000,
+                 maximo_existente: Callable[[], int] = lambda: 0):
+        self.conn = sqlite3.connect(db_nombre, timeout=5, check_same_thread=False, isolation_level=None)
+        self.bloque = bloque
+        self.lock = threading.Lock()
+        self.siguiente = self.limite = 0      #IDs reservados en este proceso: de "siguiente" a "limite" inclusive
+        self.conn.execute("CREATE TABLE IF NOT EXISTS secuencia (nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            guardadas = self.conn.execute("SELECT valor FROM secuencia WHERE nombre = 'particiones'").fetchone()
+            if guardadas is None:
+                #Archivo nuevo: se sigue despues del mayor ID que ya haya en las particiones
+                self.conn.execute("INSERT INTO secuencia VALUES ('particiones', ?), ('tareas', ?)",
+                                  (particiones, maximo_existente()))
+            elif guardadas[0] != particiones:
+                raise ValueError(f"Las tareas estan repartidas en {guardadas[0]} particiones, no en {particiones}")
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _reservar(self, cantidad: int) -> int:     #Reserva "cantidad" IDs seguidos en el archivo; devuelve el primero
+        #fetchall y no fetchone: la sentencia tiene que terminar para que se confirme (el archivo esta en autocommit)
+        ultimo = self.conn.execute("UPDATE secuencia SET valor = valor + ? WHERE nombre = 'tareas' RETURNING valor",
+                                   (cantidad,)).fetchall()[0][0]
+        return ultimo - cantidad + 1
+
+    def nuevo_id(self) -> int:
+        with self.lock:
+            if self.siguiente == 0 or self.siguiente > self.limite:
+                self.siguiente = self._reservar(self.bloque)
+                self.limite = self.siguiente + self.bloque - 1
+            tarea_id = self.siguiente
+            self.siguiente += 1
+            return tarea_id
+
+    def rango(self, cantidad: int) -> Tuple[int, int]:
+        #IDs seguidos para un lote; no usa el bloque reservado, asi el rango del lote no tiene huecos
+        with self.lock:
+            primero = self._reservar(cantidad)
+        return primero, primero + cantidad - 1
+
+    def cerrar(self):
+        self.conn.close()
+
+
+class CacheParticionada:
+    #Junta las estadisticas de las caches de todas las particiones (para GET /cache y GET /metrics)
+    def __init__(self, caches):
+        self.caches = caches
+
+    def estadisticas(self) -> dict:
+        total = {}
+        for cache in self.caches:
+            for clave, valor in cache.estadisticas().items():
+                total[clave] = total.get(clave, 0) + valor
+        return total
+
+
+def nombre_particion(db_nombre: str, sufijo) -> str:
+    if db_nombre == ":memory:":
+        return db_nombre
+    raiz, extension = os.path.splitext(db_nombre)
+    return f"{raiz}.{sufijo}{extension or '.db'}"
+
+
+class AdminTareaParticionada:
+    def __init__(self, db_nombre: str, particiones: int = 4, bloque_ids: int = 1000, **opciones):
+        #"opciones" son las de AdminTarea (lectores, tamaño_cache, escritura_agrupada, ...) y valen para cada particion
+        if particiones < 1:
+            raise ValueError("Tiene que haber al menos una particion")
+        self.particiones = [AdminTarea(nombre_particion(db_nombre, numero), **opciones) for numero in range(particiones)]
+        #Hilos para consultar las particiones a la vez (sqlite3 suelta el GIL mientras consulta). Alcanzan para
+        #que varios listados simultaneos (por ejemplo de la API) no tengan que esperarse entre si.
+        self.hilos = ThreadPoolExecutor(max_workers=particiones * (os.cpu_count() or 4), thread_name_prefix="particion")
+        self.ids = AsignadorIds(nombre_particion(db_nombre, "ids"), particiones, bloque_ids, self._maximo_id)
+        self.pool = self.particiones[0].pool      #Para AdminUsuario: los usuarios quedan en la primera particion
+        self.cache = CacheParticionada([particion.cache for particion in self.particiones])
+
+        #Ultima version de cada particion que se aviso a los oyentes (ver _reenviar)
+        self.oyentes = []
+        self.lock_avisos = threading.Lock()
+        self.versiones = [self._ultima_version(particion) for particion in self.particiones]
+        for numero, particion in enumerate(self.particiones):
+            particion.suscribir(lambda evento, numero=numero: self._reenviar(numero, evento))
+
+    def cerrar(self):
+        self.hilos.shutdown()
+        for particion in self.particiones:
+            particion.cerrar()
+        self.ids.cerrar()
+
+    def particion(self, tarea_id: int) -> AdminTarea:      #La particion donde vive (o viviria) esa tarea
+        return self.particiones[tarea_id % len(self.particiones)]
+
+    def _en_todas(self, funcion: Callable[[AdminTarea], object]) -> list:
+        #Scatter-gather: corre funcion(particion) en todas las particiones a la vez y devuelve los resultados en orden
+        return list(self.hilos.map(funcion, self.particiones))
+
+    def _por_particion(self, ids: Iterable[int]) -> Dict[int, List[int]]:
+        grupos: Dict[int, List[int]] = {}
+        for tarea_id in ids:
+            grupos.setdefault(int(tarea_id) % len(self.particiones), []).append(int(tarea_id))
+        return grupos
+
+    def _en_grupos(self, ids: Iterable[int], funcion: Callable[[AdminTarea, List[int]], object]) -> list:
+        #Corre funcion(particion, ids de esa particion) solo en las particiones que tienen alguno de los IDs
+        grupos = self._por_particion(ids)
+        futuros = [self.hilos.submit(funcion, self.particiones[numero], grupo) for numero, grupo in grupos.items()]
+        return [futuro.result() for futuro in futuros]
+
+    def _maximo_id(self) -> int:
+        query = "SELECT MAX((SELECT COALESCE(MAX(id), 0) FROM tareas), (SELECT COALESCE(MAX(id), 0) FROM tareas_archivo))"
+        def maximo(particion: AdminTarea) -> int:
+            with particion.pool.lectura() as conn:
+                return conn.execute(query).fetchone()[0]
+        return max(self._en_todas(maximo))
+
+    # --- Eventos y registro de cambios ---
+
+    #Cada particion tiene su propio registro de cambios con sus propias versiones. Hacia afuera se usa una
+    #version compuesta: un texto con la version de cada particion separadas por comas, por ejemplo "12,7,30,4".
+    #Es un texto y no un numero a proposito: un entero con todas las versiones juntas pasaria facil de 2^53,
+    #y los clientes que leen JSON con float64 (JavaScript, por ejemplo) lo redondearian sin avisar.
+    #El cliente lo trata como un valor opaco: lo recibe en GET /cambios o en los eventos y lo devuelve en "desde".
+
+    def _componer(self, versiones: List[int]) -> str:
+        return ",".join(str(version) for version in versiones)
+
+    def _descomponer(self, version) -> Optional[List[int]]:     #None si no es una version de estas particiones
+        version = str(version)
+        if version == "0":      #Un cliente nuevo: todavia no vio nada de ninguna particion
+            return [0] * len(self.particiones)
+        partes = version.split(",")
+        if len(partes) != len(self.particiones) or not all(parte.isdigit() for parte in partes):
+            return None
+        return [int(parte) for parte in partes]
+
+    @staticmethod
+    def _ultima_version(particion: AdminTarea) -> int:
+        with particion.pool.lectura() as conn:
+            return conn.execute(ULTIMA_VERSION).fetchone()[0]
+
+    def suscribir(self, oyente: Callable[[dict], None]):     #Igual que AdminTarea.suscribir
+        self.oyentes.append(oyente)
+
+    def desuscribir(self, oyente: Callable[[dict], None]):
+        self.oyentes.remove(oyente)
+
+    def _reenviar(self, numero: int, evento: dict):
+        #Los eventos de cada particion salen con la version compuesta. El lock hace que los oyentes reciban
+        #las versiones en el mismo orden en que se calcularon, aunque las particiones escriban desde hilos distintos.
+        with self.lock_avisos:
+            self.versiones[numero] = max(self.versiones[numero], evento["version"])
+            evento = dict(evento, version=self._componer(self.versiones))
+            for oyente in self.oyentes:
+                oyente(evento)
+
+    def cambios_desde(self, desde: str, limite: int = 1000) -> Tuple[List[str], str, bool]:
+        #Igual que AdminTarea.cambios_desde, pero con versiones compuestas. El campo "version" de cada cambio es
+        #el de su particion; para seguir hay que usar la version compuesta que se devuelve.
+        versiones = self._descomponer(desde)
+        resultados = []
+        if versiones is not None:
+            resultados = list(self.hilos.map(lambda particion, version: particion.cambios_desde(version, limite),
+                                              self.particiones, versiones))
+        if versiones is None or any(reiniciar for cambios, version, reiniciar in resultados):
+            #La version es de otra base o alguna particion ya no tiene los cambios pedidos: hay que volver a leer todo
+            return [], self._componer(self._en_todas(self._ultima_version)), True
+
+        #Se toman cambios de las particiones por turnos hasta juntar "limite" (asi, igual que con una sola base,
+        #si se entregan menos de "limite" es que no quedan mas). Cada particion sigue desde el ultimo que entrego.
+        cuotas = [0] * len(resultados)
+        quedan = limite
+        while quedan and any(cuota < len(cambios) for cuota, (cambios, version, reiniciar) in zip(cuotas, resultados)):
+            for numero, (cambios, version, reiniciar) in enumerate(resultados):
+                if quedan and cuotas[numero] < len(cambios):
+                    cuotas[numero] += 1
+                    quedan -= 1
+        entregados, siguientes = [], []
+        for cuota, desde_particion, (cambios, version, reiniciar) in zip(cuotas, versiones, resultados):
+            entregados.extend(cambios[:cuota])
+            if cuota < len(cambios):
+                version = json.loads(cambios[cuota - 1])["version"] if cuota else desde_particion
+            siguientes.append(version)
+        return entregados, self._componer(siguientes), False
+
+    def compactar_cambios(self, retener: Optional[int] = None) -> int:
+        return sum(self._en_todas(lambda particion: particion.compactar_cambios(retener)))
+
+    # --- Escrituras ---
+
+    def _nuevo_id_en(self, numero: int) -> int:     #Un ID nuevo de esa particion (los de las otras se saltean)
+        while True:
+            tarea_id = self.ids.nuevo_id()
+            if tarea_id % len(self.particiones) == numero:
+                return tarea_id
+
+    def agregar_tarea(self, tarea: Tarea, padre_id: Optional[int] = None) -> int:
+        if padre_id is None:
+            tarea_id = self.ids.nuevo_id()
+        else:
+            tarea_id = self._nuevo_id_en(padre_id % len(self.particiones))
+        return self.particion(tarea_id).agregar_tarea(
+            Tarea(tarea_id, tarea.titulo, tarea.descripcion, tarea.estado, tarea.fecha_creada, tarea.fecha_actualizada,
+                  tarea.fecha_vencimiento), padre_id)
+
+    def agregar_tareas_lote(self, tareas: Iterable[Tarea], tamaño_bloque: int = 1000) -> Optional[Tuple[int, int]]:
+        #Se lee el lote entero antes de escribir, para reservar un rango de IDs seguidos y devolverlo igual que
+        #AdminTarea. Si el lote tiene un error (por ejemplo JSON invalido) no se escribe nada; si falla la escritura
+        #en una particion, lo que ya se confirmo en las otras queda guardado.
+        tareas = list(tareas)
+        if not tareas:
+            return None
+        primer_id, ultimo_id = self.ids.rango(len(tareas))
+        grupos: Dict[int, List[Tarea]] = {}
+        for tarea_id, tarea in zip(range(primer_id, ultimo_id + 1), tareas):
+            grupos.setdefault(tarea_id % len(self.particiones), []).append(
+                Tarea(tarea_id, tarea.titulo, tarea.descripcion, tarea.estado, tarea.fecha_creada, tarea.fecha_actualizada,
+                      tarea.fecha_vencimiento))
+        futuros = [self.hilos.submit(self.particiones[numero].agregar_tareas_lote, grupo, tamaño_bloque)
+                   for numero, grupo in grupos.items()]
+        for futuro in futuros:
+            futuro.result()
+        return primer_id, ultimo_id
+
+    def actualizar_estado_tarea(self, tarea_id: int, estado: str):
+        self.particion(tarea_id).actualizar_estado_tarea(tarea_id, estado)
+
+    def actualizar_vencimiento(self, tarea_id: int, fecha_vencimiento: Optional[str]) -> bool:
+        return self.particion(tarea_id).actualizar_vencimiento(tarea_id, fecha_vencimiento)
+
+    def mover_tarea(self, tarea_id: int, padre_id: Optional[int]) -> bool:
+        if padre_id is not None and padre_id % len(self.particiones) != tarea_id % len(self.particiones):
+            if self.particion(padre_id).obtener_tarea(padre_id) is None:
+                raise ValueError(f"No existe la tarea {padre_id}")
+            raise ValueError(f"La tarea {padre_id} esta en otra particion: solo se puede mover debajo de una tarea "
+                             f"de la misma")
+        return self.particion(tarea_id).mover_tarea(tarea_id, padre_id)
+
+    def mover_tareas(self, ids: Iterable[int], padre_id: Optional[int]) -> int:
+        #Con un padre, todas las tareas tienen que estar en su particion (si no, ValueError sin mover ninguna)
+        #y se mueven en una sola transaccion. Sin padre no puede fallar ninguna, asi que cada particion
+        #mueve las suyas por su lado.
+        if padre_id is None:
+            return sum(self._en_grupos(ids, lambda particion, grupo: particion.mover_tareas(grupo, None)))
+        ids = [int(tarea_id) for tarea_id in ids]
+        otras = [tarea_id for tarea_id in ids if tarea_id % len(self.particiones) != padre_id % len(self.particiones)]
+        if otras:
+            if self.particion(padre_id).obtener_tarea(padre_id) is None:
+                raise ValueError(f"No existe la tarea {padre_id}")
+            raise ValueError(f"La tarea {padre_id} esta en otra particion que la tarea {otras[0]}: solo se puede "
+                             f"mover debajo de una tarea de la misma")
+        return self.particion(padre_id).mover_tareas(ids, padre_id)
+
+    def eliminar_tarea(self, tarea_id: int) -> bool:
+        return self.particion(tarea_id).eliminar_tarea(tarea_id)
+
+    def actualizar_estado_lote(self, ids: Iterable[int], estado: str) -> int:
+        return sum(self._en_grupos(ids, lambda particion, grupo: particion.actualizar_estado_lote(grupo, estado)))
+
+    def eliminar_lote(self, ids: Iterable[int]) -> int:
+        return sum(self._en_grupos(ids, lambda particion, grupo: particion.eliminar_lote(grupo)))
+
+    def eliminar_todas_tareas(self) -> bool:
+        #A diferencia de AdminTarea, los IDs no vuelven a empezar en 1: otro proceso puede tener reservado
+        #un bloque de IDs (ver AsignadorIds) y se repetirian.
+        return any(self._en_todas(lambda particion: particion.eliminar_todas_tareas()))
+
+    def archivar_completadas(self, dias: float = 30, tamaño_bloque: int = 500, pausa: float = 0.01) -> int:
+        return sum(self._en_todas(lambda particion: particion.archivar_completadas(dias, tamaño_bloque, pausa)))
+
+    def liberar_espacio(self, paginas_por_paso: int = 1000) -> int:
+        return sum(self._en_todas(lambda particion: particion.liberar_espacio(paginas_por_paso)))
+
+    # --- Lecturas de una tarea ---
+
+    def obtener_tarea(self, tarea_id: int) -> Tarea:
+        return self.particion(tarea_id).obtener_tarea(tarea_id)
+
+    def obtener_tarea_y_etag(self, tarea_id: int) -> Tuple[Optional[Tarea], Optional[str]]:
+        return self.particion(tarea_id).obtener_tarea_y_etag(tarea_id)
+
+    def obtener_tarea_json(self, tarea_id: int) -> Tuple[Optional[bytes], Optional[str]]:
+        return self.particion(tarea_id).obtener_tarea_json(tarea_id)
+
+    def obtener_archivada_json(self, tarea_id: int) -> Optional[bytes]:
+        return self.particion(tarea_id).obtener_archivada_json(tarea_id)
+
+    def obtener_tareas(self, ids: List[int]) -> List[Tarea]:
+        listas = self._en_grupos(ids, lambda particion, grupo: sorted(particion.obtener_tareas(grupo), key=por_id))
+        return list(heapq.merge(*listas, key=por_id))
+
+    # --- Listados (scatter-gather y mezcla de k listas ordenadas) ---
+
+    def traer_todas_tareas(self) -> List[Tarea]:
+        return list(self.iterar_tareas())
+
+    def traer_tareas_pagina(self, despues_de: int = 0, limite: int = 100) -> List[Tarea]:
+        #Cada particion devuelve sus primeras "limite" tareas despues de "despues_de": la pagina global
+        #son las primeras "limite" de la mezcla
+        listas = self._en_todas(lambda particion: particion.traer_tareas_pagina(despues_de, limite))
+        return list(itertools.islice(heapq.merge(*listas, key=por_id), limite))
+
+    def traer_tareas_por_estado(self, estado: str, orden: str = "fecha_actualizada", descendente: bool = False,
+                                limite: int = 100, despues_de: Optional[Tuple] = None) -> List[Tarea]:
+        if orden not in ORDENES:
+            raise ValueError(f"No se puede ordenar por {orden}")
+        listas = self._en_todas(lambda particion: particion.traer_tareas_por_estado(estado, orden, descendente,
+                                                                                    limite, despues_de))
+        #Las fechas pueden ser NULL (tareas importadas o de bases viejas): van antes que cualquier fecha, como en SQLite
+        def clave(tarea: Tarea) -> tuple:
+            valor = getattr(tarea, orden)
+            return valor is not None, valor or "", tarea.id
+        return list(itertools.islice(heapq.merge(*listas, key=clave, reverse=descendente), limite))
+
+    def traer_vencimientos(self, hasta: Optional[str] = None, limite: int = 100,
+                           despues_de: Optional[Tuple[str, int]] = None) -> List[Tarea]:
+        listas = self._en_todas(lambda particion: particion.traer_vencimientos(hasta, limite, despues_de))
+        clave = lambda tarea: (tarea.fecha_vencimiento, tarea.id)
+        return list(itertools.islice(heapq.merge(*listas, key=clave), limite))
+
+    def traer_json_pagina(self, despues_de: int = 0, limite: int = 100, archivadas: bool = False,
+                          campos: Optional[Iterable[str]] = None) -> List[Tuple[int, str]]:
+        json_tarea(campos)      #Los campos invalidos se rechazan antes de consultar las particiones
+        listas = self._en_todas(lambda particion: particion.traer_json_pagina(despues_de, limite, archivadas, campos))
+        return list(itertools.islice(heapq.merge(*listas), limite))      #Las filas son (id, json): se ordenan por id
+
+    def buscar(self, texto: str, limite: int = 50) -> List[Tarea]:
+        #Cada particion calcula bm25 con sus propias estadisticas de palabras; con muchas tareas por particion
+        #los puntajes son comparables y se mezclan de menor (mas relevante) a mayor
+        listas = self._en_todas(lambda particion: particion.buscar_con_puntaje(texto, limite))
+        return [tarea for puntaje, tarea in itertools.islice(heapq.merge(*listas, key=itemgetter(0)), limite)]
+
+    def traer_ids(self) -> array:
+        return array("q", heapq.merge(*self._en_todas(lambda particion: particion.traer_ids())))
+
+    def traer_ids_raices(self) -> array:
+        return array("q", heapq.merge(*self._en_todas(lambda particion: particion.traer_ids_raices())))
+
+    # --- Subtareas (cada arbol esta entero en la particion de su tarea) ---
+
+    def traer_subtareas(self, tarea_id: int) -> List[Tarea]:
+        return self.particion(tarea_id).traer_subtareas(tarea_id)
+
+    def traer_descendientes(self, tarea_id: int, profundidad: Optional[int] = None) -> List[Tuple[int, int, Tarea]]:
+        return self.particion(tarea_id).traer_descendientes(tarea_id, profundidad)
+
+    def traer_ancestros(self, tarea_id: int) -> List[Tarea]:
+        return self.particion(tarea_id).traer_ancestros(tarea_id)
+
+    def progreso(self, tarea_id: int) -> Optional[dict]:
+        return self.particion(tarea_id).progreso(tarea_id)
+
+    def progreso_lote(self, ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        total = {}
+        for progreso in self._en_grupos(ids, lambda particion, grupo: particion.progreso_lote(grupo)):
+            total.update(progreso)
+        return total
+
+    def iterar_tareas(self, tamaño_bloque: int = 500) -> Iterator[Tarea]:
+        ultimo_id = 0
+        while True:
+            bloque = self.traer_tareas_pagina(ultimo_id, tamaño_bloque)
+            if not bloque:
+                return
+            yield from bloque
+            ultimo_id = bloque[-1].id
+
+    def iterar_json(self, tamaño_bloque: int = 500, archivadas: bool = False,
+                    campos: Optional[Iterable[str]] = None) -> Iterator[List[str]]:
+        ultimo_id = 0
+        while True:
+            bloque = self.traer_json_pagina(ultimo_id, tamaño_bloque, archivadas, campos)
+            if not bloque:
+                return
+            yield [tarea_json for tarea_id, tarea_json in bloque]
+            ultimo_id = bloque[-1][0]
+
+    def iterar_filas(self, tamaño_bloque: int = 1000) -> Iterator[List[tuple]]:
+        #Se pide a cada particion su propio iterador y se van mezclando; cada una lee de a "tamaño_bloque"
+        iteradores = [particion.iterar_filas(tamaño_bloque) for particion in self.particiones]
+        filas = heapq.merge(*(itertools.chain.from_iterable(iterador) for iterador in iteradores))
+        while True:
+            bloque = list(itertools.islice(filas, tamaño_bloque))
+            if not bloque:
+                return
+            yield bloque
+
+    # --- Resumenes ---
+
+    def contar_por_estado(self) -> dict:
+        total = {}
+        for conteo in self._en_todas(lambda particion: particion.contar_por_estado()):
+            for estado, cantidad in conteo.items():
+                total[estado] = total.get(estado, 0) + cantidad
+        return total
+
+    def estadisticas(self, dias: int = 30) -> dict:
+        por_estado = {estado: 0 for estado in ESTADOS}
+        por_dia: Dict[str, int] = {}
+        for resumen in self._en_todas(lambda particion: particion.estadisticas(dias)):
+            for estado, cantidad in resumen["por_estado"].items():
+                por_estado[estado] = por_estado.get(estado, 0) + cantidad
+            for dia, creadas in resumen["creadas_por_dia"]:
+                por_dia[dia] = por_dia.get(dia, 0) + creadas
+        #Cada particion trae sus ultimos "dias" dias con altas; los ultimos "dias" del total estan entre esos
+        creadas_por_dia = sorted(por_dia.items(), reverse=True)[:dias]
+        return {"por_estado": por_estado, "total": sum(por_estado.values()), "creadas_por_dia": creadas_por_dia}
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+#Los modulos estan en la carpeta de arriba, que no es un paquete (su nombre tiene espacios)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from nucleo import AdminTarea, Tarea
+
+
+@pytest.fixture
+def nueva_tarea():
+    #Arma una Tarea sin ID, lista para agregar_tarea
+    def armar(titulo: str, estado: str = "Pendiente") -> Tarea:
+        return Tarea(None, titulo, "", estado, "2024-01-01 00:00:00", "2024-01-01 00:00:00")
+    return armar
+
+
+@pytest.fixture
+def admin(tmp_path):
+    #Un AdminTarea sobre una base nueva (los modulos que necesitan otras opciones definen el suyo)
+    admin = AdminTarea(str(tmp_path / "tareas.db"))
+    yield admin
+    admin.cerrar()
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    #API.py abre "tareas.db" en la carpeta actual al importarse: se importa una sola vez, desde una carpeta vacia
+    carpeta = tmp_path_factory.mktemp("api")
+    anterior = os.getcwd()
+    os.chdir(carpeta)
+    try:
+        import API
+    finally:
+        os.chdir(anterior)
+    yield API
+    API.planificador.cerrar()
+    API.admin_tarea.cerrar()
+
+
+@pytest.fixture
+def cliente(api):
+    #Cliente de la API con el usuario que se crea junto con la base de datos, sobre una base sin tareas
+    with api.admin_tarea.pool.escritura() as conn:
+        conn.execute("DELETE FROM tareas_archivo")
+    api.admin_tarea.eliminar_todas_tareas()
+    cliente = TestClient(api.app)
+    cliente.auth = ("Admin", "12345")
+    return cliente
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def tareas(admin, nueva_tarea):
+    #Cinco tareas: las completadas hace mucho (1, 3 y 5) se tienen que archivar; la 2 es vieja pero no esta
+    #completada y la 4 se completo hace poco
+    ids = [admin.agregar_tarea(nueva_tarea(f"tarea {numero}")) for numero in range(1, 6)]
+    with admin.pool.escritura() as conn:
+        conn.execute("UPDATE tareas SET estado = 'Completada', fecha_actualizada = '2020-01-01 00:00:00' "
+                     "WHERE id IN (?, ?, ?)", (ids[0], ids[2], ids[4]))
+        conn.execute("UPDATE tareas SET fecha_actualizada = '2020-01-01 00:00:00' WHERE id = ?", (ids[1],))
+        conn.execute("UPDATE tareas SET estado = 'Completada', fecha_actualizada = datetime('now') WHERE id = ?",
+                     (ids[3],))
+    return ids
+
+
+def test_archivar_mueve_las_completadas_viejas(admin, tareas):
+    eventos = []
+    admin.suscribir(eventos.append)
+    assert admin.obtener_tarea(tareas[0]) is not None       #Queda en la cache
+    assert admin.archivar_completadas(30, tamaño_bloque=2, pausa=0) == 3
+    assert [evento["ids"] for evento in eventos] == [[tareas[0], tareas[2]], [tareas[4]]]
+
+    assert [tarea.id for tarea in admin.traer_todas_tareas()] == [tareas[1], tareas[3]]
+    assert admin.obtener_tarea(tareas[0]) is None
+    assert admin.buscar("tarea") and all(tarea.id in (tareas[1], tareas[3]) for tarea in admin.buscar("tarea"))
+    archivada = json.loads(admin.obtener_archivada_json(tareas[0]))
+    assert archivada["titulo"] == "tarea 1" and archivada["fecha_archivada"]
+    assert admin.archivar_completadas(30, pausa=0) == 0
+
+
+def test_listar_con_archivadas(admin, tareas):
+    admin.archivar_completadas(30, pausa=0)
+    pagina = admin.traer_json_pagina(0, 10, archivadas=True)
+    assert [tarea_id for tarea_id, tarea_json in pagina] == tareas
+    archivadas = [tarea_id for tarea_id, tarea_json in pagina if "fecha_archivada" in json.loads(tarea_json)]
+    assert archivadas == [tareas[0], tareas[2], tareas[4]]
+    assert [tarea_id for tarea_id, tarea_json in admin.traer_json_pagina(tareas[1], 2, archivadas=True)] == tareas[2:4]
+
+
+def test_los_ids_archivados_no_se_reutilizan(admin, tareas, nueva_tarea):
+    admin.archivar_completadas(30, pausa=0)
+    admin.eliminar_todas_tareas()
+    assert admin.agregar_tarea(nueva_tarea("nueva")) == max(tareas) + 1
+
+
+def test_api_incluir_archivadas(cliente):
+    primer_id = cliente.post("/tareas/lote", json=[{"titulo": "vieja", "estado": "Completada",
+                                                    "fecha_actualizada": "2020-01-01 00:00:00"},
+                                                   {"titulo": "nueva"}]).json()["primer_id"]
+    assert cliente.post("/archivar", params={"dias": 30}).json()["cantidad"] == 1
+    assert "error" in cliente.get(f"/tarea/{primer_id}").json()
+    assert cliente.get(f"/tarea/{primer_id}", params={"incluir_archivadas": True}).json()["titulo"] == "vieja"
+    assert [tarea["titulo"] for tarea in cliente.get("/listar").json()] == ["nueva"]
+    listado = cliente.get("/listar", params={"incluir_archivadas": True}).json()
+    assert [tarea["titulo"] for tarea in listado] == ["vieja", "nueva"]
@@ -0,0 +1,39 @@
+def ids_encontrados(admin, texto: str) -> list:
+    return [tarea.id for tarea in admin.buscar(texto)]
+
+
+def test_las_mas_relevantes_primero(admin, nueva_tarea):
+    en_descripcion = admin.agregar_tarea(nueva_tarea("otra cosa"))
+    with admin.pool.escritura() as conn:
+        conn.execute("UPDATE tareas SET descripcion = 'comprar pintura' WHERE id = ?", (en_descripcion,))
+    en_titulo = admin.agregar_tarea(nueva_tarea("pintura del living"))
+    admin.agregar_tarea(nueva_tarea("sin relacion"))
+    #El titulo pesa mas que la descripcion
+    assert ids_encontrados(admin, "pintura") == [en_titulo, en_descripcion]
+
+
+def test_palabras_con_prefijo_y_sin_acentos(admin, nueva_tarea):
+    tarea_id = admin.agregar_tarea(nueva_tarea("Revisión del presupuesto"))
+    assert ids_encontrados(admin, "revision presu") == [tarea_id]
+    assert ids_encontrados(admin, "presupuesto-2024 \"") == []      #Los operadores de FTS5 se toman como texto
+    assert ids_encontrados(admin, "   ") == []
+
+
+def test_el_indice_sigue_los_cambios_y_las_bajas(admin, nueva_tarea):
+    tarea_id = admin.agregar_tarea(nueva_tarea("llamar al plomero"))
+    otra_id = admin.agregar_tarea(nueva_tarea("llamar al banco"))
+    with admin.pool.escritura() as conn:
+        conn.execute("UPDATE tareas SET titulo = 'llamar al electricista' WHERE id = ?", (tarea_id,))
+    assert ids_encontrados(admin, "plomero") == []
+    assert ids_encontrados(admin, "electricista") == [tarea_id]
+
+    #Cambiar solo el estado no toca el indice
+    admin.actualizar_estado_tarea(tarea_id, "Completada")
+    assert ids_encontrados(admin, "electricista") == [tarea_id]
+
+    admin.eliminar_tarea(tarea_id)
+    assert ids_encontrados(admin, "llamar") == [otra_id]
+    admin.eliminar_lote([otra_id])
+    assert ids_encontrados(admin, "llamar") == []
+    with admin.pool.escritura() as conn:     #Falla si el indice no coincide con la tabla
+        assert conn.execute("INSERT INTO tareas_fts (tareas_fts) VALUES ('integrity-check')").fetchall() == []
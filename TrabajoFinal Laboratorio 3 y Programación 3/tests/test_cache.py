@@ -0,0 +1,34 @@
+from nucleo import AdminTarea
+
+
+def test_etag_y_304(cliente):
+    tarea_id = cliente.post("/tareas/lote", json=[{"titulo": "a"}]).json()["primer_id"]
+    respuesta = cliente.get(f"/tarea/{tarea_id}")
+    etag = respuesta.headers["etag"]
+    assert respuesta.headers["cache-control"] == "private, no-cache"
+
+    for encabezado in (etag, f"W/{etag}", f'"otro", {etag}', "*"):
+        no_modificada = cliente.get(f"/tarea/{tarea_id}", headers={"If-None-Match": encabezado})
+        assert no_modificada.status_code == 304
+        assert no_modificada.content == b""
+        assert no_modificada.headers["etag"] == etag
+
+    #Al cambiar la tarea cambia el ETag, y el que tenia el cliente ya no sirve
+    cliente.patch("/tareas/estado", json={"ids": [tarea_id], "estado": "Completada"})
+    respuesta = cliente.get(f"/tarea/{tarea_id}", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["estado"] == "Completada"
+    assert respuesta.headers["etag"] != etag
+
+
+def test_la_cache_ve_los_cambios_de_otra_instancia(admin, nueva_tarea):
+    tarea_id = admin.agregar_tarea(nueva_tarea("a"))
+    assert admin.obtener_tarea(tarea_id).estado == "Pendiente"      #Queda en la cache
+    otra = AdminTarea(admin.pool.db_nombre)
+    otra.actualizar_estado_tarea(tarea_id, "Completada")
+    otra.eliminar_lote([admin.agregar_tarea(nueva_tarea("b"))])
+    otra.cerrar()
+    assert admin.obtener_tarea(tarea_id).estado == "Completada"
+    assert admin.cache.estadisticas()["aciertos"] == 0
+    assert admin.obtener_tarea(tarea_id).estado == "Completada"
+    assert admin.cache.estadisticas()["aciertos"] == 1
@@ -0,0 +1,60 @@
+import json
+
+
+def leer(admin, desde: int):
+    cambios, version, reiniciar = admin.cambios_desde(desde)
+    return [json.loads(cambio) for cambio in cambios], version, reiniciar
+
+
+def test_solo_el_ultimo_cambio_de_cada_tarea(admin, nueva_tarea):
+    primera = admin.agregar_tarea(nueva_tarea("a"))
+    segunda = admin.agregar_tarea(nueva_tarea("b"))
+    cambios, version, reiniciar = leer(admin, 0)
+    assert [(cambio["id"], cambio["operacion"]) for cambio in cambios] == [(primera, "insertar"), (segunda, "insertar")]
+
+    admin.actualizar_estado_tarea(primera, "Completada")
+    admin.eliminar_tarea(segunda)
+    cambios, version, reiniciar = leer(admin, version)
+    assert not reiniciar
+    assert [(cambio["id"], cambio["operacion"]) for cambio in cambios] == [(primera, "actualizar"), (segunda, "eliminar")]
+    assert cambios[0]["tarea"]["estado"] == "Completada"
+    assert cambios[1]["tarea"] is None
+    assert leer(admin, version) == ([], version, False)
+
+
+def test_compactar_deja_el_ultimo_cambio(admin, nueva_tarea):
+    tarea_id = admin.agregar_tarea(nueva_tarea("a"))
+    for estado in ("En Progreso", "Postergada", "Completada"):
+        admin.actualizar_estado_tarea(tarea_id, estado)
+    antes = leer(admin, 0)
+    assert admin.compactar_cambios() == 3
+    assert leer(admin, 0) == antes
+
+
+def test_un_cliente_que_quedo_atras_tiene_que_reiniciar(admin, nueva_tarea):
+    ids = [admin.agregar_tarea(nueva_tarea(str(numero))) for numero in range(5)]
+    cambios, vieja, reiniciar = leer(admin, 0)
+    for tarea_id in ids:
+        admin.actualizar_estado_tarea(tarea_id, "Completada")
+    admin.compactar_cambios(retener=2)
+
+    cambios, version, reiniciar = leer(admin, vieja)
+    assert reiniciar and cambios == []
+    #Desde la version que devolvio, despues de volver a leer todo, el registro esta completo
+    admin.eliminar_tarea(ids[0])
+    cambios, nueva, reiniciar = leer(admin, version)
+    assert not reiniciar
+    assert [(cambio["id"], cambio["operacion"]) for cambio in cambios] == [(ids[0], "eliminar")]
+
+    #Una version que esta base nunca dio (por ejemplo de otra base) tambien pide reiniciar
+    assert leer(admin, nueva + 100) == ([], nueva, True)
+
+
+def test_api_cambios(cliente):
+    respuesta = cliente.get("/cambios", params={"desde": "0"}).json()
+    version = respuesta["version"]
+    tarea_id = cliente.post("/tareas/lote", json=[{"titulo": "a"}]).json()["primer_id"]
+    respuesta = cliente.get("/cambios", params={"desde": version, "limite": 1}).json()
+    assert [cambio["id"] for cambio in respuesta["cambios"]] == [tarea_id]
+    assert respuesta["mas"] and not respuesta["reiniciar"]
+    assert cliente.get("/cambios", params={"desde": "1,2"}).status_code == 422
@@ -0,0 +1,101 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+import compresion
+from compresion import CompresionHTTP, elegir_codificacion
+
+#Con brotli instalado gana brotli cuando el cliente acepta los dos con la misma "q"
+PREFERIDA = "br" if compresion.brotli is not None else "gzip"
+
+
+@pytest.mark.parametrize("encabezado, esperada", [
+    ("gzip, deflate", "gzip"),
+    ("br, gzip", PREFERIDA),
+    ("br;q=0.5, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("*", PREFERIDA),
+    ("*, gzip;q=0", "br" if compresion.brotli is not None else None),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=nada", None),
+])
+def test_elegir_codificacion(encabezado, esperada):
+    assert elegir_codificacion(encabezado) == esperada
+
+
+def armar_cliente(minimo: int = 100) -> TestClient:
+    def json(request):
+        return Response(b"x" * int(request.query_params["tamano"]), media_type="application/json",
+                        headers={"ETag": '"abc"'})
+
+    def bloques(request):
+        cantidad = int(request.query_params["bloques"])
+        return StreamingResponse((b"y" * 30 for numero in range(cantidad)), media_type="application/x-ndjson")
+
+    def imagen(request):
+        return Response(b"z" * 1000, media_type="image/png")
+
+    app = Starlette(routes=[Route("/json", json), Route("/bloques", bloques), Route("/imagen", imagen)])
+    return TestClient(CompresionHTTP(app, minimo=minimo))
+
+
+def test_solo_se_comprimen_las_respuestas_grandes():
+    cliente = armar_cliente()
+    chica = cliente.get("/json", params={"tamano": 99}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in chica.headers
+    assert chica.headers["vary"] == "Accept-Encoding"
+    assert chica.headers["etag"] == '"abc"'
+
+    grande = cliente.get("/json", params={"tamano": 5000}, headers={"Accept-Encoding": "gzip"})
+    assert grande.headers["content-encoding"] == "gzip"
+    assert grande.content == b"x" * 5000       #httpx ya lo descomprimio
+    assert int(grande.headers["content-length"]) < 100
+    assert grande.headers["etag"] == 'W/"abc"'
+
+    sin_compresion = cliente.get("/json", params={"tamano": 5000}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sin_compresion.headers
+    assert "vary" not in sin_compresion.headers
+
+
+def test_las_respuestas_por_bloques_se_comprimen_sin_juntarlas():
+    cliente = armar_cliente()
+    #Tres bloques de 30 bytes no llegan al minimo: se envian tal cual
+    chica = cliente.get("/bloques", params={"bloques": 3}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in chica.headers and chica.content == b"y" * 90
+
+    with cliente.stream("GET", "/bloques", params={"bloques": 100}, headers={"Accept-Encoding": "gzip"}) as grande:
+        assert grande.headers["content-encoding"] == "gzip"
+        assert "content-length" not in grande.headers
+        comprimido = b"".join(grande.iter_raw())
+    assert gzip.decompress(comprimido) == b"y" * 3000
+
+
+def test_lo_que_no_conviene_comprimir_pasa_igual():
+    respuesta = armar_cliente().get("/imagen", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in respuesta.headers
+    assert respuesta.content == b"z" * 1000
+
+
+@pytest.mark.skipif(compresion.brotli is None, reason="el paquete brotli no esta instalado")
+def test_brotli():
+    with armar_cliente().stream("GET", "/json", params={"tamano": 5000}, headers={"Accept-Encoding": "br"}) as respuesta:
+        assert respuesta.headers["content-encoding"] == "br"
+        assert compresion.brotli.decompress(b"".join(respuesta.iter_raw())) == b"x" * 5000
+
+
+def test_la_api_comprime_los_listados(cliente):
+    primer_id = cliente.post("/tareas/lote", json=[{"titulo": f"tarea {numero}"} for numero in range(50)]).json()["primer_id"]
+    respuesta = cliente.get("/listar", headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert len(respuesta.json()) == 50
+    #Una tarea sola no llega al minimo, y un 304 nunca se comprime
+    tarea = cliente.get(f"/tarea/{primer_id}", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in tarea.headers
+    no_modificada = cliente.get(f"/tarea/{primer_id}",
+                                headers={"Accept-Encoding": "gzip", "If-None-Match": tarea.headers["etag"]})
+    assert no_modificada.status_code == 304 and "content-encoding" not in no_modificada.headers
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from nucleo import AdminTarea
+
+
+@pytest.fixture
+def admin(tmp_path):
+    #Espera larga y grupos grandes: las escrituras que se hacen a la vez terminan en el mismo grupo
+    admin = AdminTarea(str(tmp_path / "tareas.db"), escritura_agrupada=True, espera_grupo_ms=200, max_grupo=1000)
+    yield admin
+    admin.cerrar()
+
+
+def en_hilos(funciones):
+    #Corre cada funcion en su hilo, todas a la vez, y devuelve lo que devolvio o lanzo cada una
+    resultados = [None] * len(funciones)
+    barrera = threading.Barrier(len(funciones))
+
+    def correr(numero, funcion):
+        barrera.wait()
+        try:
+            resultados[numero] = funcion()
+        except Exception as error:
+            resultados[numero] = error
+
+    hilos = [threading.Thread(target=correr, args=(numero, funcion)) for numero, funcion in enumerate(funciones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+def test_altas_simultaneas_tienen_ids_distintos(admin, nueva_tarea):
+    ids = en_hilos([lambda numero=numero: admin.agregar_tarea(nueva_tarea(f"tarea {numero}")) for numero in range(50)])
+    assert len(set(ids)) == 50
+    assert sorted(tarea.id for tarea in admin.traer_todas_tareas()) == sorted(ids)
+    for numero, tarea_id in enumerate(ids):
+        assert admin.obtener_tarea(tarea_id).titulo == f"tarea {numero}"
+
+
+def test_una_escritura_que_falla_no_deshace_las_demas_del_grupo(admin, nueva_tarea):
+    raiz = admin.agregar_tarea(nueva_tarea("raiz"))
+    hija = admin.agregar_tarea(nueva_tarea("hija"), raiz)
+    nieta = admin.agregar_tarea(nueva_tarea("nieta"), hija)
+    eventos = []
+    admin.suscribir(eventos.append)
+
+    #mover la hija debajo de su propia subtarea ya la separo de "raiz" cuando descubre el ciclo:
+    #solo eso se tiene que deshacer, no las altas que se confirman en el mismo grupo
+    funciones = [lambda numero=numero: admin.agregar_tarea(nueva_tarea(f"alta {numero}")) for numero in range(20)]
+    funciones.insert(10, lambda: admin.mover_tarea(hija, nieta))
+    resultados = en_hilos(funciones)
+
+    error = resultados.pop(10)
+    assert isinstance(error, ValueError)
+    assert len(set(resultados)) == 20
+    assert all(admin.obtener_tarea(tarea_id) is not None for tarea_id in resultados)
+    assert [tarea.id for tarea in admin.traer_ancestros(nieta)] == [raiz, hija]
+    assert sorted(tarea_id for evento in eventos for tarea_id in evento["ids"]) == sorted(resultados)
@@ -0,0 +1,62 @@
+import random
+
+from nucleo import ESTADOS, ESTADOS_VALIDOS, Tarea
+
+
+def contar_en_tareas(admin) -> dict:
+    with admin.pool.lectura() as conn:
+        por_estado = dict(conn.execute("SELECT estado, COUNT(*) FROM tareas GROUP BY estado"))
+    return {estado: por_estado.get(estado, 0) for estado in ESTADOS}
+
+
+def comprobar(admin):
+    resumen = admin.estadisticas()
+    assert resumen["por_estado"] == contar_en_tareas(admin)
+    assert resumen["total"] == len(admin.traer_todas_tareas())
+    assert admin.contar_por_estado() == {estado: cantidad for estado, cantidad in contar_en_tareas(admin).items() if cantidad}
+
+
+def test_los_resumenes_coinciden_con_las_tareas(admin):
+    azar = random.Random(7)
+    dias = ["2024-01-01", "2024-01-02", "2024-01-03"]
+    creadas = dict.fromkeys(dias, 0)
+    for vuelta in range(10):
+        tareas = []
+        for numero in range(azar.randint(1, 30)):
+            dia = azar.choice(dias)
+            creadas[dia] += 1
+            tareas.append(Tarea(None, f"tarea {vuelta}.{numero}", "", azar.choice(ESTADOS), f"{dia} 10:00:00",
+                                f"{dia} 10:00:00"))
+        admin.agregar_tareas_lote(tareas)
+        comprobar(admin)
+
+        ids = list(admin.traer_ids())
+        admin.actualizar_estado_lote(azar.sample(ids, len(ids) // 3), azar.choice(ESTADOS_VALIDOS))
+        comprobar(admin)
+        admin.actualizar_estado_tarea(azar.choice(ids), azar.choice(ESTADOS_VALIDOS))
+        comprobar(admin)
+        admin.eliminar_lote(azar.sample(ids, len(ids) // 4) + [10 ** 9])
+        comprobar(admin)
+
+    admin.archivar_completadas(0, pausa=0)
+    comprobar(admin)
+    #"creadas" es historico: no baja cuando las tareas se eliminan o se archivan
+    assert dict(admin.estadisticas(len(dias))["creadas_por_dia"]) == creadas
+
+    admin.eliminar_todas_tareas()
+    comprobar(admin)
+    assert admin.estadisticas()["total"] == 0
+
+
+def test_api_estadisticas(cliente):
+    def creadas_el(dia: str) -> int:
+        por_dia = cliente.get("/estadisticas", params={"dias": 3660}).json()["creadas_por_dia"]
+        return sum(fila["creadas"] for fila in por_dia if fila["dia"] == dia)
+
+    antes = creadas_el("2024-01-01")        #La base de la API es compartida y "creadas" no baja
+    cliente.post("/tareas/lote", json=[{"titulo": "a", "fecha_creada": "2024-01-01 10:00:00"},
+                                       {"titulo": "b", "estado": "Completada", "fecha_creada": "2024-01-01 11:00:00"}])
+    resumen = cliente.get("/estadisticas").json()
+    assert resumen["por_estado"] == {"Pendiente": 1, "Completada": 1, "En Progreso": 0, "Por hacer": 0, "Postergada": 0}
+    assert resumen["total"] == 2
+    assert creadas_el("2024-01-01") == antes + 2
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from nucleo import AdminTarea
+
+
+@pytest.fixture
+def admin(tmp_path):
+    admin = AdminTarea(str(tmp_path / "tareas.db"))
+    yield admin
+    admin.cerrar()
+
+
+@pytest.fixture
+def arbol(admin, nueva_tarea):
+    #1 -> 2 -> 3 -> 4, 2 -> 5, y 6 suelta
+    padres = {"1": None, "2": "1", "3": "2", "4": "3", "5": "2", "6": None}
+    ids = {}
+    for nombre, padre in padres.items():
+        ids[nombre] = admin.agregar_tarea(nueva_tarea(nombre), ids[padre] if padre else None)
+    return ids
+
+
+def jerarquia(admin) -> set:
+    with admin.pool.lectura() as conn:
+        return set(conn.execute("SELECT ancestro, profundidad, descendiente FROM tareas_jerarquia").fetchall())
+
+
+def clausura(padres: dict) -> set:
+    #La tabla de clausura que corresponde a {tarea: padre}, armada subiendo desde cada tarea
+    filas = set()
+    for tarea_id in padres:
+        ancestro, profundidad = tarea_id, 0
+        while ancestro is not None:
+            filas.add((ancestro, profundidad, tarea_id))
+            ancestro, profundidad = padres[ancestro], profundidad + 1
+    return filas
+
+
+def padres_actuales(admin) -> dict:
+    with admin.pool.lectura() as conn:
+        return dict(conn.execute(
+            "SELECT id, (SELECT ancestro FROM tareas_jerarquia WHERE descendiente = id AND profundidad = 1) FROM tareas"
+        ).fetchall())
+
+
+def test_mover_debajo_de_una_subtarea_se_rechaza(admin, arbol):
+    antes = jerarquia(admin)
+    for padre in ("2", "3", "4", "5"):
+        with pytest.raises(ValueError):
+            admin.mover_tarea(arbol["2"], arbol[padre])
+    with pytest.raises(ValueError):
+        admin.mover_tarea(arbol["2"], 999)
+    assert jerarquia(admin) == antes
+
+
+def test_mover_mantiene_la_clausura(admin, arbol):
+    version = admin.cambios_desde(0)[1]
+    assert admin.mover_tarea(arbol["3"], arbol["6"])
+    assert [tarea.id for tarea in admin.traer_ancestros(arbol["4"])] == [arbol["6"], arbol["3"]]
+    assert jerarquia(admin) == clausura(padres_actuales(admin))
+
+    #El movimiento queda en el registro de cambios, con el padre nuevo en el JSON de la tarea
+    cambios, version, reiniciar = admin.cambios_desde(version)
+    assert [json.loads(cambio)["tarea"]["padre_id"] for cambio in cambios] == [arbol["6"]]
+
+    assert admin.mover_tarea(arbol["3"], None)
+    assert admin.traer_ancestros(arbol["3"]) == []
+    assert jerarquia(admin) == clausura(padres_actuales(admin))
+    assert not admin.mover_tarea(999, None)
+
+
+def test_mover_varias_no_deja_movimientos_a_medias(admin, arbol):
+    antes = jerarquia(admin)
+    #La 6 se podria mover, pero la 1 no (el padre es una de sus subtareas): no se mueve ninguna
+    with pytest.raises(ValueError):
+        admin.mover_tareas([arbol["6"], arbol["1"]], arbol["5"])
+    assert jerarquia(admin) == antes
+
+    assert admin.mover_tareas([arbol["6"], arbol["4"]], arbol["5"]) == 2
+    assert jerarquia(admin) == clausura(padres_actuales(admin))
+    assert padres_actuales(admin)[arbol["4"]] == arbol["5"]
+
+
+def test_eliminar_cuelga_las_subtareas_del_padre(admin, arbol):
+    assert admin.eliminar_tarea(arbol["2"])
+    padres = padres_actuales(admin)
+    assert padres[arbol["3"]] == padres[arbol["5"]] == arbol["1"]
+    assert jerarquia(admin) == clausura(padres)
+
+    assert admin.eliminar_todas_tareas()
+    assert jerarquia(admin) == set()
+
+
+def test_las_subtareas_nuevas_empiezan_pendientes(cliente):
+    padre = cliente.post("/tareas/lote", json=[{"titulo": "padre"}]).json()["primer_id"]
+    respuesta = cliente.post(f"/tarea/{padre}/subtareas", json={"titulo": "hija", "estado": "Completada"})
+    hija = cliente.get(f"/tarea/{respuesta.json()['id']}").json()
+    assert hija["estado"] == "Pendiente"
+    assert hija["padre_id"] == padre
+    assert cliente.get(f"/tarea/{padre}/progreso").json() == {"subtareas": 1, "completadas": 0, "porcentaje": 0}
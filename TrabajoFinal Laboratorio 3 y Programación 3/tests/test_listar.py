@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def tareas(cliente):
+    respuesta = cliente.post("/tareas/lote", json=[{"titulo": f"tarea {numero}", "descripcion": "x" * 100}
+                                                   for numero in range(5)]).json()
+    return list(range(respuesta["primer_id"], respuesta["ultimo_id"] + 1))
+
+
+def test_campos_elegidos(cliente, tareas):
+    #El orden de los campos es siempre el de la tarea, no el del pedido
+    listado = cliente.get("/listar", params={"campos": "titulo, id"}).json()
+    assert [list(tarea) for tarea in listado] == [["id", "titulo"]] * 5
+    assert [tarea["id"] for tarea in listado] == tareas
+
+    pagina = cliente.get("/listar", params={"campos": "id,padre_id", "despues_de": tareas[1], "limite": 2}).json()
+    assert pagina == {"tareas": [{"id": tareas[2], "padre_id": None}, {"id": tareas[3], "padre_id": None}],
+                      "siguiente": tareas[3]}
+
+    ndjson = cliente.get("/listar", params={"campos": "estado", "formato": "ndjson"}).text
+    assert [json.loads(linea) for linea in ndjson.splitlines()] == [{"estado": "Pendiente"}] * 5
+
+
+@pytest.mark.parametrize("campos, mensaje", [
+    ("id,contraseña", "Campos desconocidos: contraseña"),
+    ("titulo,x,y", "Campos desconocidos: x, y"),
+    (" , ", "Hay que pedir al menos un campo"),
+])
+def test_campos_invalidos(cliente, tareas, campos, mensaje):
+    respuesta = cliente.get("/listar", params={"campos": campos})
+    assert respuesta.status_code == 422
+    assert respuesta.json()["detail"].startswith(mensaje)
+    assert "Campos posibles: id, titulo, descripcion" in respuesta.json()["detail"]
@@ -0,0 +1,23 @@
+def test_cambiar_estado_de_varias(cliente):
+    primer_id = cliente.post("/tareas/lote", json=[{"titulo": "a"}, {"titulo": "b"}, {"titulo": "c"}]).json()["primer_id"]
+    respuesta = cliente.patch("/tareas/estado", json={"ids": [primer_id, primer_id + 1, 999], "estado": "Completada"})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["cantidad"] == 2
+    estados = [cliente.get(f"/tarea/{tarea_id}").json()["estado"] for tarea_id in range(primer_id, primer_id + 3)]
+    assert estados == ["Completada", "Completada", "Pendiente"]
+
+
+def test_no_se_puede_volver_a_pendiente(cliente):
+    tarea_id = cliente.post("/tareas/lote", json=[{"titulo": "a", "estado": "Completada"}]).json()["primer_id"]
+    for estado in ("Pendiente", "Inventado"):
+        respuesta = cliente.patch("/tareas/estado", json={"ids": [tarea_id], "estado": estado})
+        assert respuesta.status_code == 422
+    assert cliente.get(f"/tarea/{tarea_id}").json()["estado"] == "Completada"
+
+
+def test_eliminar_varias(cliente):
+    primer_id = cliente.post("/tareas/lote", json=[{"titulo": "a"}, {"titulo": "b"}]).json()["primer_id"]
+    respuesta = cliente.request("DELETE", "/tareas", json={"ids": [primer_id, 999]})
+    assert respuesta.json()["cantidad"] == 1
+    assert "error" in cliente.get(f"/tarea/{primer_id}").json()
+    assert cliente.get(f"/tarea/{primer_id + 1}").json()["titulo"] == "b"
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from particiones import AdminTareaParticionada
+
+
+@pytest.fixture
+def admin(tmp_path):
+    admin = AdminTareaParticionada(str(tmp_path / "tareas.db"), particiones=3)
+    yield admin
+    admin.cerrar()
+
+
+def leer_todo(admin, desde: str, limite: int):
+    #Pide cambios de a "limite" hasta que no quedan mas, como lo haria un cliente de GET /cambios
+    leidos = []
+    while True:
+        cambios, desde, reiniciar = admin.cambios_desde(desde, limite)
+        assert not reiniciar
+        assert isinstance(desde, str)
+        leidos.extend(json.loads(cambio) for cambio in cambios)
+        if len(cambios) < limite:
+            return leidos, desde
+
+
+def test_la_version_es_un_texto_con_una_parte_por_particion(admin, nueva_tarea):
+    ids = [admin.agregar_tarea(nueva_tarea(f"tarea {numero}")) for numero in range(7)]
+    cambios, version, reiniciar = admin.cambios_desde("0")
+    assert len(cambios) == 7 and not reiniciar
+    #Cada particion anoto un cambio por cada alta suya
+    por_particion = [sum(1 for tarea_id in ids if tarea_id % 3 == numero) for numero in range(3)]
+    assert version == ",".join(map(str, por_particion))
+    assert admin._descomponer(version) == por_particion
+    assert admin._componer(admin._descomponer(version)) == version
+
+
+def test_retomar_desde_la_version_trae_cada_cambio_una_vez(admin, nueva_tarea):
+    ids = [admin.agregar_tarea(nueva_tarea(f"tarea {numero}")) for numero in range(20)]
+    leidos, version = leer_todo(admin, "0", limite=3)
+    assert sorted(cambio["id"] for cambio in leidos) == sorted(ids)
+
+    #Nada nuevo: la misma version vuelve sin cambios
+    assert admin.cambios_desde(version) == ([], version, False)
+
+    admin.actualizar_estado_lote(ids[:4], "Completada")
+    admin.eliminar_tarea(ids[10])
+    nuevos, version = leer_todo(admin, version, limite=2)
+    assert sorted(cambio["id"] for cambio in nuevos) == sorted(ids[:4] + [ids[10]])
+    assert {cambio["id"]: cambio["operacion"] for cambio in nuevos}[ids[10]] == "eliminar"
+    assert all(cambio["tarea"]["estado"] == "Completada" for cambio in nuevos if cambio["id"] != ids[10])
+
+
+@pytest.mark.parametrize("version", ["1,2", "1,2,3,4", "1,x,3", "12", "-1,0,0", ""])
+def test_una_version_ajena_pide_reiniciar(admin, nueva_tarea, version):
+    admin.agregar_tarea(nueva_tarea("tarea"))
+    cambios, ultima, reiniciar = admin.cambios_desde(version)
+    assert cambios == [] and reiniciar
+    assert admin.cambios_desde(ultima) == ([], ultima, False)
@@ -0,0 +1,65 @@
+import pytest
+
+from nucleo import AdminTarea
+from particiones import AdminTareaParticionada
+
+
+@pytest.fixture(params=[1, 3], ids=["una_base", "particiones"])
+def admin(request, tmp_path, nueva_tarea):
+    if request.param == 1:
+        admin = AdminTarea(str(tmp_path / "tareas.db"))
+        bases = [admin]
+    else:
+        admin = AdminTareaParticionada(str(tmp_path / "tareas.db"), particiones=request.param)
+        bases = admin.particiones
+    for numero in range(12):
+        admin.agregar_tarea(nueva_tarea(f"tarea {numero}"))
+    #Algunas fechas repetidas y algunas NULL, como las de tareas importadas de una base vieja
+    for base in bases:
+        with base.pool.escritura() as conn:
+            conn.execute("UPDATE tareas SET fecha_actualizada = CASE id % 4 WHEN 0 THEN NULL "
+                         "ELSE '2024-01-0' || (id % 3 + 1) END")
+    yield admin
+    admin.cerrar()
+
+
+def esperado(admin, descendente: bool) -> list:
+    #El orden de SQLite: NULL antes que cualquier fecha (y al final en orden descendente), y despues por id
+    tareas = [(tarea.fecha_actualizada, tarea.id) for tarea in admin.traer_todas_tareas()]
+    tareas.sort(key=lambda par: (par[0] is not None, par[0] or "", par[1]), reverse=descendente)
+    return [tarea_id for fecha, tarea_id in tareas]
+
+
+def paginar(admin, descendente: bool, limite: int) -> list:
+    ids, despues_de = [], None
+    while True:
+        pagina = admin.traer_tareas_por_estado("Pendiente", "fecha_actualizada", descendente, limite, despues_de)
+        ids.extend(tarea.id for tarea in pagina)
+        if len(pagina) < limite:
+            return ids
+        despues_de = (pagina[-1].fecha_actualizada, pagina[-1].id)
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+@pytest.mark.parametrize("limite", [1, 2, 5, 100])
+def test_las_fechas_null_se_ordenan_y_paginan(admin, descendente, limite):
+    assert paginar(admin, descendente, limite) == esperado(admin, descendente)
+
+
+def test_el_cursor_de_la_api_soporta_fechas_null(cliente, api):
+    cliente.post("/tareas/lote", json=[{"titulo": f"tarea {numero}"} for numero in range(6)])
+    with api.admin_tarea.pool.escritura() as conn:
+        conn.execute("UPDATE tareas SET fecha_actualizada = NULL WHERE id % 2 = 0")
+    for orden in ("fecha_actualizada", "-fecha_actualizada"):
+        ids, despues_de = [], None
+        while True:
+            parametros = {"estado": "Pendiente", "orden": orden, "limite": 2}
+            if despues_de is not None:
+                parametros["despues_de"] = despues_de
+            respuesta = cliente.get("/tareas", params=parametros)
+            assert respuesta.status_code == 200
+            ids.extend(tarea["id"] for tarea in respuesta.json()["tareas"])
+            despues_de = respuesta.json()["siguiente"]
+            if despues_de is None:
+                break
+        assert ids == esperado(api.admin_tarea, orden.startswith("-"))
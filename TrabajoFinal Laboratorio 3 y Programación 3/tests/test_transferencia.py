@@ -0,0 +1,65 @@
+import io
+import json
+
+import pytest
+
+import transferencia
+from nucleo import AdminTarea, COLUMNAS
+
+
+def filas(admin: AdminTarea) -> list:
+    #Todo menos el ID, que en la otra base puede ser distinto
+    return [(tarea.titulo, tarea.descripcion, tarea.estado, tarea.fecha_creada, tarea.fecha_actualizada,
+             tarea.fecha_vencimiento) for tarea in admin.traer_todas_tareas()]
+
+
+@pytest.fixture
+def origen(admin):
+    with admin.pool.escritura() as conn:
+        conn.executemany('''
+        INSERT INTO tareas (titulo, descripcion, estado, fecha_creada, fecha_actualizada, fecha_vencimiento)
+        VALUES (?, ?, ?, '2024-01-01 10:00:00', '2024-01-02 10:00:00', ?)
+        ''', [(f"tarea {numero}", 'con "comillas", comas\ny saltos de linea' if numero % 3 == 0 else "",
+               "Completada" if numero % 2 else "Pendiente", "2024-06-30 18:00:00" if numero % 4 == 0 else None)
+              for numero in range(25)])
+    return admin
+
+
+@pytest.mark.parametrize("formato", ["csv", "ndjson"])
+def test_exportar_e_importar_deja_las_mismas_tareas(origen, tmp_path, formato):
+    texto = "".join(transferencia.exportar(origen, formato, tamaño_bloque=7))
+    if formato == "csv":
+        assert texto.splitlines()[0] == ",".join(COLUMNAS)
+    destino = AdminTarea(str(tmp_path / "destino.db"))
+    assert transferencia.importar(destino, io.StringIO(texto, newline=""), formato, tamaño_bloque=10) == 25
+    assert filas(destino) == filas(origen)
+    destino.cerrar()
+
+
+@pytest.mark.parametrize("formato, texto, mensaje", [
+    ("csv", "titulo,estado\na,Pendiente\nb,Pendiente\n,Pendiente\nd,Pendiente\n", "La tarea 3 no tiene titulo"),
+    ("csv", "titulo,estado\na,Pendiente\nb,Pendiente\nc,Otro\n", "La tarea 3 tiene un estado invalido: 'Otro'"),
+    ("ndjson", '{"titulo": "a"}\n\n{"titulo": "b"}\n{"titulo": "c", "fecha_vencimiento": "ayer"}\n', "La tarea 3: Fecha"),
+    ("ndjson", '{"titulo": "a"}\n{"titulo": "b"}\nno es json\n', "La tarea 3 no es JSON valido"),
+])
+def test_la_tarea_invalida_se_informa_con_su_numero(admin, formato, texto, mensaje):
+    with pytest.raises(transferencia.ErrorImportacion) as error:
+        transferencia.importar(admin, io.StringIO(texto, newline=""), formato, tamaño_bloque=2)
+    assert str(error.value).startswith(mensaje)
+    #El primer bloque (2 tareas) ya se guardo; el de la tarea invalida no
+    assert error.value.importadas == 2
+    assert [tarea.titulo for tarea in admin.traer_todas_tareas()] == ["a", "b"]
+
+
+def test_api_exportar_e_importar(cliente):
+    cliente.post("/tareas/lote", json=[{"titulo": "a", "estado": "Completada"}, {"titulo": "b"}])
+    exportado = cliente.get("/exportar", params={"formato": "ndjson"})
+    assert exportado.headers["content-disposition"] == 'attachment; filename="tareas.ndjson"'
+    assert [json.loads(linea)["titulo"] for linea in exportado.text.splitlines()] == ["a", "b"]
+
+    respuesta = cliente.post("/importar", params={"formato": "ndjson"}, content=exportado.content)
+    assert respuesta.json()["cantidad"] == 2
+    respuesta = cliente.post("/importar", params={"formato": "csv"}, content="titulo\nc\n\xff".encode("latin-1"))
+    assert respuesta.status_code == 422
+    assert respuesta.json()["detail"]["importadas"] == 0
+    assert [tarea["titulo"] for tarea in cliente.get("/listar").json()] == ["a", "b", "a", "b"]
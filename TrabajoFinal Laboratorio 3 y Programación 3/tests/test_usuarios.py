@@ -0,0 +1,36 @@
+from nucleo import AdminTarea, AdminUsuario
+from particiones import AdminTareaParticionada
+
+
+def contar_usuarios(admin: AdminTarea) -> int:
+    with admin.pool.lectura() as conn:
+        return conn.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+
+def test_el_usuario_inicial_se_crea_una_vez(tmp_path):
+    admin = AdminTarea(str(tmp_path / "tareas.db"))
+    assert contar_usuarios(admin) == 0      #Las migraciones solo crean la tabla
+    usuarios = AdminUsuario(admin.pool)
+    assert usuarios.verificar("Admin", "12345") is not None
+    assert usuarios.verificar("Admin", "otra") is None
+    AdminUsuario(admin.pool)
+    assert contar_usuarios(admin) == 1
+    admin.cerrar()
+
+
+def test_con_particiones_solo_la_primera_tiene_usuarios(tmp_path):
+    admin = AdminTareaParticionada(str(tmp_path / "tareas.db"), particiones=3)
+    usuarios = AdminUsuario(admin.pool)
+    assert usuarios.verificar("Admin", "12345") is not None
+    assert [contar_usuarios(particion) for particion in admin.particiones] == [1, 0, 0]
+    admin.cerrar()
+
+
+def test_cambiar_contraseña(tmp_path):
+    admin = AdminTarea(str(tmp_path / "tareas.db"))
+    usuarios = AdminUsuario(admin.pool)
+    assert usuarios.verificar("Admin", "12345") is not None       #Queda en la cache de credenciales
+    assert usuarios.cambiar_contraseña("Admin", "nueva")
+    assert usuarios.verificar("Admin", "12345") is None
+    assert usuarios.verificar("Admin", "nueva") is not None
+    admin.cerrar()
@@ -0,0 +1,184 @@
+#Exportacion e importacion de tareas en CSV o NDJSON (un objeto JSON por linea), para reportes y migraciones.
+#Las dos direcciones trabajan de a bloques: la exportacion lee la base de a paginas y la importacion lee
+#el archivo de a partes y confirma una transaccion por bloque, asi la memoria usada es la misma con un
+#archivo de 1 MB o de varios GB. Las usa la API (GET /exportar y POST /importar) y tambien la linea de comandos.
+#
+#Uso:
+#  python transferencia.py exportar tareas.csv
+#  python transferencia.py importar tareas.ndjson --db otra.db
+#Al importar, las tareas reciben IDs nuevos (el "id" del archivo se ignora).
+
+import argparse
+import csv
+import datetime
+import io
+import itertools
+import json
+import sys
+from typing import Iterable, Iterator, Optional, TextIO
+
+from nucleo import AdminTarea, Tarea, ESTADOS, COLUMNAS, normalizar_vencimiento
+
+FORMATOS = ("csv", "ndjson")
+
+
+class ErrorImportacion(ValueError):
+    #Error en una tarea del archivo. Los bloques anteriores ya quedaron guardados: "importadas" dice cuantas
+    #tareas hay que saltear para retomar la importacion despues de corregir el archivo.
+    def __init__(self, mensaje: str, importadas: int):
+        super().__init__(mensaje)
+        self.importadas = importadas
+
+
+def exportar_csv(admin: AdminTarea, tamaño_bloque: int = 1000) -> Iterator[str]:
+    salida = io.StringIO()
+    escritor = csv.writer(salida, lineterminator="\n")
+    escritor.writerow(COLUMNAS)
+    for bloque in admin.iterar_filas(tamaño_bloque):
+        escritor.writerows(bloque)
+        yield salida.getvalue()         #Se entrega el texto de cada bloque y se reutiliza el mismo StringIO
+        salida.seek(0)
+        salida.truncate()
+    if salida.tell():                   #No habia ninguna tarea: solo queda la linea de encabezado
+        yield salida.getvalue()
+
+
+def exportar_ndjson(admin: AdminTarea, tamaño_bloque: int = 1000) -> Iterator[str]:
+    for bloque in admin.iterar_json(tamaño_bloque):     #El JSON de cada tarea lo arma SQLite
+        yield "\n".join(bloque) + "\n"
+
+
+def exportar(admin: AdminTarea, formato: str, tamaño_bloque: int = 1000) -> Iterator[str]:
+    if formato == "csv":
+        return exportar_csv(admin, tamaño_bloque)
+    return exportar_ndjson(admin, tamaño_bloque)
+
+
+def tarea_desde_dict(datos, posicion: int) -> Tarea:     #Arma una Tarea nueva a partir de un objeto JSON o una fila CSV
+    if not isinstance(datos, dict) or not datos.get("titulo"):
+        raise ValueError(f"La tarea {posicion} no tiene titulo")
+    estado = datos.get("estado") or "Pendiente"
+    if estado not in ESTADOS:
+        raise ValueError(f"La tarea {posicion} tiene un estado invalido: {estado!r}")
+    try:
+        vencimiento = normalizar_vencimiento(datos.get("fecha_vencimiento"))
+    except ValueError as error:
+        raise ValueError(f"La tarea {posicion}: {error}")
+    ahora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return Tarea(None, datos["titulo"], datos.get("descripcion") or "", estado,
+                 datos.get("fecha_creada") or ahora, datos.get("fecha_actualizada") or ahora, vencimiento)
+
+
+def leer_csv(texto: TextIO) -> Iterator[Tarea]:
+    #La primera linea tiene los nombres de las columnas (como la que genera exportar_csv). El modulo csv
+    #va pidiendo lineas a medida que las necesita, asi que una descripcion con saltos de linea no es problema.
+    lector = csv.DictReader(texto)
+    posicion = 0
+    try:
+        for posicion, fila in enumerate(lector, start=1):
+            yield tarea_desde_dict(fila, posicion)
+    except csv.Error as error:
+        raise ValueError(f"CSV invalido despues de la tarea {posicion}: {error}")
+
+
+def leer_ndjson(texto: TextIO) -> Iterator[Tarea]:
+    posicion = 0
+    for linea in texto:
+        if not linea.strip():
+            continue
+        posicion += 1
+        try:
+            datos = json.loads(linea)
+        except ValueError:
+            raise ValueError(f"La tarea {posicion} no es JSON valido")
+        yield tarea_desde_dict(datos, posicion)
+
+
+def importar(admin: AdminTarea, texto: TextIO, formato: str, tamaño_bloque: int = 5000) -> int:
+    #Inserta las tareas de "texto" de a "tamaño_bloque", cada bloque en su propia transaccion.
+    #Devuelve cuantas tareas se importaron; si una tarea no es valida lanza ErrorImportacion.
+    tareas = iter(leer_csv(texto) if formato == "csv" else leer_ndjson(texto))
+    importadas = 0
+    while True:
+        try:
+            bloque = list(itertools.islice(tareas, tamaño_bloque))
+        except ValueError as error:      #La tarea invalida y el resto de su bloque no se guardan
+            raise ErrorImportacion(str(error), importadas)
+        if not bloque:
+            return importadas
+        admin.agregar_tareas_lote(bloque)
+        importadas += len(bloque)
+
+
+class LectorBloques(io.RawIOBase):
+    #Archivo de solo lectura armado a partir de pedazos de bytes (por ejemplo el cuerpo de una peticion
+    #que llega de a partes). Con abrir_bloques se lo envuelve para leerlo como texto, linea por linea.
+    def __init__(self, bloques: Iterable[bytes]):
+        self.bloques = iter(bloques)
+        self.resto = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, destino) -> int:
+        while not self.resto:
+            bloque = next(self.bloques, None)
+            if bloque is None:
+                return 0
+            self.resto = memoryview(bloque)
+        cantidad = min(len(destino), len(self.resto))
+        destino[:cantidad] = self.resto[:cantidad]
+        self.resto = self.resto[cantidad:]
+        return cantidad
+
+
+def abrir_bloques(bloques: Iterable[bytes]) -> TextIO:
+    #utf-8-sig ignora la marca BOM que agregan algunos programas (por ejemplo Excel) al guardar un CSV
+    return io.TextIOWrapper(io.BufferedReader(LectorBloques(bloques)), encoding="utf-8-sig", newline="")
+
+
+def formato_de(ruta: str, formato: Optional[str] = None) -> str:     #Si no se indica, se deduce de la extension del archivo
+    if formato:
+        return formato
+    return "csv" if ruta.lower().endswith(".csv") else "ndjson"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o importa tareas en CSV o NDJSON")
+    parser.add_argument("accion", choices=["exportar", "importar"])
+    parser.add_argument("archivo", help='Ruta del archivo ("-" para la salida o entrada estandar)')
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto se deduce de la extension del archivo")
+    parser.add_argument("--db", default="tareas.db")
+    parser.add_argument("--bloque", type=int, default=5000, help="Tareas por transaccion al importar")
+    args = parser.parse_args()
+    formato = formato_de(args.archivo, args.formato)
+
+    admin = AdminTarea(args.db, tamaño_cache=0, umbral_lento_ms=None)
+    try:
+        if args.accion == "exportar":
+            salida = sys.stdout if args.archivo == "-" else open(args.archivo, "w", encoding="utf-8", newline="")
+            try:
+                for texto in exportar(admin, formato):
+                    salida.write(texto)
+            finally:
+                if salida is not sys.stdout:
+                    salida.close()
+            return
+
+        if args.archivo == "-":
+            entrada = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+        else:
+            entrada = open(args.archivo, encoding="utf-8-sig", newline="")
+        with entrada:
+            try:
+                importadas = importar(admin, entrada, formato, args.bloque)
+            except ErrorImportacion as error:
+                print(f"Error: {error} (se importaron {error.importadas} tareas antes del error)", file=sys.stderr)
+                sys.exit(1)
+        print(f"Se importaron {importadas} tareas")
+    finally:
+        admin.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#Planificador de vencimientos: avisa cuando una tarea llega a su fecha de vencimiento ("vencida") y, si se pide,
+#un rato antes ("recordatorio"), sin consultar la tabla cada tantos segundos para ver si algo vencio.
+#
+#Los proximos avisos estan en un min-heap (heapq) ordenado por el momento en que hay que darlos, y un hilo
+#duerme hasta el primero. En el heap no estan todas las tareas: se cargan de a "capacidad" desde el indice de
+#fecha_vencimiento (ver la migracion 8 en nucleo.py), empezando por las que vencen antes, y la tanda siguiente
+#se carga recien cuando se llega al final de la anterior.
+#
+#Las altas, cambios y bajas hechas con el mismo AdminTarea llegan como eventos (ver AdminTarea.suscribir) y
+#actualizan el heap. Una entrada vieja no se busca para sacarla: en "vigentes" se anota la fecha que vale para
+#cada tarea y las entradas que ya no coinciden se descartan cuando llegan al tope del heap.
+#
+#Los eventos de AdminTarea solo traen los cambios hechos con esa misma instancia, asi que lo que
+#modifique otro proceso se nota al cargar la tanda siguiente o, como mucho, al momento de avisar (antes de
+#avisar se vuelve a leer la tarea). Las tareas que ya estaban vencidas al arrancar no se avisan: se consultan
+#con AdminTarea.traer_vencimientos (GET /tareas/vencidas en la API).
+
+import datetime
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from nucleo import AdminTarea, FORMATO_FECHA
+
+VENCIDA = "vencida"
+RECORDATORIO = "recordatorio"
+
+
+def momento(fecha: str) -> float:      #"AAAA-MM-DD HH:MM:SS" en hora local -> segundos, como time.time()
+    return datetime.datetime.strptime(fecha, FORMATO_FECHA).timestamp()
+
+
+class PlanificadorVencimientos:
+    def __init__(self, admin: AdminTarea, anticipacion: float = 0, capacidad: int = 1000):
+        #"anticipacion": cuantos segundos antes del vencimiento se manda el recordatorio (0 = sin recordatorio).
+        #"capacidad": cuantas tareas se cargan del indice por tanda.
+        self.admin = admin
+        self.anticipacion = anticipacion
+        self.capacidad = capacidad
+        self.heap: List[Tuple[float, int, str, str]] = []     #(momento del aviso, id, tipo de aviso, fecha_vencimiento)
+        self.vigentes: Dict[int, str] = {}      #id -> fecha_vencimiento con la que la tarea esta en el heap
+        self.cargadas_hasta: Optional[Tuple[str, int]] = None    #(fecha_vencimiento, id) de la ultima tarea cargada
+        self.completo = False       #Ya se cargaron todas las tareas con vencimiento: no hay otra tanda
+        self.eventos: List[dict] = []           #Eventos de AdminTarea que el hilo todavia no proceso
+        self.oyentes: List[Callable[[dict], None]] = []
+        self.condicion = threading.Condition()
+        self.cerrado = False
+        self.avisos = 0
+        admin.suscribir(self._al_cambiar)
+        self.hilo = threading.Thread(target=self._trabajar, daemon=True, name="vencimientos")
+        self.hilo.start()
+
+    def suscribir(self, oyente: Callable[[dict], None]):
+        #Registra una funcion que recibe cada aviso, por ejemplo {"tipo": "vencida", "id": 7, "titulo": "...",
+        #"fecha_vencimiento": "2024-06-30 23:59:59"}. Se llama desde el hilo del planificador.
+        self.oyentes.append(oyente)
+
+    def cerrar(self):      #Termina el hilo (espera a que suelte la base de datos) y deja de escuchar a AdminTarea
+        with self.condicion:
+            self.cerrado = True
+            self.condicion.notify()
+        self.hilo.join()
+        self.admin.desuscribir(self._al_cambiar)
+
+    def _al_cambiar(self, evento: dict):
+        #Oyente de AdminTarea: corre en el hilo que hizo la escritura, asi que solo anota el evento y despierta al hilo
+        with self.condicion:
+            self.eventos.append(evento)
+            self.condicion.notify()
+
+    def _trabajar(self):
+        self._reiniciar()
+        while True:
+            with self.condicion:
+                while not self.eventos and not self.cerrado:
+                    espera = self._espera()
+                    if espera is not None and espera <= 0:
+                        break
+                    self.condicion.wait(espera)     #Con espera=None duerme hasta el proximo evento
+                if self.cerrado:
+                    return
+                eventos, self.eventos = self.eventos, []
+            for evento in eventos:
+                self._procesar(evento)
+            if self._falta_tanda():
+                self._cargar_tanda()
+            else:
+                self._avisar_vencidos()
+
+    def _reiniciar(self):      #Vacia el heap; la proxima tanda empieza por lo que vence a partir de ahora
+        self.heap.clear()
+        self.vigentes.clear()
+        self.cargadas_hasta = (datetime.datetime.now().strftime(FORMATO_FECHA), 0)
+        self.completo = False
+
+    def _tope(self) -> Optional[Tuple[float, int, str, str]]:     #Primer aviso valido del heap (descarta los viejos)
+        while self.heap:
+            cuando, tarea_id, tipo, fecha = self.heap[0]
+            if self.vigentes.get(tarea_id) == fecha:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+        return None
+
+    def _falta_tanda(self) -> bool:
+        #Hay que cargar mas tareas antes de que algun aviso de la tanda siguiente pueda tocar antes que el tope
+        if self.completo:
+            return False
+        tope = self._tope()
+        return tope is None or tope[0] >= momento(self.cargadas_hasta[0]) - self.anticipacion
+
+    def _espera(self) -> Optional[float]:      #Segundos hasta el proximo aviso (o hasta cargar otra tanda)
+        if self._falta_tanda():
+            return 0
+        tope = self._tope()
+        return None if tope is None else tope[0] - time.time()
+
+    def _programar(self, tarea_id: int, fecha: Optional[str], de_tanda: bool = False):
+        #Pone en el heap los avisos de la tarea con esa fecha (None: la tarea ya no vence o no existe).
+        #"de_tanda": la tarea viene del indice, asi que se avisa aunque haya vencido mientras se cargaba la tanda.
+        if fecha is not None and not self.completo and (fecha, tarea_id) > self.cargadas_hasta:
+            fecha = None        #Vence despues de la ultima tarea cargada: va a entrar con su tanda
+        if self.vigentes.get(tarea_id) == fecha:
+            return
+        try:
+            cuando = momento(fecha) if fecha is not None else None
+        except ValueError:      #Una fecha guardada a mano con otro formato: no se puede programar
+            cuando = None
+        if cuando is None or (cuando <= time.time() and not de_tanda):
+            self.vigentes.pop(tarea_id, None)     #Tampoco se avisa una fecha que ya habia pasado cuando se la puso
+            return
+        self.vigentes[tarea_id] = fecha
+        heapq.heappush(self.heap, (cuando, tarea_id, VENCIDA, fecha))
+        if self.anticipacion > 0:
+            #Si ya esta dentro del plazo del recordatorio, el recordatorio sale enseguida
+            heapq.heappush(self.heap, (cuando - self.anticipacion, tarea_id, RECORDATORIO, fecha))
+        if len(self.heap) > 4 * max(len(self.vigentes), self.capacidad):
+            #Muchas entradas viejas (por ejemplo una fecha cambiada muchas veces): se rearma el heap sin ellas
+            self.heap = [entrada for entrada in self.heap if self.vigentes.get(entrada[1]) == entrada[3]]
+            heapq.heapify(self.heap)
+
+    def _cargar_tanda(self):
+        tareas = self.admin.traer_vencimientos(limite=self.capacidad, despues_de=self.cargadas_hasta)
+        if tareas:
+            self.cargadas_hasta = (tareas[-1].fecha_vencimiento, tareas[-1].id)
+        self.completo = len(tareas) < self.capacidad
+        for tarea in tareas:
+            self._programar(tarea.id, tarea.fecha_vencimiento, de_tanda=True)
+
+    def _procesar(self, evento: dict):
+        tipo = evento["tipo"]
+        if "rango" in evento:
+            primero, ultimo = evento["rango"]
+            ids = range(primero, ultimo + 1)
+        else:
+            ids = evento.get("ids", [])
+        if tipo == "vaciar":
+            self._reiniciar()
+            return
+        if tipo in ("eliminar", "archivar"):
+            for tarea_id in ids:
+                self.vigentes.pop(tarea_id, None)
+            return
+        if tipo not in ("insertar", "actualizar"):
+            return      #Por ejemplo "mover": cambiar de tarea padre no cambia el vencimiento
+        if len(ids) > self.capacidad:
+            self._reiniciar()       #Un lote grande: es mas barato volver a leer una tanda del indice
+            return
+        #Altas y cambios: se lee como quedo cada tarea (por clave primaria) para saber si cambio su vencimiento
+        tareas = {tarea.id: tarea for tarea in self.admin.obtener_tareas(list(ids))}
+        for tarea_id in ids:
+            tarea = tareas.get(tarea_id)
+            vence = tarea is not None and tarea.estado != "Completada"
+            self._programar(tarea_id, tarea.fecha_vencimiento if vence else None)
+
+    def _avisar_vencidos(self):
+        ahora = time.time()
+        llegaron = []
+        tope = self._tope()
+        while tope is not None and tope[0] <= ahora:
+            heapq.heappop(self.heap)
+            llegaron.append(tope)
+            if tope[2] == VENCIDA:
+                del self.vigentes[tope[1]]
+            tope = self._tope()
+        if not llegaron:
+            return
+        #Se vuelven a leer las tareas por si otro proceso las completo, elimino o les cambio la fecha
+        tareas = {tarea.id: tarea for tarea in self.admin.obtener_tareas([tarea_id for _, tarea_id, _, _ in llegaron])}
+        for cuando, tarea_id, tipo, fecha in llegaron:
+            tarea = tareas.get(tarea_id)
+            if tarea is None or tarea.estado == "Completada" or tarea.fecha_vencimiento != fecha:
+                continue
+            aviso = {"tipo": tipo, "id": tarea_id, "titulo": tarea.titulo, "fecha_vencimiento": fecha}
+            self.avisos += 1
+            for oyente in self.oyentes:
+                oyente(aviso)